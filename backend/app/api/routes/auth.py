@@ -1,27 +1,52 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from typing import Optional
 from app.models.schemas import Token, UserLogin
-from app.core.security import create_access_token, verify_password
+from app.core.security import create_access_token, verify_password_async, login_throttle, HashPoolBusy
+from app.services.users import user_store
 from datetime import timedelta
 from app.config import settings
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/token")
 
-# Temporary hardcoded users (replace with database in production)
-fake_users_db = {
-    "admin": {
-        "username": "admin",
-        "hashed_password": "$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW",  # secret
-        "is_active": True,
-    }
-}
+async def authenticate_user(username: str, password: str, request: Request) -> Optional[dict]:
+    """Check credentials off the event loop; attempts are throttled per user and per client IP"""
+    user_key = f"user:{username.lower()}"
+    ip_key = f"ip:{request.client.host if request.client else 'unknown'}"
+    # The attempt is counted before bcrypt runs, so parallel guesses hit the limit too
+    retry_after, stamp = login_throttle.reserve([
+        (user_key, settings.LOGIN_MAX_ATTEMPTS_PER_USER),
+        (ip_key, settings.LOGIN_MAX_ATTEMPTS_PER_IP),
+    ])
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    user = user_store.get(username)
+    try:
+        valid = bool(user and user["is_active"] and await verify_password_async(password, user["hashed_password"]))
+    except HashPoolBusy:
+        login_throttle.release(stamp, user_key, ip_key)
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts in progress, try again later",
+            headers={"Retry-After": "1"},
+        )
+    if not valid:
+        return None
+    login_throttle.release(stamp, ip_key)
+    login_throttle.reset(user_key)
+    return user
 
 @router.post("/token", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
     """Login endpoint"""
-    user = fake_users_db.get(form_data.username)
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    user = await authenticate_user(form_data.username, form_data.password, request)
+    if not user:
         raise HTTPException(
             status_code=401,
             detail="Incorrect username or password",
@@ -35,14 +60,14 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
-async def login_alt(user_login: UserLogin):
+async def login_alt(user_login: UserLogin, request: Request):
     """Alternative login endpoint for React"""
-    user = fake_users_db.get(user_login.username)
-    if not user or not verify_password(user_login.password, user["hashed_password"]):
+    user = await authenticate_user(user_login.username, user_login.password, request)
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user["username"]}, expires_delta=access_token_expires
     )
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return {"access_token": access_token, "token_type": "bearer"}
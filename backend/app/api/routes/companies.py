@@ -1,13 +1,50 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Query
 from typing import List, Optional
-from app.models.schemas import Company, CompanyCreate, CompanyUpdate, CompanyDetail, FilterParams
+from app.models.schemas import (
+    Company, CompanyCreate, CompanyUpdate, CompanyDetail, CompanySearchResult, FilterParams,
+    CompanyBulkUpdate, BulkUpdateResult
+)
 from app.core.database import get_db
-from app.services.data_processing import process_csv_file
+from app.core.cache import invalidate_cache
+from app.services.search import apply_search_filter, search_companies
+from app.services.address import location_fields, normalize_city
+from app.services.activity_log import activity_log
+import json
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Nombre max de SIREN par instruction `in.(...)` (longueur d'URL PostgREST)
+BULK_CHUNK_SIZE = 200
+
+def _filter_conditions(filters: FilterParams) -> list:
+    # Valeurs vides (0, "", espaces) ignorées: seules les conditions retournées restreignent la requête
+    conditions = []
+    if filters.ca_min:
+        conditions.append(lambda query: query.gte('chiffre_affaires', filters.ca_min))
+    if filters.effectif_min:
+        conditions.append(lambda query: query.gte('effectif', filters.effectif_min))
+    ville = normalize_city(filters.ville)
+    if ville:
+        conditions.append(lambda query: query.eq('ville', ville))
+    if filters.statut:
+        conditions.append(lambda query: query.eq('statut', filters.statut.value))
+    if filters.search and filters.search.strip():
+        conditions.append(lambda query: apply_search_filter(query, filters.search.strip()))
+    return conditions
+
+def _apply_filters(query, filters: FilterParams):
+    for condition in _filter_conditions(filters):
+        query = condition(query)
+    return query
+
+def _prepare_update(company_update: CompanyUpdate) -> dict:
+    update_data = company_update.model_dump(exclude_unset=True, mode='json')
+    if 'adresse' in update_data:
+        update_data.update(location_fields(update_data))
+    return update_data
+
 @router.get("/", response_model=List[Company])
 async def get_companies(
     skip: int = 0,
@@ -29,41 +66,101 @@ async def filter_companies(
 ):
     """Filter companies based on criteria"""
     try:
-        query = db.table('cabinets_comptables').select('*')
-        
-        if filters.ca_min:
-            query = query.gte('chiffre_affaires', filters.ca_min)
-        if filters.effectif_min:
-            query = query.gte('effectif', filters.effectif_min)
-        if filters.ville:
-            query = query.ilike('adresse', f'%{filters.ville}%')
-        if filters.statut:
-            query = query.eq('statut', filters.statut)
-        if filters.search:
-            query = query.or_(f'nom_entreprise.ilike.%{filters.search}%,siren.ilike.%{filters.search}%')
-        
+        query = _apply_filters(db.table('cabinets_comptables').select('*'), filters)
         response = query.order('score_prospection', desc=True).execute()
         return response.data
     except Exception as e:
         logger.error(f"Error filtering companies: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/bulk", response_model=BulkUpdateResult)
+async def bulk_update_companies(
+    bulk: CompanyBulkUpdate,
+    db = Depends(get_db)
+):
+    """Update many companies in a few batched statements, with one activity log entry"""
+    try:
+        if bulk.items and bulk.patch:
+            raise HTTPException(status_code=400, detail="Use either items or filters + patch")
+        
+        updated = []
+        not_found = []
+        fields = set()
+        
+        if bulk.items:
+            # Regrouper les SIREN recevant le même patch: une instruction par groupe
+            groups = {}
+            for item in bulk.items:
+                update_data = _prepare_update(item)
+                update_data.pop('siren', None)
+                if update_data:
+                    key = json.dumps(update_data, sort_keys=True)
+                    groups.setdefault(key, (update_data, []))[1].append(item.siren)
+            
+            for update_data, sirens in groups.values():
+                fields.update(update_data)
+                for i in range(0, len(sirens), BULK_CHUNK_SIZE):
+                    chunk = sirens[i:i + BULK_CHUNK_SIZE]
+                    response = db.table('cabinets_comptables').update(update_data).in_('siren', chunk).execute()
+                    found = {str(company['siren']) for company in response.data}
+                    updated.extend(found)
+                    not_found.extend(siren for siren in chunk if siren not in found)
+        
+        elif bulk.patch:
+            # Même règle que _apply_filters: un filtre vide n'ajoute aucune condition (toute la table)
+            if not bulk.filters or not _filter_conditions(bulk.filters):
+                raise HTTPException(status_code=400, detail="A bulk patch requires at least one filter")
+            update_data = _prepare_update(bulk.patch)
+            if update_data:
+                fields.update(update_data)
+                query = _apply_filters(db.table('cabinets_comptables').update(update_data), bulk.filters)
+                updated = [str(company['siren']) for company in query.execute().data]
+        
+        if updated:
+            await activity_log.log(
+                None,
+                'bulk_update',
+                {'fields_updated': sorted(fields), 'count': len(updated), 'sirens': updated}
+            )
+            invalidate_cache()
+        
+        return BulkUpdateResult(updated=len(updated), not_found=not_found)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in bulk update: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/search", response_model=List[CompanySearchResult])
+async def search(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db = Depends(get_db)
+):
+    """Autocomplete: SIREN prefix or ranked fuzzy match on company name"""
+    try:
+        return search_companies(db, q, limit)
+    except Exception as e:
+        logger.error(f"Error searching companies: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{siren}", response_model=CompanyDetail)
 async def get_company(siren: str, db = Depends(get_db)):
-    """Get company details by SIREN"""
+    """Get company details by SIREN, with its last 10 activity logs embedded"""
     try:
-        # Get company
-        response = db.table('cabinets_comptables').select('*').eq('siren', siren).single().execute()
-        if not response.data:
+        response = (
+            db.table('cabinets_comptables')
+            .select('*, activity_logs(*)')
+            .eq('siren', siren)
+            .order('created_at', desc=True, foreign_table='activity_logs')
+            .limit(10, foreign_table='activity_logs')
+            .maybe_single()
+            .execute()
+        )
+        if not response or not response.data:
             raise HTTPException(status_code=404, detail="Company not found")
         
-        company = response.data
-        
-        # Get activity logs
-        logs_response = db.table('activity_logs').select('*').eq('cabinet_id', company['id']).order('created_at', desc=True).limit(10).execute()
-        company['activity_logs'] = logs_response.data
-        
-        return company
+        return response.data
     except HTTPException:
         raise
     except Exception as e:
@@ -78,20 +175,19 @@ async def update_company(
 ):
     """Update company information"""
     try:
-        update_data = company_update.model_dump(exclude_unset=True)
+        update_data = _prepare_update(company_update)
         response = db.table('cabinets_comptables').update(update_data).eq('siren', siren).execute()
         
         if not response.data:
             raise HTTPException(status_code=404, detail="Company not found")
         
         # Log activity
-        company_id = response.data[0]['id']
-        db.table('activity_logs').insert({
-            'cabinet_id': company_id,
-            'action': 'update',
-            'details': {'fields_updated': list(update_data.keys())},
-            'user_info': 'API User'
-        }).execute()
+        await activity_log.log(
+            response.data[0]['id'],
+            'update',
+            {'fields_updated': list(update_data.keys())}
+        )
+        invalidate_cache()
         
         return response.data[0]
     except HTTPException:
@@ -102,23 +198,12 @@ async def update_company(
 
 @router.delete("/{siren}")
 async def delete_company(siren: str, db = Depends(get_db)):
-    """Delete a company"""
+    """Delete a company (lookup, activity log and delete in one transaction)"""
     try:
-        # Get company first
-        company = db.table('cabinets_comptables').select('id, nom_entreprise').eq('siren', siren).single().execute()
-        if not company.data:
+        response = db.rpc('delete_company', {'p_siren': siren, 'p_user_info': 'API User'}).execute()
+        if not response.data:
             raise HTTPException(status_code=404, detail="Company not found")
-        
-        # Log before deletion
-        db.table('activity_logs').insert({
-            'cabinet_id': company.data['id'],
-            'action': 'delete',
-            'details': {'nom_entreprise': company.data['nom_entreprise']},
-            'user_info': 'API User'
-        }).execute()
-        
-        # Delete
-        db.table('cabinets_comptables').delete().eq('siren', siren).execute()
+        invalidate_cache()
         
         return {"success": True, "message": "Company deleted"}
     except HTTPException:
@@ -138,6 +223,8 @@ async def upload_csv(
         if not file.filename.endswith('.csv'):
             raise HTTPException(status_code=400, detail="Only CSV files are allowed")
         
+        # pandas n'est chargé qu'au premier import CSV
+        from app.services.data_processing import process_csv_file
         result = await process_csv_file(file, db, update_existing)
         return result
     except HTTPException:
@@ -1,20 +1,33 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from contextlib import AsyncExitStack
+from typing import List, Optional
+from app.config import settings
 from app.models.schemas import ScrapingStatus
-from app.scrapers import pappers, societe, infogreffe
+from app.services.status_stream import status_events
 from app.core.database import get_db
+from app.core.job_lock import JobLease, get_job_locks
+from app.core.lifecycle import is_shutting_down
 import asyncio
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Scrapers et enrichissement (aiohttp, Playwright, openai) importés au premier lancement:
+# un worker qui ne sert que le CRUD ne les charge jamais
+
 # Global status tracking
 scraping_status = {
     'pappers': ScrapingStatus(is_running=False, progress=0, message=''),
     'societe': ScrapingStatus(is_running=False, progress=0, message=''),
-    'infogreffe': ScrapingStatus(is_running=False, progress=0, message='')
+    'infogreffe': ScrapingStatus(is_running=False, progress=0, message=''),
+    'refresh': ScrapingStatus(is_running=False, progress=0, message=''),
+    'crawl': ScrapingStatus(is_running=False, progress=0, message='')
 }
 
+CRAWL_SOURCES = ('pappers', 'societe')
+
 async def run_pappers_scraping(db):
     """Run Pappers API scraping in background"""
     global scraping_status
@@ -26,6 +39,7 @@ async def run_pappers_scraping(db):
             source='pappers'
         )
         
+        from app.scrapers import pappers
         scraper = pappers.PappersAPIClient(db)
         await scraper.run_full_scraping(scraping_status['pappers'])
         
@@ -47,6 +61,7 @@ async def run_societe_scraping(db):
             source='societe'
         )
         
+        from app.scrapers import societe
         scraper = societe.SocieteScraper(db)
         await scraper.run_full_scraping(scraping_status['societe'])
         
@@ -57,16 +72,122 @@ async def run_societe_scraping(db):
         scraping_status['societe'].is_running = False
         scraping_status['societe'].progress = 100
 
+async def run_infogreffe_enrichment(db, min_ca: int, min_score: int, siren: Optional[str] = None):
+    """Run Infogreffe registry lookup + scoring in background"""
+    global scraping_status
+    try:
+        scraping_status['infogreffe'] = ScrapingStatus(
+            is_running=True,
+            progress=0,
+            message="Initialisation de l'enrichissement Infogreffe...",
+            source='infogreffe'
+        )
+        
+        from app.scrapers import infogreffe
+        from app.services.enrichment import EnrichmentService
+        service = EnrichmentService(
+            db,
+            settings.OPENAI_API_KEY,
+            concurrency=settings.ENRICHMENT_CONCURRENCY,
+            batch_size=settings.ENRICHMENT_BATCH_SIZE
+        )
+        async with infogreffe.InfogreffeClient() as registry:
+            result = await service.enrich_companies(
+                min_ca=min_ca,
+                min_score=min_score,
+                siren=siren,
+                lookup=registry.lookup,
+                status_tracker=scraping_status['infogreffe']
+            )
+        
+        scraping_status['infogreffe'].message = (
+            f"Terminé: {result['enriched_count']}/{result['total_processed']} entreprises enrichies"
+        )
+        scraping_status['infogreffe'].metrics = {
+            'registry_errors': result['registry_errors'],
+            'write_errors': result['write_errors']
+        }
+        
+    except Exception as e:
+        scraping_status['infogreffe'].error = str(e)
+        logger.error(f"Infogreffe enrichment error: {e}")
+    finally:
+        scraping_status['infogreffe'].is_running = False
+        scraping_status['infogreffe'].progress = 100
+
+async def run_refresh(db, limit: int):
+    """Run the staleness-driven refresh of existing companies in background"""
+    global scraping_status
+    try:
+        scraping_status['refresh'] = ScrapingStatus(
+            is_running=True,
+            progress=0,
+            message="Calcul des fiches à rafraîchir...",
+            source='refresh'
+        )
+        
+        from app.services.refresh import refresh_from_pappers
+        result = await refresh_from_pappers(db, limit, scraping_status['refresh'])
+        
+        scraping_status['refresh'].message = (
+            f"Terminé: {result['updated']} fiches mises à jour, {result['unchanged']} inchangées, "
+            f"{result['failed']} en échec"
+        )
+        
+    except Exception as e:
+        scraping_status['refresh'].error = str(e)
+        logger.error(f"Refresh error: {e}")
+    finally:
+        scraping_status['refresh'].is_running = False
+        scraping_status['refresh'].progress = 100
+
+async def run_crawl(db, sources: List[str]):
+    """Run the multi-source crawl (shared SIREN claims, one write per company) in background"""
+    global scraping_status
+    try:
+        scraping_status['crawl'] = ScrapingStatus(
+            is_running=True,
+            progress=0,
+            message="Initialisation du crawl multi-sources...",
+            source='crawl'
+        )
+        
+        from app.scrapers.orchestrator import CrawlOrchestrator
+        await CrawlOrchestrator(db, sources).run(scraping_status['crawl'])
+        
+    except Exception as e:
+        scraping_status['crawl'].error = str(e)
+        logger.error(f"Crawl error: {e}")
+    finally:
+        scraping_status['crawl'].is_running = False
+        scraping_status['crawl'].progress = 100
+
+def acquire_job(source: str, detail: str) -> JobLease:
+    """Cluster-wide lease for `source`; 400 if any worker is already running it"""
+    if scraping_status[source].is_running:
+        raise HTTPException(status_code=400, detail=detail)
+    lease = get_job_locks().try_acquire(source)
+    if lease is None:
+        raise HTTPException(status_code=400, detail=f"{detail} on another worker")
+    return lease
+
+async def run_locked(source: str, leases: List[JobLease], job, *args):
+    """Run a background job while holding (and heartbeating) its leases"""
+    async with AsyncExitStack() as stack:
+        for lease in leases:
+            await stack.enter_async_context(lease)
+        await job(*args)
+    if any(lease.lost for lease in leases):
+        scraping_status[source].error = "Verrou perdu: tâche interrompue"
+
 @router.post("/pappers")
 async def start_pappers_scraping(
     background_tasks: BackgroundTasks,
     db = Depends(get_db)
 ):
     """Start Pappers API scraping"""
-    if scraping_status['pappers'].is_running:
-        raise HTTPException(status_code=400, detail="Pappers scraping already running")
-    
-    background_tasks.add_task(run_pappers_scraping, db)
+    lease = acquire_job('pappers', "Pappers scraping already running")
+    background_tasks.add_task(run_locked, 'pappers', [lease], run_pappers_scraping, db)
     return {"message": "Pappers scraping started", "status": "running"}
 
 @router.post("/societe")
@@ -75,10 +196,8 @@ async def start_societe_scraping(
     db = Depends(get_db)
 ):
     """Start Societe.com scraping"""
-    if scraping_status['societe'].is_running:
-        raise HTTPException(status_code=400, detail="Societe scraping already running")
-    
-    background_tasks.add_task(run_societe_scraping, db)
+    lease = acquire_job('societe', "Societe scraping already running")
+    background_tasks.add_task(run_locked, 'societe', [lease], run_societe_scraping, db)
     return {"message": "Societe.com scraping started", "status": "running"}
 
 @router.post("/infogreffe")
@@ -90,12 +209,82 @@ async def start_infogreffe_enrichment(
     db = Depends(get_db)
 ):
     """Start Infogreffe enrichment"""
-    if scraping_status['infogreffe'].is_running:
-        raise HTTPException(status_code=400, detail="Infogreffe enrichment already running")
-    
-    # TODO: Implement Infogreffe enrichment
+    lease = acquire_job('infogreffe', "Infogreffe enrichment already running")
+    background_tasks.add_task(run_locked, 'infogreffe', [lease], run_infogreffe_enrichment, db, min_ca, min_score, siren)
     return {"message": "Infogreffe enrichment started", "status": "running"}
 
+@router.post("/refresh")
+async def start_refresh(
+    background_tasks: BackgroundTasks,
+    limit: int = Query(settings.REFRESH_MAX_PER_RUN, ge=1),
+    db = Depends(get_db)
+):
+    """Refresh the most overdue companies from Pappers"""
+    lease = acquire_job('refresh', "Refresh already running")
+    background_tasks.add_task(run_locked, 'refresh', [lease], run_refresh, db, limit)
+    return {"message": "Refresh started", "status": "running"}
+
+@router.post("/crawl")
+async def start_crawl(
+    background_tasks: BackgroundTasks,
+    sources: str = Query(','.join(CRAWL_SOURCES)),
+    db = Depends(get_db)
+):
+    """Crawl several sources at once, fetching each company from the cheapest one"""
+    selected = [source for source in sources.split(',') if source]
+    unknown = [source for source in selected if source not in CRAWL_SOURCES]
+    if unknown or not selected:
+        raise HTTPException(status_code=422, detail=f"Invalid source: {', '.join(unknown) or sources}")
+    
+    # The crawl stands in for each source's own scraping: it takes their leases too
+    leases = [acquire_job('crawl', "Crawl already running")]
+    try:
+        for source in selected:
+            leases.append(acquire_job(source, f"{source} scraping already running"))
+    except HTTPException:
+        for lease in leases:
+            lease.release()
+        raise
+    background_tasks.add_task(run_locked, 'crawl', leases, run_crawl, db, selected)
+    return {"message": "Crawl started", "sources": selected, "status": "running"}
+
+@router.get("/refresh/queue")
+async def get_refresh_queue(limit: int = Query(50, ge=1, le=1000), db = Depends(get_db)):
+    """Companies due for refresh, highest priority first"""
+    from app.services.refresh import build_scheduler
+    queue = build_scheduler(db, None).plan(limit)
+    return [
+        {
+            'siren': company['siren'],
+            'nom_entreprise': company['nom_entreprise'],
+            'statut': company['statut'],
+            'last_scraped_at': company['last_scraped_at'],
+            'priority': company['priority'] if company['priority'] != float('inf') else None
+        }
+        for company in queue
+    ]
+
+@router.get("/events")
+async def stream_status(request: Request, sources: Optional[str] = None):
+    """Server-Sent Events stream of scraping progress (snapshot, then coalesced deltas)"""
+    selected = sources.split(',') if sources else list(scraping_status)
+    unknown = [source for source in selected if source not in scraping_status]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Invalid source: {', '.join(unknown)}")
+    
+    def get_statuses():
+        return {source: scraping_status[source].model_dump() for source in selected}
+    
+    async def should_stop():
+        # Le flux ne doit pas retarder l'arrêt du worker; EventSource se reconnecte seul
+        return is_shutting_down() or await request.is_disconnected()
+    
+    return StreamingResponse(
+        status_events(get_statuses, should_stop, interval=settings.SCRAPING_EVENTS_INTERVAL),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/status/{source}")
 async def get_scraping_status(source: str):
     """Get scraping status for a specific source"""
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.models.schemas import Stats, FilterParams
 from app.core.database import get_db
-import pandas as pd
+from app.services.search import apply_search_filter
+from app.services.address import normalize_city
 import logging
 
 router = APIRouter()
@@ -20,6 +21,7 @@ async def get_stats(db = Depends(get_db)):
                 par_statut={}
             )
         
+        import pandas as pd  # chargé à la première requête, pas au démarrage du worker
         df = pd.DataFrame(response.data)
         
         # Calculate stats
@@ -53,11 +55,11 @@ async def get_filtered_stats(filters: FilterParams, db = Depends(get_db)):
         if filters.effectif_min:
             query = query.gte('effectif', filters.effectif_min)
         if filters.ville:
-            query = query.ilike('adresse', f'%{filters.ville}%')
+            query = query.eq('ville', normalize_city(filters.ville))
         if filters.statut:
-            query = query.eq('statut', filters.statut)
+            query = query.eq('statut', filters.statut.value)
         if filters.search:
-            query = query.or_(f'nom_entreprise.ilike.%{filters.search}%,siren.ilike.%{filters.search}%')
+            query = apply_search_filter(query, filters.search)
         
         response = query.execute()
         
@@ -68,6 +70,7 @@ async def get_filtered_stats(filters: FilterParams, db = Depends(get_db)):
                 par_statut={}
             )
         
+        import pandas as pd
         df = pd.DataFrame(response.data)
         
         # Same calculations as above
@@ -93,20 +96,8 @@ async def get_filtered_stats(filters: FilterParams, db = Depends(get_db)):
 async def get_cities(db = Depends(get_db)):
     """Get list of unique cities"""
     try:
-        response = db.table('cabinets_comptables').select('adresse').execute()
-        
-        cities = set()
-        for company in response.data:
-            if company['adresse']:
-                # Extract city from address
-                parts = company['adresse'].split(',')
-                if len(parts) > 1:
-                    ville_cp = parts[-1].strip()
-                    ville_parts = ville_cp.split(' ', 1)
-                    if len(ville_parts) > 1:
-                        cities.add(ville_parts[1])
-        
-        return {"cities": sorted(list(cities))}
+        response = db.table('cabinets_villes').select('ville').order('ville').execute()
+        return {"cities": [row['ville'] for row in response.data]}
     except Exception as e:
         logger.error(f"Error fetching cities: {e}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
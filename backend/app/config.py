@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     # App
@@ -7,14 +7,47 @@ class Settings(BaseSettings):
     VERSION: str = "2.0.0"
     API_V1_STR: str = "/api/v1"
     
+    # Serveur (python -m app.server)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 1  # 0: un worker par cœur (état en mémoire propre à chaque worker, cf. README)
+    SERVER_RELOAD: bool = False  # développement uniquement (force un seul worker)
+    SERVER_GRACEFUL_TIMEOUT: int = 30  # secondes laissées aux requêtes et tâches en cours
+    SERVER_FORWARDED_ALLOW_IPS: str = "127.0.0.1"  # proxys autorisés à fixer X-Forwarded-For
+    LOG_LEVEL: str = "INFO"
+    METRICS_ENABLED: bool = True  # /metrics et instrumentation des requêtes base
+    
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_CACHE_SIZE: int = 1024  # 0 pour désactiver le cache des tokens vérifiés
+    PASSWORD_HASH_WORKERS: int = 2  # threads bcrypt (hors boucle asyncio)
+    PASSWORD_HASH_MAX_PENDING: int = 16  # vérifications en cours ou en file; au-delà, 429
+    LOGIN_MAX_ATTEMPTS_PER_USER: int = 5
+    LOGIN_MAX_ATTEMPTS_PER_IP: int = 20
+    LOGIN_ATTEMPT_WINDOW_SECONDS: int = 300
+    USER_CACHE_TTL_SECONDS: int = 30  # cache des comptes utilisateurs (0 pour désactiver)
+    USER_CACHE_MAX_ENTRIES: int = 1024
     
     # Database
-    SUPABASE_URL: str
-    SUPABASE_KEY: str
+    DATABASE_BACKEND: str = "supabase"  # "supabase" ou "memory"
+    SUPABASE_URL: str = ""
+    SUPABASE_KEY: str = ""
+    DATABASE_URL: Optional[str] = None  # connexion Postgres directe: migrations (python -m app.core.migrations)
+    
+    # Cache des réponses GET (/companies, /stats)
+    CACHE_BACKEND: str = "memory"  # "memory" ou "redis"
+    CACHE_TTL_SECONDS: int = 60
+    CACHE_MAX_ENTRIES: int = 512
+    CACHE_INVALIDATE_BATCH_SIZE: int = 50  # créations des scrapers entre deux invalidations du cache
+    REDIS_URL: Optional[str] = None
+    
+    # Logs d'activité (écriture par lots en tâche de fond)
+    ACTIVITY_LOG_QUEUE_SIZE: int = 10000
+    ACTIVITY_LOG_BATCH_SIZE: int = 200
+    ACTIVITY_LOG_FLUSH_INTERVAL: float = 1.0
+    ACTIVITY_LOG_OVERFLOW: str = "drop_oldest"  # "block", "drop_oldest" ou "drop_newest"
     
     # External APIs
     OPENAI_API_KEY: Optional[str] = None
@@ -22,6 +55,42 @@ class Settings(BaseSettings):
     
     # Scraping
     HEADLESS: bool = True
+    SCRAPING_EVENTS_INTERVAL: float = 0.5  # max 2 événements SSE/s par client
+    SCRAPING_QUEUE_SIZE: int = 100  # éléments en attente entre deux étapes du pipeline
+    PAPPERS_DETAIL_CONCURRENCY: int = 3  # appels /entreprise simultanés
+    SOCIETE_DETAIL_CONCURRENCY: int = 1  # onglets de fiches simultanés (anti-détection)
+    SOCIETE_CONTEXT_MAX_PAGES: int = 200  # pages chargées avant un nouveau contexte navigateur
+    SOCIETE_BROWSER_MAX_MEMORY_MB: int = 1500  # au-delà, Chromium est relancé
+    PAPPERS_DETAIL_CACHE_DIR: str = "cache/pappers"  # fiches /entreprise déjà récupérées
+    PAPPERS_DETAIL_CACHE_TTL_SECONDS: int = 7 * 24 * 3600  # 0 pour désactiver le cache disque
+    # Crawl multi-sources (POST /scraping/crawl): coût relatif d'une fiche par source
+    CRAWL_SOURCE_COSTS: Dict[str, float] = {'pappers': 1.0, 'societe': 3.0}  # crédit API vs page lente à captcha
+    SCRAPING_RETRY_ATTEMPTS: int = 3  # tentatives par requête sur erreur transitoire (429, 5xx, réseau, captcha)
+    
+    # Disjoncteur par hôte (app/scrapers/circuit.py)
+    SCRAPING_BREAKER_ERROR_RATE: float = 0.5  # taux d'échecs de la fenêtre qui ouvre le disjoncteur
+    SCRAPING_BREAKER_WINDOW: int = 20  # dernières requêtes prises en compte
+    SCRAPING_BREAKER_MIN_REQUESTS: int = 5
+    SCRAPING_BREAKER_OPEN_SECONDS: float = 30  # première pause, doublée à chaque déclenchement consécutif
+    SCRAPING_BREAKER_MAX_OPEN_SECONDS: float = 600
+    SCRAPING_BREAKER_MAX_TRIPS: int = 6  # au-delà, le scraping s'arrête (0: attendre indéfiniment)
+    
+    # Verrou des tâches longues entre workers (app/core/job_lock.py)
+    JOB_LOCK_TTL_SECONDS: int = 60  # un worker mort libère la tâche après ce délai
+    JOB_LOCK_HEARTBEAT_SECONDS: float = 20
+    JOB_LOCK_SQLITE_PATH: str = "cache/job_locks.sqlite3"  # backend mémoire: workers d'une même machine
+    
+    # Rafraîchissement des fiches existantes (python -m app.services.refresh ou POST /scraping/refresh)
+    REFRESH_INTERVAL_DAYS: float = 90  # âge auquel une fiche de poids 1 est due
+    REFRESH_BATCH_SIZE: int = 20
+    REFRESH_CONCURRENCY: int = 3
+    REFRESH_BATCH_PAUSE: float = 2.0  # secondes entre deux lots (limites API)
+    REFRESH_MAX_PER_RUN: int = 500
+    
+    # Enrichissement
+    INFOGREFFE_API_URL: str = "https://opendata.datainfogreffe.fr/api/explore/v2.1/catalog/datasets/chiffres-cles-2023/records"
+    ENRICHMENT_CONCURRENCY: int = 5
+    ENRICHMENT_BATCH_SIZE: int = 50
     
     class Config:
         env_file = ".env"
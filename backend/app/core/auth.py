@@ -2,11 +2,45 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from datetime import datetime
+from collections import OrderedDict
+from typing import Dict, Optional
+import time
 from app.config import settings
-from app.core.database import get_db
+from app.services.users import user_store
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/token")
 
+class VerifiedTokenCache:
+    """LRU des tokens déjà vérifiés -> claims, jusqu'à leur expiration (`exp`)"""
+    
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+    
+    def get(self, token: str) -> Optional[Dict]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            del self._entries[token]
+            return None
+        self._entries.move_to_end(token)
+        return payload
+    
+    def put(self, token: str, payload: Dict):
+        if not self.max_size or payload.get("exp") is None:
+            return
+        self._entries[token] = (float(payload["exp"]), payload)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def clear(self):
+        self._entries.clear()
+
+token_cache = VerifiedTokenCache(settings.TOKEN_CACHE_SIZE)
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     """Valide le token JWT et retourne l'utilisateur"""
     credentials_exception = HTTPException(
@@ -16,21 +50,31 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     )
     
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = token_cache.get(token)
+        if payload is None:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            token_cache.put(token, payload)
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     
-    # Pour l'instant on retourne juste le username
-    # TODO: Récupérer l'utilisateur depuis la base
+    # Token seul: le compte (existence, statut actif) est vérifié par `get_current_active_user`
     return {"username": username}
 
 async def get_current_active_user(current_user: dict = Depends(get_current_user)):
-    """Vérifie que l'utilisateur est actif"""
-    # TODO: Vérifier le statut en base
-    return current_user
+    """Vérifie que l'utilisateur existe et est actif (compte lu via le cache de `user_store`)"""
+    user = user_store.get(current_user["username"])
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not user["is_active"]:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
+    return {"id": user["id"], "username": user["username"], "is_active": True}
 
 # Dependency optionnelle pour les routes qui peuvent être publiques
 async def get_optional_current_user(token: str = Depends(oauth2_scheme)):
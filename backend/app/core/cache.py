@@ -0,0 +1,264 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode
+from starlette.datastructures import Headers
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class CacheBackend:
+    """Interface des backends de cache de réponses"""
+
+    def get(self, key: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Dict, ttl: int):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def get_generation(self) -> int:
+        raise NotImplementedError
+
+    def incr_generation(self) -> int:
+        raise NotImplementedError
+
+class MemoryLRUCache(CacheBackend):
+    """Cache LRU en mémoire du processus avec expiration"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_generation(self) -> int:
+        return self._generation
+
+    def incr_generation(self) -> int:
+        with self._lock:
+            self._generation += 1
+            return self._generation
+
+class RedisCache(CacheBackend):
+    """Cache partagé entre workers (nécessite le paquet `redis`)"""
+
+    PREFIX = "response-cache:"
+    # Hors du préfixe: clear() ne doit pas remettre la génération à zéro
+    GENERATION_KEY = "response-cache-generation"
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[Dict]:
+        raw = self.client.get(self.PREFIX + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key: str, value: Dict, ttl: int):
+        self.client.set(self.PREFIX + key, json.dumps(value), ex=ttl)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.PREFIX + "*", count=500))
+        if keys:
+            self.client.delete(*keys)
+
+    def get_generation(self) -> int:
+        return int(self.client.get(self.GENERATION_KEY) or 0)
+
+    def incr_generation(self) -> int:
+        return self.client.incr(self.GENERATION_KEY)
+
+class ResponseCache:
+    """Cache des réponses GET, invalidé par les écritures
+
+    Les entrées sont rangées sous la génération lue au début de la requête; la
+    génération est portée par le backend (partagée entre workers avec Redis) et
+    incrémentée à chaque invalidation, si bien qu'une réponse calculée avant une
+    écriture n'est plus jamais servie, quel que soit le worker qui l'a stockée.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def make_key(path: str, query_string: str) -> str:
+        params = urlencode(sorted(parse_qsl(query_string, keep_blank_values=True)))
+        return f"{path}?{params}"
+
+    def current_generation(self) -> Optional[int]:
+        try:
+            return self.backend.get_generation()
+        except Exception as e:
+            logger.warning(f"Response cache generation read failed: {e}")
+            return None
+
+    def get(self, key: str, generation: Optional[int]) -> Optional[Dict]:
+        if generation is None:
+            return None
+        try:
+            return self.backend.get(f"{generation}:{key}")
+        except Exception as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+
+    def set(self, key: str, value: Dict, generation: Optional[int]):
+        if generation is None:
+            return
+        try:
+            self.backend.set(f"{generation}:{key}", value, self.ttl)
+        except Exception as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    def invalidate(self):
+        try:
+            self.backend.incr_generation()
+            self.backend.clear()
+        except Exception as e:
+            logger.warning(f"Response cache invalidation failed: {e}")
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates or f"W/{etag}" in candidates
+
+class ResponseCacheMiddleware:
+    """Middleware ASGI: cache des GET sur les préfixes donnés, ETag et réponses 304"""
+
+    def __init__(self, app, cache: ResponseCache, prefixes: Iterable[str]):
+        self.app = app
+        self.cache = cache
+        self.prefixes = tuple(prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'GET' or not scope['path'].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        key = ResponseCache.make_key(scope['path'], scope['query_string'].decode('latin-1'))
+        if_none_match = Headers(scope=scope).get('if-none-match')
+
+        generation = self.cache.current_generation()
+        cached = self.cache.get(key, generation)
+        if cached is not None:
+            await self._send_cached(send, cached, if_none_match, 'HIT')
+            return
+
+        start_message = None
+        chunks = []
+
+        async def capture(message):
+            nonlocal start_message
+            if message['type'] == 'http.response.start':
+                start_message = message
+                return
+            if message['type'] != 'http.response.body':
+                await send(message)
+                return
+            chunks.append(message.get('body', b''))
+            if message.get('more_body', False):
+                return
+
+            body = b''.join(chunks)
+            if start_message['status'] != 200:
+                await send(start_message)
+                await send({'type': 'http.response.body', 'body': body})
+                return
+
+            headers = Headers(raw=start_message['headers'])
+            entry = {
+                'etag': make_etag(body),
+                'content_type': headers.get('content-type', 'application/json'),
+                'body': body.decode('utf-8')
+            }
+            self.cache.set(key, entry, generation)
+            await self._send_cached(send, entry, if_none_match, 'MISS')
+
+        await self.app(scope, receive, capture)
+
+    async def _send_cached(self, send, entry: Dict, if_none_match: Optional[str], cache_status: str):
+        headers = [
+            (b'etag', entry['etag'].encode()),
+            (b'cache-control', b'no-cache'),
+            (b'x-cache', cache_status.encode()),
+        ]
+        if etag_matches(if_none_match, entry['etag']):
+            await send({'type': 'http.response.start', 'status': 304, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        body = entry['body'].encode('utf-8')
+        headers += [
+            (b'content-type', entry['content_type'].encode()),
+            (b'content-length', str(len(body)).encode()),
+        ]
+        await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+def _build_backend() -> CacheBackend:
+    if settings.CACHE_BACKEND == 'redis':
+        return RedisCache(settings.REDIS_URL)
+    return MemoryLRUCache(settings.CACHE_MAX_ENTRIES)
+
+response_cache = ResponseCache(_build_backend(), settings.CACHE_TTL_SECONDS)
+
+def invalidate_cache():
+    """À appeler après toute écriture sur les entreprises"""
+    response_cache.invalidate()
+
+class InvalidationBatch:
+    """Invalidation groupée pour les écritures en masse (scrapers): une fois par lot, puis à la fin
+
+    Entre deux invalidations, une réponse en cache a au plus CACHE_TTL_SECONDS.
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = max(batch_size, 1)
+        self.pending = 0
+
+    def add(self):
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.pending = 0
+            invalidate_cache()
@@ -1,23 +1,88 @@
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, Any
 from app.config import settings
+from app.core.memory_db import MemoryClient
+from app.core.metrics import record_query
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+if TYPE_CHECKING:
+    from supabase import Client
+
+QUERY_OPERATIONS = ('select', 'insert', 'upsert', 'update', 'delete')
+
+class InstrumentedQuery:
+    """Enveloppe d'un builder postgrest: chronomètre `execute()`"""
+    
+    def __init__(self, builder: Any, table: str, operation: str = 'select'):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+    
+    def execute(self):
+        start = time.perf_counter()
+        try:
+            return self._builder.execute()
+        finally:
+            record_query(self._table, self._operation, time.perf_counter() - start)
+    
+    def __getattr__(self, name: str):
+        attr = getattr(self._builder, name)
+        operation = name if name in QUERY_OPERATIONS else self._operation
+        if not callable(attr):
+            return self._wrap(attr, operation)
+        
+        def method(*args, **kwargs):
+            return self._wrap(attr(*args, **kwargs), operation)
+        return method
+    
+    def _wrap(self, result: Any, operation: str):
+        if hasattr(result, 'execute') or hasattr(result, 'select'):
+            return InstrumentedQuery(result, self._table, operation)
+        return result
+
+class InstrumentedClient:
+    """Client base de données qui compte et chronomètre chaque requête (métriques /metrics)"""
+    
+    def __init__(self, client: Any):
+        self.wrapped = client
+    
+    def table(self, name: str) -> InstrumentedQuery:
+        return InstrumentedQuery(self.wrapped.table(name), name)
+    
+    from_ = table
+    
+    def rpc(self, name: str, params: dict = None) -> InstrumentedQuery:
+        return InstrumentedQuery(self.wrapped.rpc(name, params or {}), name, 'rpc')
+    
+    def __getattr__(self, name: str):
+        return getattr(self.wrapped, name)
+
+def unwrap_client(db: Any) -> Any:
+    """Client sous-jacent (MemoryClient ou supabase.Client)"""
+    return getattr(db, 'wrapped', db)
+
 class Database:
-    client: Client = None
+    client: "Client" = None
     
     @classmethod
     async def init(cls):
         try:
-            cls.client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-            logger.info("Connected to Supabase")
+            if settings.DATABASE_BACKEND == "memory":
+                client = MemoryClient()
+                logger.info("Using in-memory database")
+            else:
+                from supabase import create_client
+                client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+                logger.info("Connected to Supabase")
+            cls.client = InstrumentedClient(client) if settings.METRICS_ENABLED else client
         except Exception as e:
             logger.error(f"Failed to connect to Supabase: {e}")
             raise
     
     @classmethod
-    def get_client(cls) -> Client:
+    def get_client(cls) -> "Client":
         if not cls.client:
             raise RuntimeError("Database not initialized")
         return cls.client
@@ -25,5 +90,5 @@ class Database:
 async def init_db():
     await Database.init()
 
-def get_db() -> Client:
+def get_db() -> "Client":
     return Database.get_client()
\ No newline at end of file
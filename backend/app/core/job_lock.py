@@ -0,0 +1,200 @@
+"""Verrou à bail des tâches longues (scrapings, rafraîchissement), partagé entre workers
+
+Un seul worker peut détenir le bail d'une tâche (`pappers`, `societe`...). Le
+détenteur le prolonge toutes les JOB_LOCK_HEARTBEAT_SECONDS; un worker tué
+cesse de le prolonger et le bail expire après JOB_LOCK_TTL_SECONDS, sans
+intervention. Si un bail est perdu (heartbeat impossible puis repris par un
+autre worker), la tâche qui le détenait est annulée.
+
+Backends: table `job_leases` + fonctions RPC sous Supabase (migration 005),
+fichier SQLite local avec la base en mémoire (workers d'une même machine).
+"""
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class LeaseStore:
+    """Interface des backends de baux"""
+
+    def acquire(self, name: str, holder: str, ttl: int) -> bool:
+        raise NotImplementedError
+
+    def renew(self, name: str, holder: str, ttl: int) -> bool:
+        raise NotImplementedError
+
+    def release(self, name: str, holder: str):
+        raise NotImplementedError
+
+    def current(self, name: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+class SupabaseLeaseStore(LeaseStore):
+    """Baux en base (horloge du serveur Postgres, pas celle des workers)"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def acquire(self, name: str, holder: str, ttl: int) -> bool:
+        response = self.db.rpc('acquire_job_lease', {'p_name': name, 'p_holder': holder, 'p_ttl_seconds': ttl}).execute()
+        return bool(response.data)
+
+    def renew(self, name: str, holder: str, ttl: int) -> bool:
+        response = self.db.rpc('renew_job_lease', {'p_name': name, 'p_holder': holder, 'p_ttl_seconds': ttl}).execute()
+        return bool(response.data)
+
+    def release(self, name: str, holder: str):
+        self.db.rpc('release_job_lease', {'p_name': name, 'p_holder': holder}).execute()
+
+    def current(self, name: str) -> Optional[Dict]:
+        response = self.db.table('job_leases').select('*').eq('name', name).gt('expires_at', 'now').execute()
+        return response.data[0] if response.data else None
+
+class SQLiteLeaseStore(LeaseStore):
+    """Baux dans un fichier SQLite: suffit aux workers d'une même machine"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_leases ("
+                "name TEXT PRIMARY KEY, holder TEXT NOT NULL, acquired_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Une connexion par appel: pas d'état partagé entre threads ni entre processus
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def acquire(self, name: str, holder: str, ttl: int) -> bool:
+        now = time.time()
+        with self._connect() as conn:
+            # Une seule instruction: l'insertion ou la reprise d'un bail expiré est atomique
+            cursor = conn.execute(
+                "INSERT INTO job_leases (name, holder, acquired_at, expires_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, acquired_at = excluded.acquired_at, "
+                "expires_at = excluded.expires_at "
+                "WHERE job_leases.expires_at < ? OR job_leases.holder = excluded.holder",
+                (name, holder, now, now + ttl, now)
+            )
+            return cursor.rowcount > 0
+
+    def renew(self, name: str, holder: str, ttl: int) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE job_leases SET expires_at = ? WHERE name = ? AND holder = ?",
+                (time.time() + ttl, name, holder)
+            )
+            return cursor.rowcount > 0
+
+    def release(self, name: str, holder: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM job_leases WHERE name = ? AND holder = ?", (name, holder))
+
+    def current(self, name: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT holder, acquired_at, expires_at FROM job_leases WHERE name = ? AND expires_at >= ?",
+                (name, time.time())
+            ).fetchone()
+        return {'name': name, 'holder': row[0], 'acquired_at': row[1], 'expires_at': row[2]} if row else None
+
+class JobLease:
+    """Bail détenu; `async with lease:` le prolonge pendant la tâche puis le libère"""
+
+    def __init__(self, store: LeaseStore, name: str, holder: str, ttl: int, heartbeat_interval: float):
+        self.store = store
+        self.name = name
+        self.holder = holder
+        self.ttl = ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.lost = False
+        self._task: Optional[asyncio.Task] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        self._task = asyncio.current_task()
+        self._heartbeat = asyncio.create_task(self._beat())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._heartbeat.cancel()
+        await asyncio.gather(self._heartbeat, return_exceptions=True)
+        self.release()
+        # Annulation due à la perte du bail: la tâche s'arrête sans propager l'annulation
+        return self.lost and exc_type is asyncio.CancelledError
+
+    async def _beat(self):
+        renewed_at = time.monotonic()
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                renewed = self.store.renew(self.name, self.holder, self.ttl)
+            except Exception as e:
+                logger.warning(f"Prolongation du bail {self.name} impossible: {e}")
+                # Panne passagère: le bail court encore, on réessaie au prochain battement
+                if time.monotonic() - renewed_at < self.ttl:
+                    continue
+                renewed = False
+            if not renewed:
+                logger.error(f"Bail {self.name} perdu (expiré, peut-être repris ailleurs): arrêt de la tâche")
+                self.lost = True
+                if self._task is not None:
+                    self._task.cancel()
+                return
+            renewed_at = time.monotonic()
+
+    def release(self):
+        try:
+            self.store.release(self.name, self.holder)
+        except Exception as e:
+            # Le bail expirera de lui-même
+            logger.warning(f"Libération du bail {self.name} impossible: {e}")
+
+class JobLocks:
+    """Prise de baux pour le processus courant (un détenteur par acquisition)"""
+
+    def __init__(self, store: LeaseStore, ttl: int = 60, heartbeat_interval: float = 20):
+        self.store = store
+        self.ttl = ttl
+        self.heartbeat_interval = heartbeat_interval
+
+    def try_acquire(self, name: str) -> Optional[JobLease]:
+        """Le bail si la tâche n'est détenue par aucun worker (ou a expiré), sinon None"""
+        holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        if not self.store.acquire(name, holder, self.ttl):
+            return None
+        return JobLease(self.store, name, holder, self.ttl, self.heartbeat_interval)
+
+    def current(self, name: str) -> Optional[Dict]:
+        return self.store.current(name)
+
+_job_locks: Optional[JobLocks] = None
+
+def get_job_locks() -> JobLocks:
+    """Baux du backend configuré (créés au premier appel, après init_db)"""
+    global _job_locks
+    if _job_locks is None:
+        if settings.DATABASE_BACKEND == 'memory':
+            store: LeaseStore = SQLiteLeaseStore(settings.JOB_LOCK_SQLITE_PATH)
+        else:
+            from app.core.database import get_db
+            store = SupabaseLeaseStore(get_db())
+        _job_locks = JobLocks(store, settings.JOB_LOCK_TTL_SECONDS, settings.JOB_LOCK_HEARTBEAT_SECONDS)
+    return _job_locks
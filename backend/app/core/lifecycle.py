@@ -0,0 +1,11 @@
+"""État d'arrêt du worker, partagé entre le serveur (signaux) et les tâches longues"""
+
+_shutting_down = False
+
+def request_shutdown():
+    """Appelé à la réception de SIGTERM/SIGINT, avant l'attente des requêtes en cours"""
+    global _shutting_down
+    _shutting_down = True
+
+def is_shutting_down() -> bool:
+    return _shutting_down
@@ -0,0 +1,563 @@
+"""Base de données en mémoire compatible avec le sous-ensemble du client Supabase utilisé par l'application.
+
+Utilisée quand ``DATABASE_BACKEND=memory`` (tests, benchmarks, développement hors ligne).
+"""
+import copy
+import json
+import re
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from app.core.text import normalize_text
+
+# Colonnes à contrainte d'unicité, en plus de la clé primaire `id`
+UNIQUE_COLUMNS = {
+    'cabinets_comptables': ['siren'],
+    'users': ['username'],
+}
+
+# Colonnes horodatées automatiquement à l'insertion
+TIMESTAMP_COLUMNS = {
+    'cabinets_comptables': ['created_at', 'updated_at'],
+    'activity_logs': ['created_at'],
+    'users': ['created_at', 'updated_at'],
+}
+
+
+# Lignes insérées par les migrations (présentes après chaque remise à zéro)
+SEED_ROWS: Dict[str, List[Dict]] = {
+    'users': [
+        {
+            'username': 'admin',
+            'hashed_password': '$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW',  # secret
+            'is_active': True,
+        },
+    ],
+}
+
+# Colonnes générées (équivalent des `GENERATED ALWAYS AS ... STORED` des migrations)
+GENERATED_COLUMNS: Dict[str, Dict[str, Callable[[Dict], Any]]] = {
+    'cabinets_comptables': {
+        'nom_recherche': lambda row: normalize_text(row.get('nom_entreprise')),
+    },
+}
+
+# Vues en lecture seule (équivalent des `CREATE VIEW` des migrations)
+VIEWS: Dict[str, Callable[[Dict[str, List[Dict]]], List[Dict]]] = {
+    'cabinets_villes': lambda tables: [
+        {'ville': ville}
+        for ville in sorted({r['ville'] for r in tables.get('cabinets_comptables', []) if r.get('ville')})
+    ],
+}
+
+# Valeurs par défaut des colonnes (`DEFAULT` du schéma), appliquées aux colonnes absentes à l'insertion
+COLUMN_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    'cabinets_comptables': {'statut': 'à contacter'},
+}
+
+# Relations pour les ressources embarquées: (table, table liée) -> (colonne locale, clé étrangère)
+RELATIONS = {
+    ('cabinets_comptables', 'activity_logs'): ('id', 'cabinet_id'),
+}
+
+# Clés étrangères `ON DELETE SET NULL`: table parente -> [(table, colonne, colonne référencée)]
+FOREIGN_KEYS = {
+    'cabinets_comptables': [('activity_logs', 'cabinet_id', 'id')],
+}
+
+
+class MemoryDBError(Exception):
+    """Erreur levée par la base en mémoire (violation de contrainte, requête invalide)"""
+
+
+class MemoryResponse:
+    """Réponse au format de postgrest (`data` et `count`)"""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _as_json(value: Any) -> Any:
+    """Copie telle que reçue par PostgREST (enums en valeur, dates en ISO)"""
+    return json.loads(json.dumps(value, default=lambda v: v.isoformat() if hasattr(v, 'isoformat') else str(v)))
+
+
+@lru_cache(maxsize=256)
+def _like_to_regex(pattern: str, case_insensitive: bool) -> re.Pattern:
+    regex = ''
+    for char in pattern:
+        if char in ('%', '*'):
+            regex += '.*'
+        elif char == '_':
+            regex += '.'
+        else:
+            regex += re.escape(char)
+    flags = re.IGNORECASE | re.DOTALL if case_insensitive else re.DOTALL
+    return re.compile(f'^{regex}$', flags)
+
+
+def _coerce(row_value: Any, value: Any):
+    """Aligne le type de la valeur filtrée sur celui de la colonne"""
+    if isinstance(row_value, bool) or isinstance(value, bool):
+        return row_value, value
+    if isinstance(row_value, (int, float)):
+        try:
+            return row_value, float(value)
+        except (TypeError, ValueError):
+            return str(row_value), str(value)
+    if isinstance(value, (int, float)):
+        try:
+            return float(row_value), value
+        except (TypeError, ValueError):
+            return str(row_value), str(value)
+    return str(row_value), str(value)
+
+
+def _compare(op: str, row_value: Any, value: Any) -> bool:
+    if op == 'is':
+        if value in (None, 'null'):
+            return row_value is None
+        if value in (True, 'true'):
+            return row_value is True
+        if value in (False, 'false'):
+            return row_value is False
+        raise MemoryDBError(f"Valeur invalide pour is: {value}")
+    if op == 'in':
+        return any(_compare('eq', row_value, v) for v in value)
+    if row_value is None:
+        return False
+    if op in ('like', 'ilike'):
+        return bool(_like_to_regex(str(value), op == 'ilike').match(str(row_value)))
+    left, right = _coerce(row_value, value)
+    if op == 'eq':
+        return left == right
+    if op == 'neq':
+        return left != right
+    if op == 'gt':
+        return left > right
+    if op == 'gte':
+        return left >= right
+    if op == 'lt':
+        return left < right
+    if op == 'lte':
+        return left <= right
+    raise MemoryDBError(f"Opérateur non supporté: {op}")
+
+
+def _split_top_level(expression: str) -> List[str]:
+    parts, depth, current = [], 0, ''
+    for char in expression:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        if char == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+        else:
+            current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _parse_or(expression: str) -> List[Callable[[Dict], bool]]:
+    """Parse une expression `or_` de postgrest (`col.op.valeur,col.op.valeur`)"""
+    conditions = []
+    for part in _split_top_level(expression):
+        column, op, value = part.strip().split('.', 2)
+        if op == 'in':
+            value = [v.strip().strip('"') for v in value.strip('()').split(',')]
+        conditions.append(lambda row, c=column, o=op, v=value: _compare(o, row.get(c), v))
+    return conditions
+
+
+class MemoryQueryBuilder:
+    """Constructeur de requête chaînable imitant `postgrest.SyncRequestBuilder`"""
+
+    def __init__(self, db: 'MemoryClient', table: str):
+        self._db = db
+        self._table = table
+        self._action = 'select'
+        self._columns = '*'
+        self._count = None
+        self._payload = None
+        self._on_conflict = 'id'
+        self._ignore_duplicates = False
+        self._filters: List[Callable[[Dict], bool]] = []
+        self._equalities: List[tuple] = []
+        self._order: List[tuple] = []
+        self._limit: Optional[int] = None
+        self._foreign_order: Dict[str, List[tuple]] = {}
+        self._foreign_limit: Dict[str, int] = {}
+        self._offset = 0
+        self._single = False
+        self._maybe_single = False
+
+    # Actions
+    def select(self, *columns: str, count: Optional[str] = None):
+        self._action = 'select'
+        self._columns = ','.join(columns) if columns else '*'
+        self._count = count
+        return self
+
+    def insert(self, json: Any, count: Optional[str] = None, **kwargs):
+        self._action = 'insert'
+        self._payload = json
+        self._count = count
+        return self
+
+    def upsert(self, json: Any, count: Optional[str] = None, on_conflict: str = 'id', ignore_duplicates: bool = False, **kwargs):
+        self._action = 'upsert'
+        self._payload = json
+        self._count = count
+        self._on_conflict = on_conflict or 'id'
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, json: Dict, count: Optional[str] = None, **kwargs):
+        self._action = 'update'
+        self._payload = json
+        self._count = count
+        return self
+
+    def delete(self, count: Optional[str] = None, **kwargs):
+        self._action = 'delete'
+        self._count = count
+        return self
+
+    # Filtres
+    def _add(self, op: str, column: str, value: Any):
+        self._filters.append(lambda row: _compare(op, row.get(column), value))
+        return self
+
+    def eq(self, column: str, value: Any):
+        self._equalities.append((column, value))
+        return self._add('eq', column, value)
+
+    def neq(self, column: str, value: Any):
+        return self._add('neq', column, value)
+
+    def gt(self, column: str, value: Any):
+        return self._add('gt', column, value)
+
+    def gte(self, column: str, value: Any):
+        return self._add('gte', column, value)
+
+    def lt(self, column: str, value: Any):
+        return self._add('lt', column, value)
+
+    def lte(self, column: str, value: Any):
+        return self._add('lte', column, value)
+
+    def like(self, column: str, pattern: str):
+        return self._add('like', column, pattern)
+
+    def ilike(self, column: str, pattern: str):
+        return self._add('ilike', column, pattern)
+
+    def is_(self, column: str, value: Any):
+        return self._add('is', column, value)
+
+    def in_(self, column: str, values: Iterable[Any]):
+        return self._add('in', column, list(values))
+
+    def or_(self, filters: str, reference_table: Optional[str] = None):
+        conditions = _parse_or(filters)
+        self._filters.append(lambda row: any(condition(row) for condition in conditions))
+        return self
+
+    # Modificateurs
+    def order(self, column: str, *, desc: bool = False, nullsfirst: bool = False, foreign_table: Optional[str] = None):
+        # Sans `nullsfirst`, PostgreSQL place les NULL en premier pour un tri descendant
+        order = (column, desc, nullsfirst or desc)
+        if foreign_table:
+            self._foreign_order.setdefault(foreign_table, []).append(order)
+        else:
+            self._order.append(order)
+        return self
+
+    def limit(self, size: int, *, foreign_table: Optional[str] = None):
+        if foreign_table:
+            self._foreign_limit[foreign_table] = size
+        else:
+            self._limit = size
+        return self
+
+    def offset(self, size: int):
+        self._offset = size
+        return self
+
+    def range(self, start: int, end: int):
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def maybe_single(self):
+        self._maybe_single = True
+        return self
+
+    # Exécution
+    def _matches(self, row: Dict) -> bool:
+        return all(condition(row) for condition in self._filters)
+
+    def _candidates(self, table: List[Dict]) -> List[Dict]:
+        """Lignes à examiner: via l'index unique pour un `eq` sur `id`/colonne unique, sinon toute la table"""
+        if self._table in VIEWS:
+            return table
+        index = self._db._index(self._table)
+        for column, value in self._equalities:
+            if column in index:
+                try:
+                    row = index[column].get(value)
+                except TypeError:
+                    continue
+                # Une absence peut venir d'un type différent ("5" vs 5): on retombe sur le parcours
+                if row is not None:
+                    return [row]
+        return table
+
+    @staticmethod
+    def _sorted(rows: List[Dict], orders: List[tuple]) -> List[Dict]:
+        # Tri stable appliqué de la clé la moins prioritaire à la plus prioritaire
+        for column, desc, nulls_first in reversed(orders):
+            present = [r for r in rows if r.get(column) is not None]
+            missing = [r for r in rows if r.get(column) is None]
+            present.sort(key=lambda r: r[column], reverse=desc)
+            rows = missing + present if nulls_first else present + missing
+        return rows
+
+    def _project(self, row: Dict) -> Dict:
+        result = {}
+        for column in (c.strip() for c in _split_top_level(self._columns)):
+            if column == '*':
+                result.update(copy.deepcopy(row))
+            elif column.endswith(')'):
+                name, sub_columns = column[:-1].split('(', 1)
+                result[name.strip()] = self._embed(row, name.strip(), sub_columns)
+            elif column:
+                result[column] = copy.deepcopy(row.get(column))
+        return result
+
+    def _embed(self, row: Dict, name: str, sub_columns: str) -> List[Dict]:
+        """Ressource embarquée (`select('*, activity_logs(*)')`)"""
+        if (self._table, name) not in RELATIONS:
+            raise MemoryDBError(f"Aucune relation entre {self._table} et {name}")
+        local, foreign = RELATIONS[(self._table, name)]
+        children = [r for r in self._db.tables.get(name, []) if r.get(foreign) == row.get(local)]
+        children = self._sorted(children, self._foreign_order.get(name, []))
+        if name in self._foreign_limit:
+            children = children[:self._foreign_limit[name]]
+        builder = MemoryQueryBuilder(self._db, name).select(sub_columns)
+        return [builder._project(child) for child in children]
+
+    def _paginate(self, rows: List[Dict]) -> List[Dict]:
+        rows = rows[self._offset:]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        return rows
+
+    def execute(self) -> MemoryResponse:
+        with self._db.lock:
+            if self._table in VIEWS:
+                if self._action != 'select':
+                    raise MemoryDBError(f"La vue {self._table} est en lecture seule")
+                table = VIEWS[self._table](self._db.tables)
+            else:
+                table = self._db.tables.setdefault(self._table, [])
+            if self._action == 'select':
+                matched = self._sorted([r for r in self._candidates(table) if self._matches(r)], self._order)
+                count = len(matched) if self._count else None
+                data = [self._project(r) for r in self._paginate(matched)]
+            elif self._action == 'insert':
+                rows = self._payload if isinstance(self._payload, list) else [self._payload]
+                data = [self._db._insert_row(self._table, row) for row in rows]
+                count = len(data) if self._count else None
+            elif self._action == 'upsert':
+                rows = self._payload if isinstance(self._payload, list) else [self._payload]
+                upserted = [self._db._upsert_row(self._table, row, self._on_conflict, self._ignore_duplicates) for row in rows]
+                # ON CONFLICT DO NOTHING: les lignes existantes ne sont pas renvoyées
+                data = [row for row in upserted if row is not None]
+                count = len(data) if self._count else None
+            elif self._action == 'update':
+                data = [self._db._update_row(self._table, row, self._payload) for row in self._candidates(table) if self._matches(row)]
+                count = len(data) if self._count else None
+            elif self._action == 'delete':
+                deleted = [r for r in table if self._matches(r)]
+                data = [copy.deepcopy(r) for r in deleted]
+                self._db.tables[self._table] = [r for r in table if not self._matches(r)]
+                self._db._unindex(self._table, deleted)
+                self._db._on_delete(self._table, data)
+                count = len(data) if self._count else None
+            else:
+                raise MemoryDBError(f"Action inconnue: {self._action}")
+            if self._action != 'select':
+                self._db.versions[self._table] = self._db.versions.get(self._table, 0) + 1
+
+        if self._single or self._maybe_single:
+            if len(data) > 1:
+                raise MemoryDBError("Plusieurs lignes retournées pour single()")
+            data = data[0] if data else None
+        return MemoryResponse(data, count)
+
+
+class MemoryRPCBuilder:
+    """Appel de fonction RPC enregistrée via `MemoryClient.register_rpc`"""
+
+    def __init__(self, db: 'MemoryClient', name: str, params: Dict):
+        self._db = db
+        self._name = name
+        self._params = params
+
+    def execute(self) -> MemoryResponse:
+        if self._name not in self._db.functions:
+            raise MemoryDBError(f"Fonction RPC inconnue: {self._name}")
+        with self._db.lock:
+            return MemoryResponse(self._db.functions[self._name](self._db, **self._params))
+
+
+class MemoryClient:
+    """Remplaçant en mémoire de `supabase.Client`"""
+
+    def __init__(self):
+        self.tables: Dict[str, List[Dict]] = {}
+        self.sequences: Dict[str, int] = {}
+        # Compteur de modifications par table, pour invalider les index dérivés
+        self.versions: Dict[str, int] = {}
+        # Index des colonnes uniques: table -> colonne -> valeur -> ligne
+        self.unique_index: Dict[str, Dict[str, Dict[Any, Dict]]] = {}
+        self.functions: Dict[str, Callable] = dict(FUNCTIONS)
+        self.lock = threading.RLock()
+        self._seed()
+
+    def table(self, name: str) -> MemoryQueryBuilder:
+        return MemoryQueryBuilder(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Dict] = None) -> MemoryRPCBuilder:
+        return MemoryRPCBuilder(self, name, params or {})
+
+    def register_rpc(self, name: str, function: Callable):
+        """Enregistre une fonction appelable via `rpc(name, params)`"""
+        self.functions[name] = function
+
+    def reset(self):
+        with self.lock:
+            self.tables.clear()
+            self.sequences.clear()
+            self.unique_index.clear()
+            for table in self.versions:
+                self.versions[table] += 1
+            self._seed()
+
+    def _seed(self):
+        for table, rows in SEED_ROWS.items():
+            self.table(table).insert(copy.deepcopy(rows)).execute()
+
+    def _on_delete(self, table: str, deleted: List[Dict]):
+        for child_table, column, referenced in FOREIGN_KEYS.get(table, []):
+            keys = {row.get(referenced) for row in deleted}
+            for child in self.tables.get(child_table, []):
+                if child.get(column) in keys:
+                    child[column] = None
+
+    def _compute_generated(self, table: str, row: Dict):
+        for column, compute in GENERATED_COLUMNS.get(table, {}).items():
+            row[column] = compute(row)
+
+    def _index(self, table: str) -> Dict[str, Dict[Any, Dict]]:
+        if table not in self.unique_index:
+            self.unique_index[table] = {column: {} for column in ['id'] + UNIQUE_COLUMNS.get(table, [])}
+        return self.unique_index[table]
+
+    def _check_unique(self, table: str, row: Dict, ignore: Optional[Dict] = None):
+        for column, values in self._index(table).items():
+            value = row.get(column)
+            if value is None:
+                continue
+            existing = values.get(value)
+            if existing is not None and existing is not ignore:
+                raise MemoryDBError(
+                    f'duplicate key value violates unique constraint "{table}_{column}_key"'
+                )
+
+    def _reindex(self, table: str, row: Dict, old: Optional[Dict] = None):
+        for column, values in self._index(table).items():
+            if old is not None and old.get(column) is not None and values.get(old[column]) is row:
+                del values[old[column]]
+            if row.get(column) is not None:
+                values[row[column]] = row
+
+    def _unindex(self, table: str, rows: List[Dict]):
+        for column, values in self._index(table).items():
+            for row in rows:
+                if row.get(column) is not None and values.get(row[column]) is row:
+                    del values[row[column]]
+
+    def _insert_row(self, table: str, row: Dict) -> Dict:
+        new_row = _as_json(row)
+        if new_row.get('id') is None:
+            self.sequences[table] = self.sequences.get(table, 0) + 1
+            new_row['id'] = self.sequences[table]
+        else:
+            self.sequences[table] = max(self.sequences.get(table, 0), int(new_row['id']))
+        now = datetime.now().isoformat()
+        for column in TIMESTAMP_COLUMNS.get(table, []):
+            new_row.setdefault(column, now)
+        for column, value in COLUMN_DEFAULTS.get(table, {}).items():
+            new_row.setdefault(column, value)
+        self._compute_generated(table, new_row)
+        self._check_unique(table, new_row)
+        self.tables[table].append(new_row)
+        self._reindex(table, new_row)
+        return copy.deepcopy(new_row)
+
+    def _update_row(self, table: str, row: Dict, values: Dict) -> Dict:
+        candidate = {**row, **_as_json(values)}
+        if 'updated_at' in TIMESTAMP_COLUMNS.get(table, []) and 'updated_at' not in values:
+            candidate['updated_at'] = datetime.now().isoformat()
+        self._compute_generated(table, candidate)
+        self._check_unique(table, candidate, ignore=row)
+        previous = dict(row)
+        row.update(candidate)
+        self._reindex(table, row, previous)
+        return copy.deepcopy(row)
+
+    def _upsert_row(self, table: str, row: Dict, on_conflict: str, ignore_duplicates: bool = False) -> Optional[Dict]:
+        keys = [c.strip() for c in on_conflict.split(',')]
+        index = self._index(table)
+        if len(keys) == 1 and keys[0] in index:
+            existing = index[keys[0]].get(row.get(keys[0]))
+        else:
+            existing = next((r for r in self.tables[table] if all(r.get(k) == row.get(k) for k in keys)), None)
+        if existing is None:
+            return self._insert_row(table, row)
+        return None if ignore_duplicates else self._update_row(table, existing, row)
+
+
+def _delete_company(db: MemoryClient, p_siren: str, p_user_info: str = 'API User') -> Optional[Dict]:
+    """Équivalent de la fonction SQL `delete_company` (migration 003)"""
+    company = db.table('cabinets_comptables').select('id, siren, nom_entreprise').eq('siren', p_siren).maybe_single().execute().data
+    if not company:
+        return None
+    db.table('activity_logs').insert({
+        'cabinet_id': company['id'],
+        'action': 'delete',
+        'details': {'siren': company['siren'], 'nom_entreprise': company['nom_entreprise']},
+        'user_info': p_user_info
+    }).execute()
+    db.table('cabinets_comptables').delete().eq('id', company['id']).execute()
+    return company
+
+
+# Fonctions RPC disponibles par défaut (équivalent des fonctions SQL des migrations)
+FUNCTIONS: Dict[str, Callable] = {
+    'delete_company': _delete_company,
+}
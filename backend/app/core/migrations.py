@@ -0,0 +1,123 @@
+"""Migrations SQL versionnées (backend/migrations/NNN_nom.sql), appliquées dans l'ordre
+
+Chaque migration passe dans sa propre transaction et est enregistrée dans
+`schema_migrations` avec la somme de contrôle de son fichier: une migration
+déjà appliquée puis modifiée est signalée au lieu d'être rejouée en silence.
+Les migrations 000 à 005 sont idempotentes: une base où elles ont été passées
+à la main peut être reprise par le runner sans effet de bord.
+
+Usage (depuis backend/, DATABASE_URL = connexion Postgres directe):
+    python -m app.core.migrations [--list]
+"""
+import hashlib
+import logging
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'migrations')
+FILENAME = re.compile(r'^(\d{3})_(\w+)\.sql$')
+
+@dataclass
+class Migration:
+    version: str
+    name: str
+    path: str
+    checksum: str
+
+    @property
+    def sql(self) -> str:
+        with open(self.path, encoding='utf-8') as f:
+            return f.read()
+
+class MigrationError(Exception):
+    pass
+
+def discover(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Migrations du répertoire, triées par version (numéros en double refusés)"""
+    migrations: Dict[str, Migration] = {}
+    for filename in sorted(os.listdir(directory)):
+        match = FILENAME.match(filename)
+        if not match:
+            continue
+        version, name = match.groups()
+        if version in migrations:
+            raise MigrationError(f"Version {version} en double: {migrations[version].name} et {name}")
+        path = os.path.join(directory, filename)
+        with open(path, 'rb') as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        migrations[version] = Migration(version, name, path, checksum)
+    return [migrations[version] for version in sorted(migrations)]
+
+def pending(migrations: List[Migration], applied: Dict[str, str]) -> List[Migration]:
+    """Migrations restant à appliquer; erreur si un fichier appliqué a changé depuis"""
+    for migration in migrations:
+        if migration.version in applied and applied[migration.version] != migration.checksum:
+            raise MigrationError(
+                f"Migration {migration.version}_{migration.name} modifiée après application: "
+                "créer une nouvelle migration plutôt que de la réécrire"
+            )
+    return [migration for migration in migrations if migration.version not in applied]
+
+def applied_versions(conn) -> Dict[str, str]:
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version TEXT PRIMARY KEY, name TEXT NOT NULL, checksum TEXT NOT NULL, "
+            "applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW())"
+        )
+        cursor.execute("SELECT version, checksum FROM schema_migrations")
+        versions = dict(cursor.fetchall())
+    conn.commit()
+    return versions
+
+def migrate(conn, directory: str = MIGRATIONS_DIR) -> List[str]:
+    """Applique les migrations en attente (connexion psycopg2); retourne leurs noms"""
+    done = []
+    for migration in pending(discover(directory), applied_versions(conn)):
+        logger.info(f"Migration {migration.version}_{migration.name}")
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(migration.sql)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                    (migration.version, migration.name, migration.checksum)
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        done.append(f"{migration.version}_{migration.name}")
+    return done
+
+def connect(dsn: Optional[str] = None):
+    import psycopg2
+
+    dsn = dsn or settings.DATABASE_URL
+    if not dsn:
+        raise MigrationError("DATABASE_URL non renseignée (connexion Postgres directe, pas l'URL REST Supabase)")
+    return psycopg2.connect(dsn)
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--list', action='store_true', help="affiche l'état des migrations sans rien appliquer")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    conn = connect()
+    try:
+        if args.list:
+            applied = applied_versions(conn)
+            for migration in discover():
+                print(f"{migration.version}  {'appliquée ' if migration.version in applied else 'en attente'}  {migration.name}")
+        else:
+            done = migrate(conn)
+            print(f"{len(done)} migration(s) appliquée(s)" + (f": {', '.join(done)}" if done else ""))
+    finally:
+        conn.close()
@@ -1,11 +1,18 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Iterable, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt relâche le GIL: un petit pool de threads suffit à sortir le hachage de la boucle
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -20,4 +27,85 @@ def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+# File du pool bcrypt bornée: au-delà, la vérification est refusée plutôt que mise en attente
+_pending_verifications = 0
+
+class HashPoolBusy(Exception):
+    pass
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    """verify_password exécuté dans le pool bcrypt, sans bloquer la boucle (HashPoolBusy si la file est pleine)"""
+    global _pending_verifications
+    if _pending_verifications >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HashPoolBusy()
+    _pending_verifications += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, verify_password, plain_password, hashed_password)
+    finally:
+        _pending_verifications -= 1
+
+async def get_password_hash_async(password) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, get_password_hash, password)
+
+class LoginThrottle:
+    """Limite les échecs de connexion par clé (utilisateur, IP) sur une fenêtre glissante"""
+    
+    def __init__(self, window_seconds: int = 300, max_keys: int = 10000):
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._attempts: OrderedDict = OrderedDict()
+    
+    def _recent(self, key: str, now: float) -> deque:
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            return deque()
+        while attempts and attempts[0] <= now - self.window_seconds:
+            attempts.popleft()
+        return attempts
+    
+    def retry_after(self, limits: Iterable[tuple]) -> int:
+        """Secondes à attendre si une des clés (clé, max) a atteint sa limite, sinon 0"""
+        now = time.monotonic()
+        wait = 0
+        for key, max_attempts in limits:
+            attempts = self._recent(key, now)
+            if len(attempts) >= max_attempts:
+                wait = max(wait, int(attempts[0] + self.window_seconds - now) + 1)
+        return wait
+    
+    def reserve(self, limits: Iterable[tuple]) -> tuple:
+        """Compte une tentative sur toutes les clés avant la vérification (parallèles comprises)
+
+        Retourne (0, horodatage) si la tentative est réservée, (secondes d'attente, None) si une clé est à sa limite.
+        """
+        limits = list(limits)
+        wait = self.retry_after(limits)
+        if wait:
+            return wait, None
+        now = time.monotonic()
+        self.record(*(key for key, _ in limits), now=now)
+        return 0, now
+    
+    def release(self, stamp: float, *keys: str):
+        """Annule une tentative réservée (connexion réussie, vérification non effectuée)"""
+        for key in keys:
+            attempts = self._attempts.get(key)
+            if attempts and stamp in attempts:
+                attempts.remove(stamp)
+    
+    def record(self, *keys: str, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        for key in keys:
+            self._attempts.setdefault(key, deque()).append(now)
+            self._attempts.move_to_end(key)
+        while len(self._attempts) > self.max_keys:
+            self._attempts.popitem(last=False)
+    
+    def reset(self, key: str):
+        self._attempts.pop(key, None)
+
+login_throttle = LoginThrottle(settings.LOGIN_ATTEMPT_WINDOW_SECONDS)
\ No newline at end of file
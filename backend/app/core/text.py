@@ -0,0 +1,13 @@
+import re
+import unicodedata
+from typing import Optional
+
+_SPACES = re.compile(r'\s+')
+
+def normalize_text(value: Optional[str]) -> str:
+    """Minuscules, sans accents, espaces normalisés (équivalent SQL: lower(f_unaccent(...)))"""
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(value))
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return _SPACES.sub(' ', stripped.lower()).strip()
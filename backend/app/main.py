@@ -1,18 +1,22 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.config import settings
 from app.api.routes import companies, scraping, stats, auth
 from app.core.database import init_db
+from app.core.cache import ResponseCacheMiddleware, response_cache
+from app.core.metrics import MetricsMiddleware, registry
+from app.services.activity_log import activity_log
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    await activity_log.start()
     yield
     # Shutdown
-    pass
+    await activity_log.stop()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -20,6 +24,13 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Response cache (inside CORS so cached responses still get CORS headers)
+app.add_middleware(
+    ResponseCacheMiddleware,
+    cache=response_cache,
+    prefixes=[f"{settings.API_V1_STR}/companies", f"{settings.API_V1_STR}/stats"],
+)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -29,6 +40,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Metrics (outermost: latency includes cache hits and CORS)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
 app.include_router(companies.router, prefix=f"{settings.API_V1_STR}/companies", tags=["companies"])
@@ -41,4 +56,11 @@ async def root():
         "message": f"Welcome to {settings.PROJECT_NAME}",
         "version": settings.VERSION,
         "docs": "/docs"
-    }
\ No newline at end of file
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of this worker's metrics"""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(registry.render(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
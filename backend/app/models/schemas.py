@@ -16,6 +16,8 @@ class CompanyBase(BaseModel):
     forme_juridique: Optional[str] = None
     date_creation: Optional[datetime] = None
     adresse: Optional[str] = None
+    code_postal: Optional[str] = None
+    ville: Optional[str] = None
     email: Optional[EmailStr] = None
     telephone: Optional[str] = None
     numero_tva: Optional[str] = None
@@ -41,6 +43,9 @@ class CompanyUpdate(BaseModel):
     effectif: Optional[int] = None
     capital_social: Optional[float] = None
 
+class CompanyBulkItem(CompanyUpdate):
+    siren: str
+
 class Company(CompanyBase):
     id: int
     created_at: datetime
@@ -55,6 +60,14 @@ class CompanyDetail(Company):
     activity_logs: Optional[List[Dict[str, Any]]] = None
     details_complets: Optional[Dict[str, Any]] = None
 
+class CompanySearchResult(BaseModel):
+    id: Optional[int] = None
+    siren: str
+    nom_entreprise: str
+    adresse: Optional[str] = None
+    statut: Optional[str] = None
+    rank: float = 0
+
 class ScrapingStatus(BaseModel):
     is_running: bool
     progress: int
@@ -63,6 +76,7 @@ class ScrapingStatus(BaseModel):
     new_companies: int = 0
     skipped_companies: int = 0
     source: Optional[str] = None
+    metrics: Optional[Dict[str, Any]] = None  # débits, temps par étape, erreurs (voir app/scrapers/metrics.py)
 
 class Stats(BaseModel):
     total: int
@@ -82,6 +96,16 @@ class FilterParams(BaseModel):
     statut: Optional[StatusEnum] = None
     search: Optional[str] = None
 
+class CompanyBulkUpdate(BaseModel):
+    # Soit une liste de mises à jour par SIREN, soit un filtre + un patch commun
+    items: List[CompanyBulkItem] = []
+    filters: Optional[FilterParams] = None
+    patch: Optional[CompanyUpdate] = None
+
+class BulkUpdateResult(BaseModel):
+    updated: int
+    not_found: List[str] = []
+
 class Token(BaseModel):
     access_token: str
     token_type: str
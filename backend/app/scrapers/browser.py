@@ -0,0 +1,198 @@
+"""Navigateur Playwright recyclé pour les longs scrapings
+
+Chromium grossit au fil des pages chargées: le contexte (onglets, cookies,
+cache) est remplacé tous les `max_pages` chargements, et le navigateur entier
+est relancé quand la mémoire des processus enfants (driver Playwright et
+Chromium) dépasse `max_memory_mb`. Le recyclage attend que tous les onglets
+prêtés soient rendus.
+"""
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+def process_tree_rss(pid: int) -> Optional[int]:
+    """RSS cumulée (octets) des descendants de `pid`, via /proc; None hors Linux"""
+    if not os.path.isdir('/proc'):
+        return None
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # Le nom du processus (2e champ) peut contenir des espaces: on repart de la dernière parenthèse
+                fields = f.read().rsplit(')', 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total, stack = 0, list(children.get(pid, []))
+    while stack:
+        child = stack.pop()
+        stack.extend(children.get(child, []))
+        try:
+            with open(f'/proc/{child}/statm') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+async def _start_playwright():
+    from playwright.async_api import async_playwright
+    return await async_playwright().start()
+
+class BrowserPool:
+    """Onglets Chromium prêtés aux workers, avec recyclage du contexte et du navigateur"""
+
+    def __init__(
+        self,
+        tabs: int,
+        launch_options: Dict,
+        context_options: Callable[[], Dict],
+        init_script: Optional[str] = None,
+        max_pages: int = 200,
+        max_memory_mb: int = 1500,
+        memory_check_every: int = 10,
+        metrics=None,
+        start_playwright: Callable[[], Awaitable] = _start_playwright,
+        memory_usage: Callable[[], Optional[int]] = lambda: process_tree_rss(os.getpid())
+    ):
+        self.tabs = max(tabs, 1)
+        self.launch_options = launch_options
+        self.context_options = context_options
+        self.init_script = init_script
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.memory_check_every = max(memory_check_every, 1)
+        self.metrics = metrics
+        self._start_playwright = start_playwright
+        self._memory_usage = memory_usage
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.pages_loaded = 0  # depuis le dernier recyclage du contexte
+        self.context_recycles = 0
+        self.browser_restarts = 0
+        self.memory_mb: Optional[float] = None
+        self._idle: List = []
+        self._leased = 0
+        self._recycling = False
+        self._condition = asyncio.Condition()
+
+    async def start(self):
+        self.playwright = await self._start_playwright()
+        await self._launch()
+
+    async def _launch(self):
+        self.browser = await self.playwright.chromium.launch(**self.launch_options)
+        await self._new_context()
+
+    async def _new_context(self):
+        # Nouveau contexte = nouvelle empreinte (user agent tiré au sort par context_options)
+        self.context = await self.browser.new_context(**self.context_options())
+        if self.init_script:
+            await self.context.add_init_script(self.init_script)
+        self._idle = [await self.context.new_page() for _ in range(self.tabs)]
+        self.pages_loaded = 0
+
+    @asynccontextmanager
+    async def page(self):
+        """Prête un onglet; un chargement de page est compté à sa restitution"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._idle and not self._recycling)
+            page = self._idle.pop()
+            self._leased += 1
+        try:
+            yield page
+        finally:
+            async with self._condition:
+                self._leased -= 1
+                self.pages_loaded += 1
+                self._idle.append(page)
+                self._condition.notify_all()
+            await self._maybe_recycle()
+
+    def _check_memory(self) -> bool:
+        """True si la mémoire dépasse le seuil (mesurée toutes les `memory_check_every` pages)"""
+        if self.pages_loaded % self.memory_check_every:
+            return False
+        rss = self._memory_usage()
+        if rss is None:
+            return False
+        self.memory_mb = round(rss / 1e6, 1)
+        self._publish()
+        return self.memory_mb > self.max_memory_mb
+
+    async def _maybe_recycle(self):
+        over_memory = self._check_memory()
+        if not over_memory and self.pages_loaded < self.max_pages:
+            return
+        generation = self.context_recycles + self.browser_restarts
+        async with self._condition:
+            if self._recycling:
+                return
+            if self.context_recycles + self.browser_restarts != generation:
+                # Recyclé pendant l'attente du verrou: la mesure mémoire est périmée
+                over_memory = False
+            if not over_memory and self.pages_loaded < self.max_pages:
+                return
+            self._recycling = True
+            try:
+                await self._condition.wait_for(lambda: self._leased == 0)
+                await self._recycle(restart_browser=over_memory)
+            finally:
+                self._recycling = False
+                self._condition.notify_all()
+
+    async def _recycle(self, restart_browser: bool):
+        try:
+            await self.context.close()
+            if restart_browser:
+                logger.info(f"Mémoire navigateur {self.memory_mb} Mo > {self.max_memory_mb} Mo: relance de Chromium")
+                await self.browser.close()
+                await self._launch()
+                self.browser_restarts += 1
+            else:
+                logger.info(f"{self.pages_loaded} pages chargées: nouveau contexte navigateur")
+                await self._new_context()
+            self.context_recycles += 1
+        except Exception as e:
+            # Un navigateur qui ne se ferme pas proprement est relancé de zéro
+            logger.error(f"Erreur recyclage navigateur: {e}")
+            await self._close_browser()
+            await self._launch()
+            self.browser_restarts += 1
+        self._publish()
+
+    def _publish(self):
+        if self.metrics is not None:
+            self.metrics.browser_usage(
+                memory_mb=self.memory_mb,
+                context_recycles=self.context_recycles,
+                browser_restarts=self.browser_restarts
+            )
+
+    async def _close_browser(self):
+        if self.browser:
+            try:
+                await self.browser.close()
+            except Exception as e:
+                logger.warning(f"Fermeture du navigateur: {e}")
+            self.browser = None
+            self.context = None
+            self._idle = []
+
+    async def close(self):
+        """Ferme Chromium puis arrête le driver Playwright (processus node)"""
+        await self._close_browser()
+        if self.playwright:
+            try:
+                await self.playwright.stop()
+            except Exception as e:
+                logger.warning(f"Arrêt du driver Playwright: {e}")
+            self.playwright = None
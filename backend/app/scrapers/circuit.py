@@ -0,0 +1,227 @@
+"""Disjoncteur et concurrence adaptative par hôte scrapé
+
+Chaque hôte (api.pappers.fr, www.societe.com) a un `HostGuard` partagé par
+tous les scrapers du processus:
+
+- concurrence AIMD: la limite de requêtes simultanées monte de 1/limite à
+  chaque succès et est divisée par deux sur un échec (une fois par « fenêtre »:
+  les requêtes parties avant la dernière baisse ne la redéclenchent pas);
+- disjoncteur: ouvert sur un blocage (429, captcha) ou quand le taux d'erreurs
+  de la fenêtre glissante dépasse le seuil; fermé → ouvert → semi-ouvert (une
+  seule requête d'essai) → fermé. La durée d'ouverture double à chaque
+  déclenchement consécutif, et au-delà de `max_trips` les appelants reçoivent
+  `CircuitOpenError` plutôt que d'attendre indéfiniment.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from app.config import settings
+from app.core.metrics import registry
+from app.scrapers.metrics import error_type
+
+logger = logging.getLogger(__name__)
+
+# Échecs qui disent quelque chose de la santé de l'hôte (un 404 n'en fait pas partie)
+HEALTH_FAILURES = ('http_429', 'http_5xx', 'timeout', 'network', 'captcha')
+# Refus explicites: le disjoncteur s'ouvre immédiatement
+BLOCK_FAILURES = ('http_429', 'captcha')
+
+STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+concurrency_limit = registry.gauge('scraper_host_concurrency_limit', 'Limite AIMD de requêtes simultanées', ('host',))
+circuit_state = registry.gauge('scraper_circuit_state', 'État du disjoncteur (0 fermé, 1 semi-ouvert, 2 ouvert)', ('host',))
+circuit_trips = registry.counter('scraper_circuit_trips_total', 'Ouvertures du disjoncteur', ('host',))
+
+class CircuitOpenError(Exception):
+    """L'hôte refuse les requêtes depuis trop longtemps"""
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Valeur (en secondes) de l'en-tête Retry-After d'une erreur HTTP, si présente"""
+    headers = getattr(error, 'headers', None)
+    value = headers.get('Retry-After') if headers else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+class GuardedCall:
+    """Requête en cours; `fail(kind)` signale une réponse 200 qui est en fait un refus (captcha)"""
+
+    __slots__ = ('failure',)
+
+    def __init__(self):
+        self.failure: Optional[str] = None
+
+    def fail(self, kind: str):
+        self.failure = kind
+
+class HostGuard:
+    def __init__(
+        self,
+        host: str,
+        max_concurrency: int = 4,
+        min_concurrency: int = 1,
+        error_rate: float = 0.5,
+        window: int = 20,
+        min_requests: int = 5,
+        open_seconds: float = 30,
+        max_open_seconds: float = 600,
+        max_trips: int = 6
+    ):
+        self.host = host
+        self.max_concurrency = max(max_concurrency, 1)
+        self.min_concurrency = max(min(min_concurrency, self.max_concurrency), 1)
+        self.limit = float(self.max_concurrency)
+        self.error_rate = error_rate
+        self.outcomes: deque = deque(maxlen=window)
+        self.min_requests = min_requests
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.max_trips = max_trips
+        self.state = 'closed'
+        self.open_until = 0.0
+        self.trips = 0  # déclenchements consécutifs (remis à zéro par un essai réussi)
+        self.in_flight = 0
+        self._seq = 0
+        self._last_decrease_seq = 0
+        self._loop = None
+        self._lock_condition = None
+        self._publish()
+
+    @property
+    def _condition(self) -> asyncio.Condition:
+        # La garde est partagée par processus: la condition suit la boucle asyncio courante
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._lock_condition = loop, asyncio.Condition()
+        return self._lock_condition
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logger.warning(f"Disjoncteur {self.host}: {self.state} -> {state}")
+            self.state = state
+            circuit_state.set(STATES[state], host=self.host)
+
+    def _publish(self):
+        concurrency_limit.set(round(self.limit, 2), host=self.host)
+        circuit_state.set(STATES[self.state], host=self.host)
+
+    def _has_capacity(self) -> bool:
+        if self.state == 'half_open':
+            return self.in_flight == 0
+        return self.in_flight < max(int(self.limit), 1)
+
+    async def acquire(self) -> int:
+        """Attend que le disjoncteur et la limite de concurrence laissent passer une requête"""
+        while True:
+            async with self._condition:
+                wait = self.open_until - time.monotonic() if self.state == 'open' else 0
+                if wait <= 0:
+                    if self.state == 'open':
+                        self._set_state('half_open')
+                    if self._has_capacity():
+                        self.in_flight += 1
+                        self._seq += 1
+                        return self._seq
+                    await self._condition.wait()
+                    continue
+                if self.max_trips and self.trips > self.max_trips:
+                    raise CircuitOpenError(f"{self.host}: disjoncteur ouvert après {self.trips} déclenchements")
+            await asyncio.sleep(wait)
+
+    async def release(self, seq: int, failure: Optional[str] = None, retry_after_seconds: Optional[float] = None):
+        async with self._condition:
+            self.in_flight -= 1
+            self._record(seq, failure, retry_after_seconds)
+            self._condition.notify_all()
+
+    def _record(self, seq: int, failure: Optional[str], retry_after_seconds: Optional[float]):
+        healthy = failure not in HEALTH_FAILURES
+        self.outcomes.append(healthy)
+        if healthy:
+            if self.state == 'half_open':
+                self._set_state('closed')
+                self.trips = 0
+                self.outcomes.clear()
+            # Augmentation additive: +1 sur la limite après « limite » succès
+            self.limit = min(self.limit + 1 / self.limit, self.max_concurrency)
+        else:
+            # Diminution multiplicative, une fois par fenêtre de requêtes en vol
+            if seq > self._last_decrease_seq:
+                self.limit = max(self.limit / 2, self.min_concurrency)
+                self._last_decrease_seq = self._seq
+            failures = self.outcomes.count(False)
+            if (
+                self.state == 'half_open'
+                or failure in BLOCK_FAILURES
+                or (len(self.outcomes) >= self.min_requests and failures / len(self.outcomes) >= self.error_rate)
+            ):
+                self._trip(failure, retry_after_seconds)
+        self._publish()
+
+    def _trip(self, failure: str, retry_after_seconds: Optional[float]):
+        if self.state == 'open':
+            return
+        self.trips += 1
+        # Un Retry-After du serveur prime sur le backoff exponentiel
+        duration = min(retry_after_seconds or self.open_seconds * 2 ** (self.trips - 1), self.max_open_seconds)
+        self.open_until = time.monotonic() + duration
+        self.outcomes.clear()
+        self._set_state('open')
+        circuit_trips.inc(host=self.host)
+        logger.warning(f"{self.host}: {failure}, pause de {duration:.0f} s (déclenchement {self.trips})")
+
+    @asynccontextmanager
+    async def request(self):
+        """Encadre une requête: attente du créneau, puis enregistrement du résultat"""
+        seq = await self.acquire()
+        call = GuardedCall()
+        failure, delay, completed = None, None, False
+        try:
+            yield call
+            failure, completed = call.failure, True
+        except Exception as e:
+            failure, delay, completed = error_type(e), retry_after(e), True
+            raise
+        finally:
+            if completed:
+                await self.release(seq, failure, delay)
+            else:
+                # Annulation: ni succès ni échec
+                async with self._condition:
+                    self.in_flight -= 1
+                    self._condition.notify_all()
+
+    def snapshot(self) -> Dict:
+        return {
+            'state': self.state,
+            'concurrency_limit': round(self.limit, 2),
+            'in_flight': self.in_flight,
+            'trips': self.trips,
+            'open_for_seconds': round(max(self.open_until - time.monotonic(), 0), 1) if self.state == 'open' else 0,
+        }
+
+_guards: Dict[str, HostGuard] = {}
+
+def reset_guards():
+    """Oublie l'état de tous les hôtes (tests, benchmarks)"""
+    _guards.clear()
+
+def get_guard(host: str, max_concurrency: int) -> HostGuard:
+    """Garde partagée d'un hôte (créée au premier appel avec les réglages SCRAPING_BREAKER_*)"""
+    guard = _guards.get(host)
+    if guard is None:
+        guard = _guards[host] = HostGuard(
+            host,
+            max_concurrency=max_concurrency,
+            error_rate=settings.SCRAPING_BREAKER_ERROR_RATE,
+            window=settings.SCRAPING_BREAKER_WINDOW,
+            min_requests=settings.SCRAPING_BREAKER_MIN_REQUESTS,
+            open_seconds=settings.SCRAPING_BREAKER_OPEN_SECONDS,
+            max_open_seconds=settings.SCRAPING_BREAKER_MAX_OPEN_SECONDS,
+            max_trips=settings.SCRAPING_BREAKER_MAX_TRIPS
+        )
+    return guard
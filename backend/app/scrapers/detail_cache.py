@@ -0,0 +1,72 @@
+"""Cache disque des fiches détaillées (une réponse JSON par SIREN, avec expiration)
+
+Évite de redemander à l'API une fiche déjà récupérée lors d'une reprise ou d'un
+nouveau passage: le quota n'est consommé qu'une fois par SIREN et par TTL.
+"""
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class DetailCache:
+    """Fichiers `<répertoire>/<siren>.json`, périmés après `ttl` secondes (date de modification)"""
+
+    def __init__(self, directory: str, ttl: int):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, siren: str) -> Optional[str]:
+        # Le SIREN vient de l'API: on refuse tout ce qui n'est pas un nom de fichier sûr
+        if not siren or not siren.isdigit():
+            return None
+        return os.path.join(self.directory, f"{siren}.json")
+
+    def get(self, siren: str) -> Optional[Dict]:
+        path = self._path(siren)
+        if path is None:
+            return None
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cache détail illisible pour {siren}: {e}")
+            return None
+
+    def set(self, siren: str, data: Dict):
+        path = self._path(siren)
+        if path is None or not data:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Écriture atomique: un lecteur concurrent ne voit jamais un fichier partiel
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Écriture du cache détail impossible pour {siren}: {e}")
+
+    def purge(self) -> int:
+        """Supprime les fiches périmées (et les écritures interrompues); retourne leur nombre"""
+        removed = 0
+        now = time.time()
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            try:
+                if entry.name.endswith(('.json', '.tmp')) and now - entry.stat().st_mtime > self.ttl:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
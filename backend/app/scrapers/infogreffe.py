@@ -0,0 +1,76 @@
+import aiohttp
+import logging
+from typing import Dict, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class InfogreffeClient:
+    """Client asynchrone pour les chiffres clés du registre Infogreffe (open data)"""
+
+    def __init__(self, base_url: Optional[str] = None, timeout: float = 10.0):
+        self.base_url = base_url or settings.INFOGREFFE_API_URL
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session = None
+        self.request_count = 0
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.session:
+            await self.session.close()
+
+    async def lookup(self, company: Dict) -> Dict:
+        """Recherche les derniers comptes déposés d'une entreprise par SIREN
+
+        Un SIREN inconnu (404 ou aucun résultat) retourne {}; les autres erreurs
+        remontent à l'appelant pour ne pas confondre panne du registre et absence de comptes.
+        """
+        siren = str(company.get('siren', ''))
+        if not siren:
+            return {}
+
+        params = {
+            'where': f'siren="{siren}"',
+            'limit': 1
+        }
+
+        self.request_count += 1
+        async with self.session.get(self.base_url, params=params) as response:
+            if response.status == 404:
+                return {}
+            response.raise_for_status()
+            payload = await response.json()
+
+        results = payload.get('results') or []
+        if not results:
+            return {}
+        return self._format_record(results[0])
+
+    def _format_record(self, record: Dict) -> Dict:
+        """Normalise un enregistrement du registre"""
+        return {
+            'source': 'infogreffe',
+            'siren': str(record.get('siren', '')),
+            'millesime': record.get('millesime_1'),
+            'date_cloture_exercice': record.get('date_de_cloture_exercice_1'),
+            'chiffre_affaires': self._to_number(record.get('ca_1')),
+            'resultat': self._to_number(record.get('resultat_1')),
+            'effectif': self._to_int(record.get('effectif_1')),
+            'chiffre_affaires_n1': self._to_number(record.get('ca_2')),
+            'chiffre_affaires_n2': self._to_number(record.get('ca_3')),
+        }
+
+    @staticmethod
+    def _to_number(value) -> Optional[float]:
+        try:
+            return float(value) if value not in (None, '') else None
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _to_int(value) -> Optional[int]:
+        number = InfogreffeClient._to_number(value)
+        return int(number) if number is not None else None
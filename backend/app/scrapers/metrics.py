@@ -0,0 +1,120 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from app.core.metrics import registry
+
+STAGES = ('search', 'detail', 'parse', 'db_write', 'sleep')
+
+stage_duration = registry.histogram(
+    'scraper_stage_duration_seconds', 'Durée des étapes de scraping', ('source', 'stage'),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+pages_total = registry.counter('scraper_pages_total', 'Pages de résultats traitées', ('source',))
+companies_total = registry.counter('scraper_companies_total', 'Entreprises traitées par résultat', ('source', 'result'))
+errors_total = registry.counter('scraper_errors_total', 'Erreurs de scraping par type', ('source', 'type'))
+browser_memory = registry.gauge(
+    'scraper_browser_memory_bytes', 'Mémoire (RSS) du driver Playwright et de Chromium', ('source',))
+details_skipped_total = registry.counter(
+    'scraper_details_skipped_total', 'Appels de détail évités par raison', ('source', 'reason'))
+
+def error_type(error: BaseException) -> str:
+    """Catégorie d'erreur: http_429, http_5xx, http_4xx, timeout, network ou nom de l'exception"""
+    status = getattr(error, 'status', None)
+    if isinstance(status, int):
+        if status == 429:
+            return 'http_429'
+        return f"http_{status // 100}xx"
+    if isinstance(error, asyncio.TimeoutError) or 'Timeout' in type(error).__name__:
+        return 'timeout'
+    if isinstance(error, (ConnectionError, OSError)) or type(error).__module__.startswith('aiohttp'):
+        return 'network'
+    return type(error).__name__
+
+class ScraperMetrics:
+    """Temps par étape, débits et erreurs d'un scraping
+
+    Alimente le registre /metrics et un résumé publié dans `ScrapingStatus.metrics`.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.started_at = time.monotonic()
+        self.stages: Dict[str, list] = {stage: [0, 0.0] for stage in STAGES}
+        self.pages = 0
+        self.companies: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.details_skipped: Dict[str, int] = {}
+        self.browser: Dict = {}
+        self.guard = None  # HostGuard de la source: état du disjoncteur et limite de concurrence
+        self.requests = 0
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            entry = self.stages.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            if name in ('search', 'detail'):
+                self.requests += 1
+            stage_duration.observe(elapsed, source=self.source, stage=name)
+
+    async def sleep(self, seconds: float):
+        """Pause (limite de débit, anti-détection, backoff) comptée dans l'étape `sleep`"""
+        with self.stage('sleep'):
+            await asyncio.sleep(seconds)
+
+    def page_done(self):
+        self.pages += 1
+        pages_total.inc(source=self.source)
+
+    def company_done(self, result: str):
+        """`result`: created, skipped (déjà en base), filtered (hors critères) ou failed"""
+        self.companies[result] = self.companies.get(result, 0) + 1
+        companies_total.inc(source=self.source, result=result)
+
+    def detail_skipped(self, reason: str):
+        """`reason`: known (déjà en base), duplicate (déjà en cours), filtered, sufficient (recherche suffisante), cache ou circuit (disjoncteur ouvert)"""
+        self.details_skipped[reason] = self.details_skipped.get(reason, 0) + 1
+        details_skipped_total.inc(source=self.source, reason=reason)
+
+    def browser_usage(self, memory_mb: Optional[float], **counters):
+        """Mémoire et recyclages du navigateur (scrapers Playwright)"""
+        self.browser = {'memory_mb': memory_mb, **counters}
+        if memory_mb is not None:
+            browser_memory.set(memory_mb * 1e6, source=self.source)
+
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+        errors_total.inc(source=self.source, type=kind)
+
+    def snapshot(self, now: Optional[float] = None) -> Dict:
+        elapsed = max((now or time.monotonic()) - self.started_at, 1e-9)
+        minutes = elapsed / 60
+        busy = sum(total for _, total in self.stages.values()) or 1e-9
+        processed = sum(self.companies.values())
+        return {
+            'elapsed_seconds': round(elapsed, 1),
+            'pages': self.pages,
+            'pages_per_min': round(self.pages / minutes, 2),
+            'companies': dict(self.companies),
+            'companies_per_min': round(processed / minutes, 2),
+            'created_per_min': round(self.companies.get('created', 0) / minutes, 2),
+            'stages': {
+                name: {
+                    'count': count,
+                    'total_seconds': round(total, 3),
+                    'avg_ms': round(total / count * 1000, 1) if count else 0.0,
+                    'share': round(total / busy, 3)
+                }
+                for name, (count, total) in self.stages.items()
+            },
+            'details_skipped': dict(self.details_skipped),
+            'browser': dict(self.browser),
+            'host': self.guard.snapshot() if self.guard is not None else {},
+            'errors': dict(self.errors),
+            'error_rate': round(sum(self.errors.values()) / self.requests, 4) if self.requests else 0.0
+        }
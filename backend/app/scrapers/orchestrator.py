@@ -0,0 +1,269 @@
+"""Crawl multi-sources: Pappers et Société.com en parallèle, une seule récupération par SIREN
+
+Les découvertes des deux sources alimentent une table de réservation commune:
+un SIREN déjà en base ou déjà en cours de traitement n'est pas repris, la
+seconde source n'ajoute qu'un indice (résultat de recherche, URL de fiche).
+Chaque SIREN est ensuite envoyé à la source la moins chère capable de remplir
+ses champs manquants (coûts CRAWL_SOURCE_COSTS, source indisponible si son
+disjoncteur est ouvert), avec repli sur la suivante si elle ne renvoie rien.
+Les données de toutes les sources sont fusionnées en une seule écriture.
+"""
+import logging
+from contextlib import AsyncExitStack
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
+from app.config import settings
+from app.core.cache import InvalidationBatch
+from app.models.schemas import ScrapingStatus
+from app.services.activity_log import activity_log
+from app.scrapers.circuit import CircuitOpenError
+from app.scrapers.pappers import PappersAPIClient
+from app.scrapers.pipeline import Pipeline, Stage, merge_discoveries
+from app.scrapers.societe import SocieteScraper
+
+logger = logging.getLogger(__name__)
+
+# Colonnes qu'on cherche à remplir pour chaque cabinet
+WANTED_FIELDS = (
+    'nom_entreprise', 'siret_siege', 'forme_juridique', 'date_creation', 'adresse', 'code_postal', 'ville',
+    'numero_tva', 'chiffre_affaires', 'resultat', 'effectif', 'capital_social', 'code_naf', 'libelle_code_naf',
+    'dirigeant_principal',
+)
+
+# Colonnes qu'une fiche de chaque source sait remplir
+SOURCE_FIELDS = {
+    'pappers': set(WANTED_FIELDS),
+    'societe': {
+        'nom_entreprise', 'siret_siege', 'forme_juridique', 'date_creation', 'numero_tva', 'chiffre_affaires',
+        'resultat', 'capital_social', 'code_naf', 'libelle_code_naf', 'dirigeant_principal',
+    },
+}
+
+def fill(row: Dict, data: Dict) -> Dict:
+    """`row` complété par les valeurs non vides de `data` (qui priment)"""
+    return {**row, **{key: value for key, value in data.items() if value not in (None, '')}}
+
+def missing_fields(row: Dict) -> Set[str]:
+    return {field for field in WANTED_FIELDS if row.get(field) in (None, '')}
+
+class ClaimTable:
+    """SIREN connus (en base ou traités pendant ce crawl) et SIREN en cours, communs à toutes les sources"""
+
+    def __init__(self, known: Set[str]):
+        self.known = known
+        self.in_flight: Dict[str, Dict] = {}
+        self.duplicates = 0
+        self.skipped = 0
+
+    def claim(self, siren: str, source: str, hint: Dict) -> Optional[Dict]:
+        """Réservation créée pour ce SIREN, ou None s'il est connu ou déjà réservé (l'indice est alors ajouté)"""
+        if siren in self.known:
+            self.skipped += 1
+            return None
+        claim = self.in_flight.get(siren)
+        if claim is not None:
+            claim['hints'].setdefault(source, hint)
+            self.duplicates += 1
+            return None
+        claim = self.in_flight[siren] = {'siren': siren, 'hints': {source: hint}}
+        return claim
+
+    def done(self, siren: str):
+        # Écrit ou écarté: aucune source ne le reprend pendant ce crawl
+        self.in_flight.pop(siren, None)
+        self.known.add(siren)
+
+class CrawlOrchestrator:
+    def __init__(self, db_client, sources: Iterable[str] = ('pappers', 'societe'), costs: Optional[Dict[str, float]] = None):
+        self.db = db_client
+        factories = {'pappers': PappersAPIClient, 'societe': SocieteScraper}
+        self.scrapers = {source: factories[source](db_client) for source in sources}
+        self.costs = costs or settings.CRAWL_SOURCE_COSTS
+        self.claims = ClaimTable(set())
+        self.cache_batch = InvalidationBatch(settings.CACHE_INVALIDATE_BATCH_SIZE)
+        self.statuses = {source: ScrapingStatus(is_running=True, progress=0, message='', source=source) for source in self.scrapers}
+        self.stats = {
+            'discovered': {source: 0 for source in self.scrapers},
+            'fetches': {source: 0 for source in self.scrapers},
+            'no_fetch': 0,
+            'created': 0,
+            'filtered': 0,
+            'failed': 0,
+        }
+
+    def _available(self, source: str, claim: Dict) -> bool:
+        scraper = self.scrapers.get(source)
+        if scraper is None or scraper.guard.state == 'open':
+            return False
+        if source == 'pappers':
+            return bool(scraper.api_key)
+        # Une fiche Société.com s'ouvre par son URL, connue seulement si la recherche Société l'a trouvée
+        return 'url' in claim['hints'].get('societe', {})
+
+    def route(self, claim: Dict, missing: Set[str]) -> List[str]:
+        """Sources à essayer, dans l'ordre: celles qui remplissent tout le manque, puis au coût par champ"""
+        candidates = [
+            source for source in self.scrapers
+            if self._available(source, claim) and missing & SOURCE_FIELDS[source]
+        ]
+
+        def rank(source: str):
+            filled = len(missing & SOURCE_FIELDS[source])
+            return (filled < len(missing), self.costs.get(source, 1.0) / filled)
+
+        return sorted(candidates, key=rank)
+
+    def base_row(self, claim: Dict) -> Dict:
+        """Ligne construite à partir des seuls résultats de recherche"""
+        # Pas de `statut`: le défaut de la colonne s'applique aux seules lignes créées
+        row = {'siren': claim['siren'], 'last_scraped_at': datetime.now().isoformat()}
+        if 'pappers' in claim['hints']:
+            row = fill(row, self.scrapers['pappers']._format_company_data(claim['hints']['pappers']))
+        if 'societe' in claim['hints']:
+            hint = claim['hints']['societe']
+            row = fill(row, {'nom_entreprise': hint.get('nom_entreprise'), 'lien_societe_com': hint.get('url')})
+        return row
+
+    async def _fetch_from(self, source: str, claim: Dict, row: Dict) -> Dict:
+        """Champs récupérés auprès de `source` (format de la table), {} si rien"""
+        scraper = self.scrapers[source]
+        if source == 'pappers':
+            details = await scraper.get_company_details(claim['siren'])
+            return scraper._format_company_data({**claim['hints'].get('pappers', {}), **details}) if details else {}
+        info = {**claim['hints']['societe'], 'nom_entreprise': row.get('nom_entreprise') or claim['hints']['societe'].get('nom_entreprise')}
+        data = await scraper.fetch_company(info)
+        return scraper._clean_data_for_db(data) if data else {}
+
+    def _in_range(self, row: Dict) -> bool:
+        ca = row.get('chiffre_affaires')
+        return not ca or PappersAPIClient.CA_MIN <= ca <= PappersAPIClient.CA_MAX
+
+    async def fetch(self, claim: Dict) -> Optional[Dict]:
+        """Étape de récupération: une source (la moins chère qui convient), repli sur la suivante si vide"""
+        row = self.base_row(claim)
+        if not self._in_range(row):
+            # CA connu dès la recherche et hors cible: aucune fiche à ouvrir
+            self.stats['filtered'] += 1
+            self.claims.done(claim['siren'])
+            return None
+        missing = missing_fields(row)
+        if not missing:
+            self.stats['no_fetch'] += 1
+        for source in (self.route(claim, missing) if missing else []):
+            self.stats['fetches'][source] += 1
+            try:
+                data = await self._fetch_from(source, claim, row)
+            except CircuitOpenError as e:
+                # Source coupée par son disjoncteur: repli sur la suivante, sinon données de recherche
+                logger.warning(f"Source {source} indisponible pour {claim['siren']}: {e}")
+                continue
+            if data:
+                row = fill(row, data)
+                claim['sources'] = [*claim['hints'], source]
+                break
+        claim['row'] = row
+        return claim
+
+    async def write(self, claim: Dict) -> Optional[Dict]:
+        """Étape d'écriture: une seule écriture par cabinet, toutes sources fusionnées"""
+        row = claim['row']
+        try:
+            if not self._in_range(row):
+                self.stats['filtered'] += 1
+                return None
+            # Création seule: un cabinet déjà en base (absent de `existing_sirens`, chargement incomplet) reste intact
+            response = self.db.table('cabinets_comptables').upsert(row, on_conflict='siren', ignore_duplicates=True).execute()
+            if not response.data:
+                self.claims.skipped += 1
+                return None
+            self.stats['created'] += 1
+            self.cache_batch.add()
+            sources = sorted(set(claim.get('sources', claim['hints'])))
+            await activity_log.log(response.data[0]['id'], 'create', {'source': 'crawl', 'sources': sources}, 'Crawl multi-sources')
+            return row
+        except Exception as e:
+            self.stats['failed'] += 1
+            logger.error(f"Erreur sauvegarde {claim['siren']}: {e}")
+            return None
+        finally:
+            self.claims.done(claim['siren'])
+
+    async def discover(self) -> AsyncIterator[Dict]:
+        """Découvertes des sources entrelacées, filtrées par la table de réservation"""
+        discoveries = {
+            'pappers': lambda scraper: scraper.discover_companies(self.statuses['pappers']),
+            'societe': lambda scraper: scraper.discover_companies(self.statuses['societe'], scraper.DEPARTEMENTS),
+        }
+        generators = {source: discoveries[source](scraper) for source, scraper in self.scrapers.items()}
+        async for source, item in merge_discoveries(generators, settings.SCRAPING_QUEUE_SIZE):
+            siren = str(item.get('siren', ''))
+            if not siren:
+                continue
+            self.stats['discovered'][source] += 1
+            claim = self.claims.claim(siren, source, item)
+            if claim is not None:
+                yield claim
+
+    def snapshot(self) -> Dict:
+        fetches = sum(self.stats['fetches'].values())
+        return {
+            **self.stats,
+            'duplicates': self.claims.duplicates,
+            'skipped': self.claims.skipped,
+            'fetches_per_company': round(fetches / self.stats['created'], 3) if self.stats['created'] else 0.0,
+            'sources': {source: scraper.metrics.snapshot() for source, scraper in self.scrapers.items()},
+        }
+
+    async def _enter_sources(self, stack: AsyncExitStack):
+        for source, scraper in list(self.scrapers.items()):
+            try:
+                await stack.enter_async_context(scraper)
+            except Exception as e:
+                # Navigateur indisponible, etc.: le crawl continue avec les autres sources
+                logger.error(f"Source {source} indisponible: {e}")
+                del self.scrapers[source]
+                continue
+            # Un seul ensemble de SIREN connus, partagé avec les filtres propres aux scrapers
+            self.claims.known |= scraper.existing_sirens
+            scraper.existing_sirens = self.claims.known
+        if not self.scrapers:
+            raise RuntimeError("Aucune source disponible")
+
+    async def run(self, status_tracker):
+        def publish():
+            status_tracker.new_companies = self.stats['created']
+            status_tracker.skipped_companies = self.claims.skipped + self.claims.duplicates
+            status_tracker.progress = min(status.progress for status in self.statuses.values())
+            status_tracker.message = ' | '.join(status.message for status in self.statuses.values() if status.message)
+            status_tracker.metrics = self.snapshot()
+
+        async def fetch(claim: Dict) -> Optional[Dict]:
+            result = await self.fetch(claim)
+            publish()
+            return result
+
+        async def write(claim: Dict) -> Optional[Dict]:
+            result = await self.write(claim)
+            publish()
+            return result
+
+        queue_size = settings.SCRAPING_QUEUE_SIZE
+        workers = settings.PAPPERS_DETAIL_CONCURRENCY + settings.SOCIETE_DETAIL_CONCURRENCY
+        async with AsyncExitStack() as stack:
+            stack.callback(self.cache_batch.flush)
+            await self._enter_sources(stack)
+            self.statuses = {source: self.statuses[source] for source in self.scrapers}
+            pipeline = Pipeline(self.discover(), [
+                Stage('fetch', fetch, workers, queue_size),
+                Stage('write', write, 1, queue_size),
+            ])
+            stats = await pipeline.run()
+            logger.info(f"Crawl multi-sources: {stats}, {self.snapshot()}")
+
+        errors = [f"{source}: {status.error}" for source, status in self.statuses.items() if status.error]
+        if errors:
+            status_tracker.error = '; '.join(errors)
+        publish()
+        status_tracker.message = f"Terminé: {self.stats['created']} nouvelles entreprises"
+        status_tracker.progress = 100
+        return self.snapshot()
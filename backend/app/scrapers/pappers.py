@@ -1,10 +1,18 @@
 import asyncio
 import aiohttp
 import logging
-from typing import Dict, List, Optional, Set
+from typing import AsyncIterator, Dict, List, Optional, Set
 from datetime import datetime
 import os
 import json
+from app.services.address import normalize_city
+from app.core.cache import InvalidationBatch
+from app.config import settings
+from app.services.activity_log import activity_log
+from app.scrapers.circuit import HEALTH_FAILURES, CircuitOpenError, get_guard
+from app.scrapers.detail_cache import DetailCache
+from app.scrapers.metrics import ScraperMetrics, error_type
+from app.scrapers.pipeline import Pipeline, Stage
 
 logger = logging.getLogger(__name__)
 
@@ -14,14 +22,38 @@ class PappersAPIClient:
     BASE_URL = "https://api.pappers.fr/v2"
     CODES_NAF = ['6920Z']
     DEPARTEMENTS_IDF = ['75', '77', '78', '91', '92', '93', '94', '95']
+    HOST = "api.pappers.fr"
+    PAGE_PAUSE = 0.5  # secondes entre deux pages de recherche (limites API)
+    RETRY_DELAY = 1.0  # secondes avant la 2e tentative, doublées ensuite
+    CA_MIN = 3000000
+    CA_MAX = 50000000
+    # Champs de /entreprise utilisés par _format_company_data: si la recherche
+    # les renvoie tous, l'appel de détail n'apporte rien
+    DETAIL_FIELDS = (
+        'siret_siege', 'forme_juridique', 'date_creation', 'adresse_ligne_1',
+        'numero_tva_intracommunautaire', 'resultat', 'effectif', 'capital',
+        'code_naf', 'libelle_code_naf', 'representants'
+    )
     
     def __init__(self, db_client):
         self.api_key = os.environ.get('PAPPERS_API_KEY', '')
         self.db = db_client
         self.session = None
         self.existing_sirens = set()
+        # SIREN réservés à l'étape de récupération jusqu'à leur écriture: un doublon
+        # de pagination n'est ni récupéré ni écrit deux fois
+        self.in_flight: Dict[str, Dict] = {}
         self.new_companies_count = 0
         self.skipped_companies_count = 0
+        self.metrics = ScraperMetrics('pappers')
+        self.cache_batch = InvalidationBatch(settings.CACHE_INVALIDATE_BATCH_SIZE)
+        # Partagée avec les autres clients du processus (rafraîchissement): recherche + workers de détail
+        self.guard = get_guard(self.HOST, settings.PAPPERS_DETAIL_CONCURRENCY + 1)
+        self.metrics.guard = self.guard
+        self.detail_cache = (
+            DetailCache(settings.PAPPERS_DETAIL_CACHE_DIR, settings.PAPPERS_DETAIL_CACHE_TTL_SECONDS)
+            if settings.PAPPERS_DETAIL_CACHE_TTL_SECONDS > 0 else None
+        )
         
     async def __aenter__(self):
         self.session = aiohttp.ClientSession()
@@ -29,6 +61,8 @@ class PappersAPIClient:
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        # Dernier lot de créations (fin normale, arrêt ou annulation)
+        self.cache_batch.flush()
         if self.session:
             await self.session.close()
     
@@ -41,6 +75,27 @@ class PappersAPIClient:
         except Exception as e:
             logger.error(f"Erreur chargement SIREN: {e}")
             
+    async def _get_json(self, stage: str, endpoint: str, params: Dict) -> Dict:
+        """GET via la garde de l'hôte, avec nouvelles tentatives sur les erreurs transitoires"""
+        attempts = max(settings.SCRAPING_RETRY_ATTEMPTS, 1)
+        for attempt in range(1, attempts + 1):
+            try:
+                async with self.guard.request():
+                    with self.metrics.stage(stage):
+                        async with self.session.get(endpoint, params=params) as response:
+                            response.raise_for_status()
+                            return await response.json()
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                kind = error_type(e)
+                self.metrics.error(kind)
+                # 4xx (clé invalide, quota, SIREN inconnu): inutile d'insister
+                if kind not in HEALTH_FAILURES or attempt == attempts:
+                    raise
+                logger.warning(f"Pappers {stage}: {kind}, tentative {attempt + 1}/{attempts}")
+                await self.metrics.sleep(self.RETRY_DELAY * 2 ** (attempt - 1))
+    
     async def search_companies(self, **params) -> Dict:
         """Recherche asynchrone des entreprises"""
         endpoint = f"{self.BASE_URL}/recherche"
@@ -52,17 +107,40 @@ class PappersAPIClient:
         }
         
         all_params = {**default_params, **params}
+        # aiohttp refuse les booléens dans la query string
+        all_params = {k: str(v).lower() if isinstance(v, bool) else v for k, v in all_params.items()}
         
         try:
-            async with self.session.get(endpoint, params=all_params) as response:
-                response.raise_for_status()
-                return await response.json()
+            return await self._get_json('search', endpoint, all_params)
         except Exception as e:
             logger.error(f"Erreur API Pappers: {e}")
             raise
     
+    def _ca_in_range(self, ca) -> bool:
+        """CA inconnu accepté; sinon dans la tranche ciblée"""
+        return not ca or self.CA_MIN <= ca <= self.CA_MAX
+    
+    def _needs_details(self, company: Dict) -> bool:
+        """Faut-il appeler /entreprise pour ce résultat de recherche ?"""
+        if str(company.get('siren', '')) in self.existing_sirens:
+            reason = 'known'
+        elif not self._ca_in_range(company.get('chiffre_affaires', 0)):
+            reason = 'filtered'
+        elif all(field in company for field in self.DETAIL_FIELDS):
+            reason = 'sufficient'
+        else:
+            return True
+        self.metrics.detail_skipped(reason)
+        return False
+    
     async def get_company_details(self, siren: str) -> Dict:
-        """Récupère les détails d'une entreprise"""
+        """Récupère les détails d'une entreprise (cache disque d'abord)"""
+        if self.detail_cache:
+            cached = self.detail_cache.get(siren)
+            if cached:
+                self.metrics.detail_skipped('cache')
+                return cached
+        
         endpoint = f"{self.BASE_URL}/entreprise"
         params = {
             'api_token': self.api_key,
@@ -70,39 +148,83 @@ class PappersAPIClient:
         }
         
         try:
-            async with self.session.get(endpoint, params=params) as response:
-                response.raise_for_status()
-                return await response.json()
+            details = await self._get_json('detail', endpoint, params)
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Erreur détails SIREN {siren}: {e}")
             return {}
+        
+        if self.detail_cache:
+            self.detail_cache.set(siren, details)
+        return details
     
-    async def process_company(self, company_data: Dict) -> Optional[Dict]:
-        """Traite et sauvegarde une entreprise"""
+    def _claim(self, company: Dict) -> bool:
+        """Réserve le SIREN pour ce résultat; False si un autre exemplaire le détient déjà"""
+        return self.in_flight.setdefault(str(company.get('siren', '')), company) is company
+    
+    async def fetch_company(self, company: Dict) -> Dict:
+        """Étape de récupération: complète le résultat de recherche par /entreprise si utile"""
+        siren = company.get('siren')
+        if siren and str(siren) not in self.existing_sirens and not self._claim(company):
+            # Doublon encore en cours de traitement: écarté à l'analyse
+            self.metrics.detail_skipped('duplicate')
+            return company
+        if siren and self._needs_details(company):
+            try:
+                details = await self.get_company_details(siren)
+            except CircuitOpenError:
+                # Pappers ne répond plus: la fiche est écrite avec les seules données de recherche
+                self.metrics.detail_skipped('circuit')
+                return company
+            if details:
+                company.update(details)
+        return company
+    
+    def parse_company(self, company_data: Dict) -> Optional[Dict]:
+        """Étape d'analyse: écarte les SIREN connus et hors cible, formate pour la base"""
         siren = str(company_data.get('siren', ''))
         
-        # Vérifier si déjà en base
-        if siren in self.existing_sirens:
+        # Vérifier si déjà en base ou déjà réservé par un autre exemplaire
+        if siren in self.existing_sirens or not self._claim(company_data):
             self.skipped_companies_count += 1
+            self.metrics.company_done('skipped')
             return None
         
         # Vérifier le CA
-        ca = company_data.get('chiffre_affaires', 0)
-        if ca and (ca < 3000000 or ca > 50000000):
+        if not self._ca_in_range(company_data.get('chiffre_affaires', 0)):
+            self.in_flight.pop(siren, None)
+            self.metrics.company_done('filtered')
             return None
         
-        # Formater pour la base
-        clean_data = self._format_company_data(company_data)
-        
-        # Sauvegarder
+        with self.metrics.stage('parse'):
+            return self._format_company_data(company_data)
+    
+    async def save_company(self, clean_data: Dict) -> Optional[Dict]:
+        """Étape d'écriture: insère l'entreprise et journalise la création"""
         try:
-            response = self.db.table('cabinets_comptables').insert(clean_data).execute()
+            with self.metrics.stage('db_write'):
+                response = self.db.table('cabinets_comptables').insert(clean_data).execute()
             self.new_companies_count += 1
+            self.existing_sirens.add(clean_data['siren'])
+            self.metrics.company_done('created')
+            self.cache_batch.add()
+            if response.data:
+                await activity_log.log(response.data[0]['id'], 'create', {'source': 'pappers'}, 'Scraper Pappers')
             logger.info(f"Nouvelle entreprise: {clean_data['nom_entreprise']}")
             return clean_data
         except Exception as e:
+            self.metrics.error('db')
+            self.metrics.company_done('failed')
             logger.error(f"Erreur sauvegarde: {e}")
             return None
+        finally:
+            self.in_flight.pop(clean_data['siren'], None)
+    
+    async def process_company(self, company_data: Dict) -> Optional[Dict]:
+        """Traite et sauvegarde une entreprise (analyse puis écriture)"""
+        clean_data = self.parse_company(company_data)
+        return await self.save_company(clean_data) if clean_data else None
     
     def _format_company_data(self, data: Dict) -> Dict:
         """Formate les données pour Supabase"""
@@ -113,6 +235,8 @@ class PappersAPIClient:
             'forme_juridique': data.get('forme_juridique', ''),
             'date_creation': data.get('date_creation'),
             'adresse': self._format_address(data),
+            'code_postal': data.get('code_postal') or None,
+            'ville': normalize_city(data.get('ville')),
             'email': data.get('email', ''),
             'telephone': data.get('telephone', ''),
             'numero_tva': data.get('numero_tva_intracommunautaire', ''),
@@ -146,65 +270,86 @@ class PappersAPIClient:
             return f"{nom} ({qualite})" if qualite else nom
         return ''
     
-    async def run_full_scraping(self, status_tracker):
-        """Lance le scraping complet"""
-        async with self:
-            for code_naf in self.CODES_NAF:
-                for dept in self.DEPARTEMENTS_IDF:
-                    status_tracker.message = f"Scraping {code_naf} - Département {dept}"
-                    logger.info(status_tracker.message)
+    async def discover_companies(self, status_tracker) -> AsyncIterator[Dict]:
+        """Étape de découverte: résultats de recherche, département par département"""
+        for code_naf in self.CODES_NAF:
+            for index, dept in enumerate(self.DEPARTEMENTS_IDF):
+                status_tracker.message = f"Scraping {code_naf} - Département {dept}"
+                status_tracker.progress = int(index / len(self.DEPARTEMENTS_IDF) * 100)
+                logger.info(status_tracker.message)
+                
+                page = 1
+                has_more = True
+                
+                while has_more:
+                    try:
+                        response = await self.search_companies(
+                            code_naf=code_naf,
+                            departement=dept,
+                            page=page,
+                            entreprise_cessee=False,
+                            chiffre_affaires_min=self.CA_MIN
+                        )
+                    except CircuitOpenError as e:
+                        logger.error(f"Arrêt du scraping: {e}")
+                        status_tracker.error = "Pappers refuse les requêtes (trop d'erreurs ou de 429)"
+                        return
+                    except Exception as e:
+                        logger.error(f"Erreur scraping: {e}")
+                        if "quota" in str(e).lower():
+                            # Plus de recherche; les fiches déjà découvertes finissent leur parcours
+                            status_tracker.error = "Quota API atteint"
+                            return
+                        break
                     
-                    page = 1
-                    has_more = True
+                    if 'resultats' not in response:
+                        break
+                    for company in response['resultats']:
+                        yield company
+                    self.metrics.page_done()
                     
-                    while has_more:
-                        try:
-                            # Recherche
-                            response = await self.search_companies(
-                                code_naf=code_naf,
-                                departement=dept,
-                                page=page,
-                                entreprise_cessee=False,
-                                chiffre_affaires_min=3000000
-                            )
-                            
-                            if 'resultats' in response:
-                                companies = response['resultats']
-                                
-                                # Traiter chaque entreprise
-                                for company in companies:
-                                    # Récupérer les détails
-                                    siren = company.get('siren')
-                                    if siren:
-                                        details = await self.get_company_details(siren)
-                                        if details:
-                                            company.update(details)
-                                    
-                                    await self.process_company(company)
-                                    
-                                    # Mettre à jour le statut
-                                    status_tracker.new_companies = self.new_companies_count
-                                    status_tracker.skipped_companies = self.skipped_companies_count
-                                    progress = (self.DEPARTEMENTS_IDF.index(dept) / len(self.DEPARTEMENTS_IDF)) * 100
-                                    status_tracker.progress = int(progress)
-                                
-                                # Pagination
-                                total = response.get('total', 0)
-                                per_page = response.get('par_page', 100)
-                                has_more = (page * per_page) < total
-                                page += 1
-                                
-                                # Pause pour respecter les limites API
-                                await asyncio.sleep(0.5)
-                            else:
-                                has_more = False
-                                
-                        except Exception as e:
-                            logger.error(f"Erreur scraping: {e}")
-                            if "quota" in str(e).lower():
-                                status_tracker.error = "Quota API atteint"
-                                return
-                            has_more = False
+                    # Pagination
+                    total = response.get('total', 0)
+                    per_page = response.get('par_page', 100)
+                    has_more = (page * per_page) < total
+                    page += 1
+                    
+                    # Pause pour respecter les limites API (les étapes aval continuent pendant ce temps)
+                    await self.metrics.sleep(self.PAGE_PAUSE)
+    
+    async def run_full_scraping(self, status_tracker):
+        """Lance le scraping complet: découverte → détails → analyse → écriture en parallèle"""
+        def publish():
+            status_tracker.new_companies = self.new_companies_count
+            status_tracker.skipped_companies = self.skipped_companies_count
+            status_tracker.metrics = self.metrics.snapshot()
+        
+        async def parse(company: Dict) -> Optional[Dict]:
+            clean_data = self.parse_company(company)
+            if clean_data is None:
+                publish()
+            return clean_data
+        
+        async def write(clean_data: Dict) -> Optional[Dict]:
+            result = await self.save_company(clean_data)
+            publish()
+            return result
+        
+        queue_size = settings.SCRAPING_QUEUE_SIZE
+        async with self:
+            pipeline = Pipeline(self.discover_companies(status_tracker), [
+                Stage('fetch', self.fetch_company, settings.PAPPERS_DETAIL_CONCURRENCY, queue_size),
+                Stage('parse', parse, 1, queue_size),
+                Stage('write', write, 1, queue_size),
+            ])
+            stats = await pipeline.run()
+            logger.info(f"Pipeline Pappers: {stats}")
+            if self.detail_cache:
+                # Une fiche par SIREN: sans purge le répertoire grossit à chaque passage
+                removed = await asyncio.to_thread(self.detail_cache.purge)
+                logger.info(f"Cache détail: {removed} fiches périmées supprimées")
             
-            status_tracker.message = f"Terminé: {self.new_companies_count} nouvelles entreprises"
-            status_tracker.progress = 100
\ No newline at end of file
+            if not status_tracker.error:
+                status_tracker.message = f"Terminé: {self.new_companies_count} nouvelles entreprises"
+                status_tracker.progress = 100
+            publish()
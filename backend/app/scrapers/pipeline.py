@@ -0,0 +1,119 @@
+"""Pipeline asynchrone par étapes (découverte → récupération → analyse → écriture)
+
+La découverte est un générateur asynchrone; chaque étape suivante est une
+fonction `async (élément) -> élément | None` (None écarte l'élément) servie par
+ses propres workers. Des files bornées relient les étapes: quand une étape
+aval est saturée, l'amont se bloque (contre-pression), et tant qu'elle ne
+l'est pas, l'amont prend de l'avance (la page de recherche suivante est
+demandée pendant que les fiches de la page courante sont encore en cours).
+"""
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+async def merge_discoveries(discoveries: Dict[str, AsyncIterator], queue_size: int = 100) -> AsyncIterator[Tuple[str, Any]]:
+    """Entrelace plusieurs découvertes concurrentes en `(source, élément)`
+
+    L'échec d'une source est journalisé sans arrêter les autres.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def drain(source: str, discover: AsyncIterator):
+        try:
+            async for item in discover:
+                await queue.put((source, item))
+        except Exception as e:
+            logger.error(f"Découverte {source} interrompue: {e}")
+        finally:
+            await queue.put(_DONE)
+
+    tasks = [asyncio.create_task(drain(source, discover)) for source, discover in discoveries.items()]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await queue.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+class Stage:
+    """Étape du pipeline: `concurrency` workers, file d'entrée de `queue_size` éléments"""
+
+    def __init__(self, name: str, func: Callable[[Any], Awaitable[Optional[Any]]], concurrency: int = 1, queue_size: int = 100):
+        self.name = name
+        self.func = func
+        self.concurrency = max(concurrency, 1)
+        self.queue_size = queue_size
+        self.stats = {'in': 0, 'out': 0, 'dropped': 0, 'errors': 0}
+
+class Pipeline:
+    """Relie un générateur de découverte à des étapes concurrentes
+
+    Une exception dans une étape est journalisée et compte comme erreur pour
+    l'élément concerné; une exception de la découverte arrête tout le pipeline
+    et remonte à l'appelant (ex: quota API atteint).
+    """
+
+    def __init__(self, discover: AsyncIterator, stages: List[Stage]):
+        self.discover = discover
+        self.stages = stages
+        self.discovered = 0
+
+    async def run(self) -> Dict[str, Dict[str, int]]:
+        queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        tasks = [asyncio.create_task(self._feed(queues[0]))]
+        for index, stage in enumerate(self.stages):
+            downstream = queues[index + 1] if index + 1 < len(queues) else None
+            next_workers = self.stages[index + 1].concurrency if downstream else 0
+            tasks.append(asyncio.create_task(self._serve(stage, queues[index], downstream, next_workers)))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return self.stats()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {'discover': {'out': self.discovered}, **{stage.name: dict(stage.stats) for stage in self.stages}}
+
+    async def _feed(self, queue: asyncio.Queue):
+        async for item in self.discover:
+            self.discovered += 1
+            await queue.put(item)
+        for _ in range(self.stages[0].concurrency):
+            await queue.put(_DONE)
+
+    async def _serve(self, stage: Stage, queue: asyncio.Queue, downstream: Optional[asyncio.Queue], next_workers: int):
+        await asyncio.gather(*(self._work(stage, queue, downstream) for _ in range(stage.concurrency)))
+        # Tous les workers ont fini: on signale la fin à chaque worker de l'étape suivante
+        for _ in range(next_workers):
+            await downstream.put(_DONE)
+
+    async def _work(self, stage: Stage, queue: asyncio.Queue, downstream: Optional[asyncio.Queue]):
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            stage.stats['in'] += 1
+            try:
+                result = await stage.func(item)
+            except Exception as e:
+                stage.stats['errors'] += 1
+                logger.error(f"Étape {stage.name}: {e}")
+                continue
+            if result is None:
+                stage.stats['dropped'] += 1
+                continue
+            stage.stats['out'] += 1
+            if downstream is not None:
+                await downstream.put(result)
@@ -2,10 +2,16 @@ import asyncio
 import random
 import re
 import logging
-from typing import Dict, List, Optional, Set
+from typing import AsyncIterator, Dict, List, Optional, Set
 from datetime import datetime
-from playwright.async_api import async_playwright
 from urllib.parse import quote, urljoin
+from app.config import settings
+from app.core.cache import InvalidationBatch
+from app.services.activity_log import activity_log
+from app.scrapers.browser import BrowserPool
+from app.scrapers.circuit import CircuitOpenError, get_guard
+from app.scrapers.metrics import ScraperMetrics, error_type
+from app.scrapers.pipeline import Pipeline, Stage
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +20,9 @@ class SocieteScraper:
     
     BASE_URL = "https://www.societe.com"
     SEARCH_URL = "https://www.societe.com/cgi-bin/search"
+    HOST = "www.societe.com"
+    DEPARTEMENTS = ['75', '77', '78', '91', '92', '93', '94', '95']
+    RETRY_DELAY = 5.0  # secondes avant une nouvelle tentative (hors captcha: le disjoncteur impose sa pause)
     
     USER_AGENTS = [
         'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
@@ -23,12 +32,16 @@ class SocieteScraper:
     
     def __init__(self, db_client):
         self.db = db_client
-        self.browser = None
-        self.context = None
-        self.page = None
+        self.browser_pool: Optional[BrowserPool] = None
+        self.fetched_count = 0
         self.existing_sirens = set()
         self.new_companies_count = 0
         self.skipped_companies_count = 0
+        self.metrics = ScraperMetrics('societe')
+        self.cache_batch = InvalidationBatch(settings.CACHE_INVALIDATE_BATCH_SIZE)
+        # Un captcha ouvre le disjoncteur: toutes les requêtes vers le site attendent la fin de la pause
+        self.guard = get_guard(self.HOST, max(settings.SOCIETE_DETAIL_CONCURRENCY, 1) + 1)
+        self.metrics.guard = self.guard
         
     async def __aenter__(self):
         await self._setup_browser()
@@ -36,8 +49,11 @@ class SocieteScraper:
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.browser:
-            await self.browser.close()
+        # Dernier lot de créations (fin normale, arrêt ou annulation)
+        self.cache_batch.flush()
+        if self.browser_pool:
+            await self.browser_pool.close()
+            self.browser_pool = None
     
     async def _load_existing_sirens(self):
         """Charge les SIREN existants"""
@@ -48,10 +64,25 @@ class SocieteScraper:
         except Exception as e:
             logger.error(f"Erreur chargement SIREN: {e}")
     
+    # Scripts anti-détection injectés dans chaque contexte
+    INIT_SCRIPT = """
+        Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
+        window.chrome = { runtime: {} };
+        Object.defineProperty(navigator, 'plugins', { get: () => [1, 2, 3, 4, 5] });
+        Object.defineProperty(navigator, 'languages', { get: () => ['fr-FR', 'fr', 'en'] });
+    """
+    
+    def _context_options(self) -> Dict:
+        """Contexte avec fingerprint aléatoire (tiré à chaque recyclage)"""
+        return {
+            'user_agent': random.choice(self.USER_AGENTS),
+            'viewport': {'width': 1920, 'height': 1080},
+            'locale': 'fr-FR',
+            'timezone_id': 'Europe/Paris'
+        }
+    
     async def _setup_browser(self):
-        """Configure le navigateur avec anti-détection"""
-        playwright = await async_playwright().start()
-        
+        """Configure le navigateur avec anti-détection: un onglet par worker de fiches, plus la recherche"""
         browser_args = [
             '--disable-blink-features=AutomationControlled',
             '--disable-features=IsolateOrigins,site-per-process',
@@ -60,172 +91,217 @@ class SocieteScraper:
             '--window-size=1920,1080'
         ]
         
-        self.browser = await playwright.chromium.launch(
-            headless=True,
-            args=browser_args
+        self.browser_pool = BrowserPool(
+            tabs=max(settings.SOCIETE_DETAIL_CONCURRENCY, 1) + 1,
+            launch_options={'headless': settings.HEADLESS, 'args': browser_args},
+            context_options=self._context_options,
+            init_script=self.INIT_SCRIPT,
+            max_pages=settings.SOCIETE_CONTEXT_MAX_PAGES,
+            max_memory_mb=settings.SOCIETE_BROWSER_MAX_MEMORY_MB,
+            metrics=self.metrics
         )
-        
-        # Contexte avec fingerprint aléatoire
-        user_agent = random.choice(self.USER_AGENTS)
-        self.context = await self.browser.new_context(
-            user_agent=user_agent,
-            viewport={'width': 1920, 'height': 1080},
-            locale='fr-FR',
-            timezone_id='Europe/Paris'
-        )
-        
-        # Scripts anti-détection
-        await self.context.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
-            window.chrome = { runtime: {} };
-            Object.defineProperty(navigator, 'plugins', { get: () => [1, 2, 3, 4, 5] });
-            Object.defineProperty(navigator, 'languages', { get: () => ['fr-FR', 'fr', 'en'] });
-        """)
-        
-        self.page = await self.context.new_page()
+        try:
+            await self.browser_pool.start()
+        except Exception:
+            # __aexit__ n'est pas appelé si __aenter__ échoue: on arrête le driver ici
+            await self.browser_pool.close()
+            self.browser_pool = None
+            raise
     
     async def _random_delay(self, min_seconds: float = 0.5, max_seconds: float = 2.0):
         """Délai aléatoire"""
-        await asyncio.sleep(random.uniform(min_seconds, max_seconds))
+        await self.metrics.sleep(random.uniform(min_seconds, max_seconds))
     
     async def search_companies(self, department: str, page_num: int = 1) -> tuple[List[Dict], bool]:
-        """Recherche les entreprises par département"""
-        companies = []
+        """Recherche les entreprises par département (nouvelle tentative après un captcha ou une erreur)"""
+        # Construction URL
+        params = {
+            'champs': department,
+            'naf': '6920Z',
+            'page': str(page_num)
+        }
+        query_string = '&'.join([f"{k}={quote(v)}" for k, v in params.items()])
+        search_url = f"{self.SEARCH_URL}?{query_string}"
         
-        try:
-            # Construction URL
-            params = {
-                'champs': department,
-                'naf': '6920Z',
-                'page': str(page_num)
-            }
-            query_string = '&'.join([f"{k}={quote(v)}" for k, v in params.items()])
-            search_url = f"{self.SEARCH_URL}?{query_string}"
-            
+        attempts = max(settings.SCRAPING_RETRY_ATTEMPTS, 1)
+        for attempt in range(1, attempts + 1):
             logger.info(f"Recherche département {department}, page {page_num}")
-            
-            # Navigation
-            await self.page.goto(search_url, wait_until='networkidle')
-            await self._random_delay(1, 3)
-            
-            # Vérifier captcha
-            if await self.page.locator('div.g-recaptcha').count() > 0:
-                logger.warning("Captcha détecté")
-                return companies, False
-            
-            # Extraction des liens
-            await self.page.wait_for_selector('div#result-list', timeout=10000)
-            company_links = await self.page.locator('div#result-list a.txt-no-wrap').all()
-            
-            for link in company_links:
-                try:
-                    href = await link.get_attribute('href')
-                    if href and '/societe/' in href:
-                        # Extraire SIREN
-                        siren_match = re.search(r'/societe/[^/]+/(\d{9})', href)
-                        if siren_match:
-                            siren = siren_match.group(1)
-                            
-                            if siren in self.existing_sirens:
-                                self.skipped_companies_count += 1
-                                continue
-                            
-                            company_info = {
-                                'siren': siren,
-                                'url': urljoin(self.BASE_URL, href),
-                                'nom_entreprise': await link.inner_text()
-                            }
-                            companies.append(company_info)
-                            
-                except Exception as e:
-                    logger.error(f"Erreur extraction lien: {e}")
-            
-            # Page suivante ?
-            has_next = await self.page.locator('a:has-text("Suivant")').count() > 0
-            
-            return companies, has_next
-            
-        except Exception as e:
-            logger.error(f"Erreur recherche: {e}")
-            return companies, False
+            try:
+                async with self.guard.request() as call:
+                    async with self.browser_pool.page() as page:
+                        # Navigation
+                        with self.metrics.stage('search'):
+                            await page.goto(search_url, wait_until='networkidle')
+                        await self._random_delay(1, 3)
+                        
+                        # Vérifier captcha
+                        if await page.locator('div.g-recaptcha').count() > 0:
+                            call.fail('captcha')
+                            self.metrics.error('captcha')
+                            logger.warning(f"Captcha détecté (tentative {attempt}/{attempts})")
+                            continue
+                        
+                        # Extraction des liens
+                        with self.metrics.stage('parse'):
+                            await page.wait_for_selector('div#result-list', timeout=10000)
+                            companies, has_next = await self._extract_search_results(page)
+                self.metrics.page_done()
+                return companies, has_next
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                self.metrics.error(error_type(e))
+                logger.error(f"Erreur recherche: {e}")
+                if attempt < attempts:
+                    await self.metrics.sleep(self.RETRY_DELAY)
+        return [], False
     
-    async def scrape_company_details(self, company_info: Dict) -> Optional[Dict]:
-        """Récupère les détails d'une entreprise"""
-        try:
-            url = company_info['url']
-            logger.info(f"Scraping {company_info['nom_entreprise']}")
-            
-            await self._random_delay(2, 5)
-            await self.page.goto(url, wait_until='networkidle')
-            
-            # Vérifier captcha
-            if await self.page.locator('div.g-recaptcha').count() > 0:
-                return None
-            
-            # Extraction des données
-            data = {
-                'siren': company_info['siren'],
-                'nom_entreprise': company_info['nom_entreprise'],
-                'lien_societe_com': url,
-                'statut': 'à contacter',
-                'last_scraped_at': datetime.now().isoformat()
-            }
-            
-            # Sélecteurs pour les données
-            selectors = {
-                'forme_juridique': 'td:has-text("Forme juridique") + td',
-                'siret_siege': 'td:has-text("SIRET (siège)") + td',
-                'numero_tva': 'td:has-text("TVA") + td',
-                'code_naf': 'td:has-text("Activité") + td span.NAF',
-                'libelle_code_naf': 'td:has-text("Activité") + td'
-            }
-            
-            for field, selector in selectors.items():
-                data[field] = await self._safe_get_text(selector)
-            
-            # Capital social
-            capital_text = await self._safe_get_text('td:has-text("Capital social") + td')
-            if capital_text:
-                match = re.search(r'([\d\s]+)', capital_text.replace(' ', ''))
-                if match:
-                    data['capital_social'] = int(match.group(1))
-            
-            # Date création
-            date_text = await self._safe_get_text('td:has-text("Date création entreprise") + td')
-            if date_text:
-                match = re.search(r'(\d{2})-(\d{2})-(\d{4})', date_text)
-                if match:
-                    data['date_creation'] = f"{match.group(3)}-{match.group(2)}-{match.group(1)}"
-            
-            # CA et résultat
-            await self._extract_financial_data(data)
-            
-            # Dirigeants
-            await self._extract_dirigeants(data)
-            
-            # Vérifier CA
-            ca = data.get('chiffre_affaires', 0)
-            if ca and (ca < 3000000 or ca > 50000000):
-                return None
-            
-            # Sauvegarder
+    async def _extract_search_results(self, page) -> tuple[List[Dict], bool]:
+        """Extrait les entreprises et la présence d'une page suivante"""
+        companies = []
+        company_links = await page.locator('div#result-list a.txt-no-wrap').all()
+        
+        for link in company_links:
+            try:
+                href = await link.get_attribute('href')
+                if href and '/societe/' in href:
+                    # Extraire SIREN
+                    siren_match = re.search(r'/societe/[^/]+/(\d{9})', href)
+                    if siren_match:
+                        siren = siren_match.group(1)
+                        
+                        if siren in self.existing_sirens:
+                            self.skipped_companies_count += 1
+                            self.metrics.company_done('skipped')
+                            continue
+                        
+                        company_info = {
+                            'siren': siren,
+                            'url': urljoin(self.BASE_URL, href),
+                            'nom_entreprise': await link.inner_text()
+                        }
+                        companies.append(company_info)
+                        
+            except Exception as e:
+                self.metrics.error('parse')
+                logger.error(f"Erreur extraction lien: {e}")
+        
+        # Page suivante ?
+        has_next = await page.locator('a:has-text("Suivant")').count() > 0
+        
+        return companies, has_next
+    
+    async def fetch_company(self, company_info: Dict) -> Optional[Dict]:
+        """Étape de récupération: ouvre la fiche dans un onglet du pool et en extrait les champs"""
+        url = company_info['url']
+        logger.info(f"Scraping {company_info['nom_entreprise']}")
+        
+        attempts = max(settings.SCRAPING_RETRY_ATTEMPTS, 1)
+        for attempt in range(1, attempts + 1):
             try:
-                clean_data = self._clean_data_for_db(data)
-                self.db.table('cabinets_comptables').insert(clean_data).execute()
-                self.new_companies_count += 1
-                return clean_data
+                await self._random_delay(2, 5)
+                async with self.guard.request() as call:
+                    async with self.browser_pool.page() as page:
+                        with self.metrics.stage('detail'):
+                            await page.goto(url, wait_until='networkidle')
+                        
+                        # Vérifier captcha
+                        if await page.locator('div.g-recaptcha').count() > 0:
+                            call.fail('captcha')
+                            self.metrics.error('captcha')
+                            continue
+                        
+                        with self.metrics.stage('parse'):
+                            return await self._extract_company_data(company_info, url, page)
+            except CircuitOpenError:
+                raise
             except Exception as e:
-                logger.error(f"Erreur sauvegarde: {e}")
-                return None
-                
+                self.metrics.error(error_type(e))
+                logger.error(f"Erreur scraping détails: {e}")
+        
+        self.metrics.company_done('failed')
+        return None
+    
+    async def save_company(self, data: Dict) -> Optional[Dict]:
+        """Étape d'écriture: filtre sur le CA puis insère l'entreprise"""
+        # Vérifier CA
+        ca = data.get('chiffre_affaires', 0)
+        if ca and (ca < 3000000 or ca > 50000000):
+            self.metrics.company_done('filtered')
+            return None
+        
+        # Sauvegarder
+        try:
+            clean_data = self._clean_data_for_db(data)
+            with self.metrics.stage('db_write'):
+                response = self.db.table('cabinets_comptables').insert(clean_data).execute()
+            self.new_companies_count += 1
+            self.existing_sirens.add(clean_data['siren'])
+            self.metrics.company_done('created')
+            self.cache_batch.add()
+            if response.data:
+                await activity_log.log(response.data[0]['id'], 'create', {'source': 'societe'}, 'Scraper Société.com')
+            return clean_data
         except Exception as e:
-            logger.error(f"Erreur scraping détails: {e}")
+            self.metrics.error('db')
+            self.metrics.company_done('failed')
+            logger.error(f"Erreur sauvegarde: {e}")
             return None
     
-    async def _safe_get_text(self, selector: str) -> Optional[str]:
+    async def scrape_company_details(self, company_info: Dict) -> Optional[Dict]:
+        """Récupère les détails d'une entreprise et la sauvegarde"""
+        data = await self.fetch_company(company_info)
+        return await self.save_company(data) if data else None
+    
+    async def _extract_company_data(self, company_info: Dict, url: str, page) -> Dict:
+        """Extrait les champs de la fiche entreprise ouverte dans la page"""
+        # Extraction des données
+        data = {
+            'siren': company_info['siren'],
+            'nom_entreprise': company_info['nom_entreprise'],
+            'lien_societe_com': url,
+            'statut': 'à contacter',
+            'last_scraped_at': datetime.now().isoformat()
+        }
+        
+        # Sélecteurs pour les données
+        selectors = {
+            'forme_juridique': 'td:has-text("Forme juridique") + td',
+            'siret_siege': 'td:has-text("SIRET (siège)") + td',
+            'numero_tva': 'td:has-text("TVA") + td',
+            'code_naf': 'td:has-text("Activité") + td span.NAF',
+            'libelle_code_naf': 'td:has-text("Activité") + td'
+        }
+        
+        for field, selector in selectors.items():
+            data[field] = await self._safe_get_text(selector, page)
+        
+        # Capital social
+        capital_text = await self._safe_get_text('td:has-text("Capital social") + td', page)
+        if capital_text:
+            match = re.search(r'([\d\s]+)', capital_text.replace(' ', ''))
+            if match:
+                data['capital_social'] = int(match.group(1))
+        
+        # Date création
+        date_text = await self._safe_get_text('td:has-text("Date création entreprise") + td', page)
+        if date_text:
+            match = re.search(r'(\d{2})-(\d{2})-(\d{4})', date_text)
+            if match:
+                data['date_creation'] = f"{match.group(3)}-{match.group(2)}-{match.group(1)}"
+        
+        # CA et résultat
+        await self._extract_financial_data(data, page)
+        
+        # Dirigeants
+        await self._extract_dirigeants(data, page)
+        
+        return data
+    
+    async def _safe_get_text(self, selector: str, page) -> Optional[str]:
         """Récupère le texte de manière sécurisée"""
         try:
-            element = self.page.locator(selector).first
+            element = page.locator(selector).first
             if await element.count() > 0:
                 text = await element.inner_text()
                 return text.strip() if text else None
@@ -233,10 +309,10 @@ class SocieteScraper:
             pass
         return None
     
-    async def _extract_financial_data(self, data: Dict):
+    async def _extract_financial_data(self, data: Dict, page):
         """Extrait les données financières"""
         # CA
-        ca_elements = await self.page.locator('text=/Chiffre d\'affaires/').all()
+        ca_elements = await page.locator('text=/Chiffre d\'affaires/').all()
         for elem in ca_elements:
             try:
                 parent = await elem.locator('..').inner_text()
@@ -248,7 +324,7 @@ class SocieteScraper:
                 continue
         
         # Résultat
-        res_elements = await self.page.locator('text=/Résultat net/').all()
+        res_elements = await page.locator('text=/Résultat net/').all()
         for elem in res_elements:
             try:
                 parent = await elem.locator('..').inner_text()
@@ -259,10 +335,10 @@ class SocieteScraper:
             except:
                 continue
     
-    async def _extract_dirigeants(self, data: Dict):
+    async def _extract_dirigeants(self, data: Dict, page):
         """Extrait les dirigeants"""
         dirigeants = []
-        dirigeant_elements = await self.page.locator('div.dirigeant').all()
+        dirigeant_elements = await page.locator('div.dirigeant').all()
         
         for elem in dirigeant_elements[:5]:  # Max 5 dirigeants
             try:
@@ -308,34 +384,67 @@ class SocieteScraper:
         
         return clean_data
     
+    async def discover_companies(self, status_tracker, departments: List[str]) -> AsyncIterator[Dict]:
+        """Étape de découverte: pages de recherche, département par département"""
+        for i, dept in enumerate(departments):
+            status_tracker.message = f"Scraping Société.com - Département {dept}"
+            logger.info(status_tracker.message)
+            
+            page_num = 1
+            has_next = True
+            
+            while has_next and page_num <= 5:  # Limite pages
+                try:
+                    companies, has_next = await self.search_companies(dept, page_num)
+                except CircuitOpenError as e:
+                    # Blocage persistant: on arrête plutôt que d'insister auprès du site
+                    logger.error(f"Arrêt du scraping: {e}")
+                    status_tracker.error = "Société.com bloque le scraping (captcha)"
+                    return
+                for company in companies:
+                    yield company
+                page_num += 1
+            status_tracker.progress = int((i + 1) / len(departments) * 100)
+    
     async def run_full_scraping(self, status_tracker):
-        """Lance le scraping complet"""
-        departments = ['75', '77', '78', '91', '92', '93', '94', '95']
+        """Lance le scraping complet: la recherche avance pendant que les fiches sont lues et écrites"""
+        def publish():
+            status_tracker.new_companies = self.new_companies_count
+            status_tracker.skipped_companies = self.skipped_companies_count
+            status_tracker.metrics = self.metrics.snapshot()
         
+        async def fetch(company: Dict) -> Optional[Dict]:
+            try:
+                data = await self.fetch_company(company)
+            except CircuitOpenError:
+                # Site bloqué pour de bon: les fiches déjà découvertes sont comptées en échec
+                self.metrics.company_done('failed')
+                publish()
+                return None
+            if data is None:
+                publish()
+            # Pause anti-détection toutes les 10 fiches ouvertes
+            self.fetched_count += 1
+            if self.fetched_count % 10 == 0:
+                await self._random_delay(30, 60)
+            return data
+        
+        async def write(data: Dict) -> Optional[Dict]:
+            result = await self.save_company(data)
+            publish()
+            return result
+        
+        # Le pool a un onglet de plus que de workers: la recherche n'attend pas la fin des fiches
+        queue_size = settings.SCRAPING_QUEUE_SIZE
         async with self:
-            for i, dept in enumerate(departments):
-                status_tracker.message = f"Scraping Société.com - Département {dept}"
-                logger.info(status_tracker.message)
-                
-                page_num = 1
-                has_next = True
-                
-                while has_next and page_num <= 5:  # Limite pages
-                    companies, has_next = await self.search_companies(dept, page_num)
-                    
-                    for company in companies:
-                        await self.scrape_company_details(company)
-                        
-                        # Mettre à jour statut
-                        status_tracker.new_companies = self.new_companies_count
-                        status_tracker.skipped_companies = self.skipped_companies_count
-                        
-                        # Pause anti-détection
-                        if self.new_companies_count % 10 == 0:
-                            await self._random_delay(30, 60)
-                    
-                    page_num += 1
-                    status_tracker.progress = int((i + 1) / len(departments) * 100)
-                
-            status_tracker.message = f"Terminé: {self.new_companies_count} nouvelles entreprises"
-            status_tracker.progress = 100
\ No newline at end of file
+            pipeline = Pipeline(self.discover_companies(status_tracker, self.DEPARTEMENTS), [
+                Stage('fetch', fetch, settings.SOCIETE_DETAIL_CONCURRENCY, queue_size),
+                Stage('write', write, 1, queue_size),
+            ])
+            stats = await pipeline.run()
+            logger.info(f"Pipeline Société.com: {stats}")
+            publish()
+            
+            if not status_tracker.error:
+                status_tracker.message = f"Terminé: {self.new_companies_count} nouvelles entreprises"
+                status_tracker.progress = 100
@@ -0,0 +1,98 @@
+"""Point d'entrée production: plusieurs workers uvicorn configurés par `Settings`
+
+Usage (depuis backend/): python -m app.server
+"""
+import logging
+import os
+import sys
+import time
+from uvicorn import Config, Server as UvicornServer
+from uvicorn.supervisors import ChangeReload, Multiprocess
+from uvicorn.supervisors.multiprocess import get_subprocess
+from app.config import settings
+from app.core.lifecycle import request_shutdown
+
+logger = logging.getLogger("uvicorn.error")
+
+def worker_count() -> int:
+    """SERVER_WORKERS, ou un worker par cœur disponible (cgroups/affinité compris)"""
+    if settings.SERVER_WORKERS > 0:
+        return settings.SERVER_WORKERS
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def build_config() -> Config:
+    reload = settings.SERVER_RELOAD
+    return Config(
+        "app.main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=1 if reload else worker_count(),
+        reload=reload,
+        log_level=settings.LOG_LEVEL.lower(),
+        proxy_headers=True,
+        forwarded_allow_ips=settings.SERVER_FORWARDED_ALLOW_IPS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+    )
+
+class Server(UvicornServer):
+    """Serveur uvicorn qui signale l'arrêt à l'application dès la réception du signal
+
+    Les flux SSE se terminent alors immédiatement; les tâches de fond (scrapers)
+    ont `SERVER_GRACEFUL_TIMEOUT` secondes pour finir avant d'être annulées, puis
+    le `lifespan` vide la file des logs d'activité.
+    """
+    
+    def handle_exit(self, sig, frame):
+        request_shutdown()
+        super().handle_exit(sig, frame)
+
+# Au-delà du délai de grâce: écriture des logs d'activité en attente dans le `lifespan`
+SHUTDOWN_MARGIN_SECONDS = 10
+
+class Supervisor(Multiprocess):
+    """Superviseur multi-workers qui relance les workers morts"""
+    
+    def shutdown(self):
+        # Tous les workers reçoivent SIGTERM ensemble et vident leurs tâches en parallèle
+        # (uvicorn les arrête un par un: N × SERVER_GRACEFUL_TIMEOUT)
+        for process in self.processes:
+            process.terminate()
+        deadline = time.monotonic() + settings.SERVER_GRACEFUL_TIMEOUT + SHUTDOWN_MARGIN_SECONDS
+        for process in self.processes:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning(f"Worker {process.pid} still running after the graceful timeout, killing it")
+                process.kill()
+                process.join()
+        logger.info(f"Stopping parent process [{self.pid}]")
+    
+    def run(self):
+        self.startup()
+        while not self.should_exit.wait(1.0):
+            for i, process in enumerate(self.processes):
+                if process.is_alive():
+                    continue
+                logger.warning(f"Worker {process.pid} exited with code {process.exitcode}, restarting")
+                process = get_subprocess(config=self.config, target=self.target, sockets=self.sockets)
+                process.start()
+                self.processes[i] = process
+        self.shutdown()
+
+def main():
+    config = build_config()
+    server = Server(config=config)
+    
+    if config.should_reload:
+        ChangeReload(config, target=server.run, sockets=[config.bind_socket()]).run()
+    elif config.workers > 1:
+        logger.info(f"Starting {config.workers} workers")
+        Supervisor(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
+        if not server.started:
+            sys.exit(3)
+
+if __name__ == "__main__":
+    main()
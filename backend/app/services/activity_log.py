@@ -0,0 +1,143 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from app.config import settings
+from app.core.database import get_db
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+class ActivityLogWriter:
+    """File d'attente des logs d'activité, écrits par lots en tâche de fond
+
+    Démarrée/arrêtée par le `lifespan` de l'application. Sans tâche de fond
+    (scripts, tests), les logs sont écrits directement.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        overflow: str = 'drop_oldest'
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.queue: Optional[asyncio.Queue] = None
+        self.dropped = 0
+        self.written = 0
+        self._batch: List[Dict] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arrête la tâche de fond et écrit tout ce qui reste en file"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        remaining, self._batch = self._batch, []
+        while not self.queue.empty():
+            remaining.append(self.queue.get_nowait())
+        for i in range(0, len(remaining), self.batch_size):
+            await self._flush(remaining[i:i + self.batch_size])
+
+    async def log(self, cabinet_id: Optional[int], action: str, details: Optional[Dict] = None, user_info: str = 'API User'):
+        """Enregistre un événement (non bloquant sauf politique `block`)"""
+        event = {
+            'cabinet_id': cabinet_id,
+            'action': action,
+            'details': details or {},
+            'user_info': user_info
+        }
+
+        if not self.running:
+            await self._flush([event])
+            return
+
+        if self.overflow == 'block':
+            await self.queue.put(event)
+            return
+
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.overflow == 'drop_oldest':
+                self.queue.get_nowait()
+                self.queue.put_nowait(event)
+            if self.dropped % 100 == 1:
+                logger.warning(f"Activity log queue full ({self.overflow}): {self.dropped} events dropped")
+
+    async def log_many(self, events: List[Dict]):
+        """Enregistre plusieurs événements (imports, scrapers)"""
+        for event in events:
+            await self.log(**event)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._batch.append(await self.queue.get())
+            deadline = loop.time() + self.flush_interval
+            while len(self._batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0 or not await self._get_until(timeout):
+                    break
+
+            batch, self._batch = self._batch, []
+            await self._flush(batch)
+
+    async def _get_until(self, timeout: float) -> bool:
+        """Ajoute le prochain événement au lot; False si rien n'arrive avant `timeout`
+
+        Pas de `asyncio.wait_for`: en 3.11 il avale l'annulation quand `get()` se
+        termine au même instant, et `stop()` attendrait alors indéfiniment.
+        """
+        getter = asyncio.ensure_future(self.queue.get())
+        try:
+            done, _ = await asyncio.wait({getter}, timeout=timeout)
+        finally:
+            if not getter.done():
+                getter.cancel()
+            elif not getter.cancelled():
+                self._batch.append(getter.result())
+        return bool(done)
+
+    async def _flush(self, batch: List[Dict]):
+        if not batch:
+            return
+        try:
+            await asyncio.to_thread(self._write, batch)
+            self.written += len(batch)
+        except Exception as e:
+            logger.error(f"Error writing {len(batch)} activity logs: {e}")
+
+    @staticmethod
+    def _write(batch: List[Dict]):
+        get_db().table('activity_logs').insert(batch).execute()
+
+activity_log = ActivityLogWriter(
+    max_queue=settings.ACTIVITY_LOG_QUEUE_SIZE,
+    batch_size=settings.ACTIVITY_LOG_BATCH_SIZE,
+    flush_interval=settings.ACTIVITY_LOG_FLUSH_INTERVAL,
+    overflow=settings.ACTIVITY_LOG_OVERFLOW
+)
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import re
+from typing import Dict, List, Optional
+from app.core.cache import invalidate_cache
+
+logger = logging.getLogger(__name__)
+
+# "..., 75008 PARIS" ou "12 rue X 92100 Boulogne-Billancourt"
+POSTAL_CITY_PATTERN = re.compile(r'\b(\d{5})\s+([^\d,][^,]*?)\s*$')
+POSTAL_CODE_PATTERN = re.compile(r'\b(\d{5})\b')
+CEDEX_PATTERN = re.compile(r'\s+CEDEX(\s+\d+)?$', re.IGNORECASE)
+
+def normalize_city(ville: Optional[str]) -> Optional[str]:
+    """Forme canonique d'une ville: majuscules, sans CEDEX, espaces normalisés"""
+    if not ville or str(ville).strip() in ('', 'nan'):
+        return None
+    ville = ' '.join(str(ville).split()).upper()
+    ville = CEDEX_PATTERN.sub('', ville)
+    return ville or None
+
+def parse_address(adresse: Optional[str]) -> Dict[str, Optional[str]]:
+    """Extrait code postal et ville d'une adresse libre"""
+    result = {'code_postal': None, 'ville': None}
+    if not adresse:
+        return result
+
+    last_part = str(adresse).split(',')[-1].strip()
+    match = POSTAL_CITY_PATTERN.search(last_part) or POSTAL_CITY_PATTERN.search(str(adresse))
+    if match:
+        result['code_postal'] = match.group(1)
+        result['ville'] = normalize_city(match.group(2))
+        return result
+
+    match = POSTAL_CODE_PATTERN.search(str(adresse))
+    if match:
+        result['code_postal'] = match.group(1)
+    return result
+
+def location_fields(data: Dict) -> Dict[str, Optional[str]]:
+    """Champs `code_postal`/`ville` à écrire: valeurs explicites, sinon extraites de l'adresse"""
+    parsed = parse_address(data.get('adresse'))
+    code_postal = str(data['code_postal']).strip()[:5] if data.get('code_postal') else None
+    return {
+        'code_postal': code_postal or parsed['code_postal'],
+        'ville': normalize_city(data.get('ville')) or parsed['ville'],
+    }
+
+async def backfill_locations(db_client, batch_size: int = 500) -> int:
+    """Renseigne code_postal/ville pour les entreprises existantes à partir de leur adresse"""
+    updated = 0
+    last_id = 0
+    while True:
+        response = (
+            db_client.table('cabinets_comptables')
+            .select('id, adresse')
+            .is_('ville', 'null')
+            .gt('id', last_id)
+            .order('id')
+            .limit(batch_size)
+            .execute()
+        )
+        rows = response.data
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+
+        # Une requête par couple (code postal, ville): souvent quelques villes par lot
+        groups: Dict[tuple, List[int]] = {}
+        for row in rows:
+            location = parse_address(row.get('adresse'))
+            if location['ville'] or location['code_postal']:
+                groups.setdefault((location['code_postal'], location['ville']), []).append(row['id'])
+        for (code_postal, ville), ids in groups.items():
+            (
+                db_client.table('cabinets_comptables')
+                .update({'code_postal': code_postal, 'ville': ville})
+                .in_('id', ids)
+                .execute()
+            )
+            updated += len(ids)
+        if groups:
+            invalidate_cache()
+        logger.info(f"Backfill localisation: {updated} entreprises mises à jour (id <= {last_id})")
+
+    return updated
+
+if __name__ == '__main__':
+    from app.core.database import get_db, init_db
+
+    async def main():
+        await init_db()
+        count = await backfill_locations(get_db())
+        print(f"{count} entreprises mises à jour")
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -4,6 +4,9 @@ import logging
 from typing import Dict, List
 from datetime import datetime
 from fastapi import UploadFile
+from app.services.address import location_fields
+from app.core.cache import invalidate_cache
+from app.services.activity_log import activity_log
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +24,10 @@ COLUMN_MAPPING = {
     'date_de_creation': 'date_creation',
     'adresse': 'adresse',
     'adresse_complete': 'adresse',
+    'code_postal': 'code_postal',
+    'cp': 'code_postal',
+    'ville': 'ville',
+    'commune': 'ville',
     'email': 'email',
     'mail': 'email',
     'telephone': 'telephone',
@@ -118,9 +125,18 @@ async def process_csv_file(file: UploadFile, db_client, update_existing: bool =
             for i in range(0, len(companies_to_insert), 50):
                 batch = companies_to_insert[i:i+50]
                 try:
-                    db_client.table('cabinets_comptables').insert(batch).execute()
+                    response = db_client.table('cabinets_comptables').insert(batch).execute()
                     inserted_count += len(batch)
                     logger.info(f"Batch {i//50 + 1} inséré: {len(batch)} entreprises")
+                    await activity_log.log_many([
+                        {
+                            'cabinet_id': company['id'],
+                            'action': 'import',
+                            'details': {'filename': file.filename},
+                            'user_info': 'CSV Import'
+                        }
+                        for company in response.data
+                    ])
                 except Exception as e:
                     logger.error(f"Erreur insertion batch: {e}")
         
@@ -131,11 +147,21 @@ async def process_csv_file(file: UploadFile, db_client, update_existing: bool =
                 try:
                     siren = company['siren']
                     update_data = {k: v for k, v in company.items() if k != 'siren'}
-                    db_client.table('cabinets_comptables').update(update_data).eq('siren', siren).execute()
+                    response = db_client.table('cabinets_comptables').update(update_data).eq('siren', siren).execute()
                     updated_count += 1
+                    if response.data:
+                        await activity_log.log(
+                            response.data[0]['id'],
+                            'import_update',
+                            {'filename': file.filename, 'fields_updated': list(update_data.keys())},
+                            'CSV Import'
+                        )
                 except Exception as e:
                     logger.error(f"Erreur mise à jour SIREN {siren}: {e}")
         
+        if inserted_count or updated_count:
+            invalidate_cache()
+        
         # Compter le total
         total_response = db_client.table('cabinets_comptables').select('id', count='exact').execute()
         
@@ -168,6 +194,14 @@ def clean_company_data(data: Dict) -> Dict:
         if pd.notna(value) and str(value).strip() and str(value) != 'nan':
             cleaned[field] = str(value).strip()
     
+    # Localisation (colonnes dédiées ou extraite de l'adresse)
+    raw_location = {k: data.get(k) for k in ('adresse', 'code_postal', 'ville') if pd.notna(data.get(k))}
+    if 'code_postal' in raw_location:
+        raw_location['code_postal'] = str(raw_location['code_postal']).split('.')[0].zfill(5)
+    for field, value in location_fields(raw_location).items():
+        if value:
+            cleaned[field] = value
+    
     # Champs numériques
     numeric_fields = [
         'chiffre_affaires', 'resultat', 'effectif', 'capital_social'
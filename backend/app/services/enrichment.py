@@ -1,23 +1,41 @@
 import asyncio
+import json
 import logging
-from typing import List, Dict, Optional
+from typing import Awaitable, Callable, List, Dict, Optional, Tuple
 import openai
 from datetime import datetime
+from app.core.cache import invalidate_cache
 
 logger = logging.getLogger(__name__)
 
 class EnrichmentService:
     """Service d'enrichissement des données entreprises"""
     
-    def __init__(self, db_client, openai_api_key: Optional[str] = None):
+    # Champs du registre recopiés dans la table si présents
+    REGISTRY_FIELDS = ['chiffre_affaires', 'resultat', 'effectif']
+    
+    def __init__(self, db_client, openai_api_key: Optional[str] = None, concurrency: int = 5, batch_size: int = 50):
         self.db = db_client
+        self.concurrency = concurrency
+        self.batch_size = batch_size
         self.openai_client = None
         if openai_api_key:
             openai.api_key = openai_api_key
             self.openai_client = openai
     
-    async def enrich_companies(self, min_ca: int = 10000000, min_score: int = 70, siren: Optional[str] = None):
-        """Enrichit les entreprises avec scoring IA et autres données"""
+    async def enrich_companies(
+        self,
+        min_ca: int = 10000000,
+        min_score: int = 70,
+        siren: Optional[str] = None,
+        lookup: Optional[Callable[[Dict], Awaitable[Dict]]] = None,
+        status_tracker=None
+    ):
+        """Enrichit les entreprises avec scoring IA et autres données
+        
+        `lookup` est une étape optionnelle (ex: registre Infogreffe) appelée pour chaque
+        entreprise avant le scoring; elle retourne les champs à fusionner.
+        """
         try:
             # Construire la requête
             query = self.db.table('cabinets_comptables').select('*')
@@ -36,39 +54,55 @@ class EnrichmentService:
             
             logger.info(f"Enrichissement de {len(companies)} entreprises")
             
-            enriched_count = 0
+            counters = {'processed': 0, 'enriched': 0, 'registry_matches': 0, 'registry_errors': 0, 'write_errors': 0}
+            pending: List[Dict] = []
+            queue: asyncio.Queue = asyncio.Queue()
             for company in companies:
-                try:
-                    # Calculer le score de prospection
-                    if not company.get('score_prospection') or siren:
-                        score_data = await self.calculate_prospection_score(company)
-                        
-                        update_data = {
-                            'score_prospection': score_data['score_global'],
-                            'score_details': score_data
-                        }
-                        
-                        self.db.table('cabinets_comptables').update(update_data).eq('id', company['id']).execute()
-                        enriched_count += 1
-                        
-                        logger.info(f"Score calculé pour {company['nom_entreprise']}: {score_data['score_global']:.1f}")
+                queue.put_nowait(company)
+            
+            async def worker():
+                while True:
+                    try:
+                        company = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    try:
+                        try:
+                            registry_data = await lookup(company) if lookup else None
+                        except Exception as e:
+                            # Registre indisponible: l'entreprise est laissée telle quelle, pas re-scorée
+                            logger.error(f"Erreur registre SIREN {company.get('siren')}: {e}")
+                            counters['registry_errors'] += 1
+                        else:
+                            update_data = await self._enrich_company(company, registry_data, force_score=bool(siren))
+                            if registry_data:
+                                counters['registry_matches'] += 1
+                            if update_data:
+                                pending.append({'id': company['id'], **update_data})
+                                counters['enriched'] += 1
+                    except Exception as e:
+                        logger.error(f"Erreur enrichissement {company.get('nom_entreprise')}: {e}")
+                    finally:
+                        counters['processed'] += 1
                     
-                    # TODO: Ajouter d'autres enrichissements
-                    # - Recherche email/téléphone dirigeant
-                    # - Vérification LinkedIn
-                    # - Analyse comptes annuels
+                    if len(pending) >= self.batch_size:
+                        self._flush_updates(pending, counters)
                     
-                    # Pause pour éviter surcharge API
-                    if enriched_count % 10 == 0:
-                        await asyncio.sleep(1)
-                        
-                except Exception as e:
-                    logger.error(f"Erreur enrichissement {company.get('nom_entreprise')}: {e}")
-                    continue
+                    if status_tracker is not None:
+                        status_tracker.progress = int(counters['processed'] / len(companies) * 100)
+                        status_tracker.new_companies = counters['enriched']
+                        status_tracker.skipped_companies = counters['processed'] - counters['enriched']
+                        status_tracker.message = f"Enrichissement {counters['processed']}/{len(companies)}"
+            
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(companies)) or 1)))
+            self._flush_updates(pending, counters)
             
             return {
                 'success': True,
-                'enriched_count': enriched_count,
+                'enriched_count': counters['enriched'],
+                'registry_matches': counters['registry_matches'],
+                'registry_errors': counters['registry_errors'],
+                'write_errors': counters['write_errors'],
                 'total_processed': len(companies)
             }
             
@@ -76,6 +110,57 @@ class EnrichmentService:
             logger.error(f"Erreur enrichissement global: {e}")
             raise
     
+    async def _enrich_company(self, company: Dict, registry_data: Optional[Dict], force_score: bool = False) -> Dict:
+        """Calcule les champs à mettre à jour pour une entreprise"""
+        update_data = {}
+        
+        if registry_data:
+            for field in self.REGISTRY_FIELDS:
+                if registry_data.get(field) is not None and registry_data[field] != company.get(field):
+                    update_data[field] = registry_data[field]
+            details = dict(company.get('details_complets') or {})
+            details[registry_data.get('source', 'registre')] = registry_data
+            update_data['details_complets'] = details
+        
+        # Calculer le score de prospection
+        financials_changed = any(field in update_data for field in self.REGISTRY_FIELDS)
+        if force_score or financials_changed or not company.get('score_prospection'):
+            score_data = await self.calculate_prospection_score({**company, **(registry_data or {}), **update_data})
+            update_data['score_prospection'] = score_data['score_global']
+            update_data['score_details'] = score_data
+            logger.info(f"Score calculé pour {company['nom_entreprise']}: {score_data['score_global']:.1f}")
+        
+        # TODO: Ajouter d'autres enrichissements
+        # - Recherche email/téléphone dirigeant
+        # - Vérification LinkedIn
+        
+        return update_data
+    
+    def _flush_updates(self, pending: List[Dict], counters: Dict[str, int]):
+        """Écrit les mises à jour en attente, une requête par contenu identique
+
+        Les lignes en échec sont retirées de `enriched` et comptées dans `write_errors`.
+        """
+        if not pending:
+            return
+        batch = pending[:]
+        pending.clear()
+        
+        groups: Dict[str, Tuple[Dict, List]] = {}
+        for row in batch:
+            payload = {key: value for key, value in row.items() if key != 'id'}
+            key = json.dumps(payload, sort_keys=True, default=str)
+            groups.setdefault(key, (payload, []))[1].append(row['id'])
+        
+        for payload, ids in groups.values():
+            try:
+                self.db.table('cabinets_comptables').update(payload).in_('id', ids).execute()
+            except Exception as e:
+                logger.error(f"Erreur écriture batch enrichissement ({len(ids)} lignes): {e}")
+                counters['enriched'] -= len(ids)
+                counters['write_errors'] += len(ids)
+        invalidate_cache()
+    
     async def calculate_prospection_score(self, company: Dict) -> Dict:
         """Calcule le score de prospection avec IA"""
         
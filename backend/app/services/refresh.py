@@ -0,0 +1,248 @@
+"""Rafraîchissement des fiches existantes, les plus prioritaires d'abord
+
+Les scrapers n'insèrent que de nouveaux SIREN: sans ce service, les données
+financières d'une fiche ne bougent plus après son import. La priorité d'une
+fiche croît avec l'ancienneté de `last_scraped_at`, pondérée par le score de
+prospection et l'étape du pipeline (`statut`); une fiche est due quand sa
+priorité atteint 1 (âge >= REFRESH_INTERVAL_DAYS pour une fiche de poids 1).
+
+Usage (cron, depuis backend/): python -m app.services.refresh [--limit 200] [--dry-run]
+"""
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from app.config import settings
+from app.core.cache import invalidate_cache
+from app.services.activity_log import activity_log
+
+logger = logging.getLogger(__name__)
+
+# Poids par étape du pipeline: une négociation en cours mérite des chiffres frais
+STATUT_WEIGHTS = {
+    'en négociation': 3.0,
+    'en discussion': 2.0,
+    'à contacter': 1.0,
+    'deal signé': 0.5,
+    'abandonné': 0.2,
+}
+
+# Champs réécrits par un rafraîchissement; jamais statut, email ni téléphone (saisis par l'équipe)
+REFRESH_FIELDS = (
+    'nom_entreprise', 'forme_juridique', 'adresse', 'code_postal', 'ville', 'numero_tva',
+    'chiffre_affaires', 'resultat', 'effectif', 'capital_social', 'code_naf', 'libelle_code_naf',
+    'dirigeant_principal',
+)
+
+PLAN_COLUMNS = 'id, siren, last_scraped_at, score_prospection, statut, ' + ', '.join(REFRESH_FIELDS)
+
+# Score de prospection sur 100: borne le poids d'une fiche, donc l'âge minimal d'une fiche due
+SCORE_MAX = 100
+MAX_WEIGHT = max(STATUT_WEIGHTS.values()) * (1 + SCORE_MAX / 100)
+# Fiches lues par requête (sous le max-rows de PostgREST)
+PLAN_PAGE_SIZE = 500
+
+def _age_days(last_scraped_at: Optional[str], now: datetime) -> Optional[float]:
+    if not last_scraped_at:
+        return None
+    try:
+        scraped = datetime.fromisoformat(str(last_scraped_at).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if scraped.tzinfo is not None:
+        scraped = scraped.astimezone().replace(tzinfo=None)
+    return max((now - scraped).total_seconds() / 86400, 0.0)
+
+def refresh_priority(company: Dict, now: datetime, interval_days: float) -> float:
+    """Âge relatif à l'intervalle, pondéré; infini pour une fiche jamais scrapée"""
+    age = _age_days(company.get('last_scraped_at'), now)
+    if age is None:
+        return float('inf')
+    score = min(company.get('score_prospection') or 0, SCORE_MAX)
+    weight = STATUT_WEIGHTS.get(company.get('statut'), 1.0) * (1 + score / 100)
+    return age / interval_days * weight
+
+def changed_fields(current: Dict, fresh: Dict) -> Dict:
+    """Champs de REFRESH_FIELDS dont la valeur reçue (non vide) diffère de la base"""
+    return {
+        field: fresh[field]
+        for field in REFRESH_FIELDS
+        if fresh.get(field) not in (None, '') and fresh[field] != current.get(field)
+    }
+
+class RefreshScheduler:
+    """File de priorité des fiches dues, rafraîchies par lots à débit limité
+
+    `fetch(company)` retourne les champs à jour (format de la table) ou {} si la
+    source n'a rien renvoyé.
+    """
+
+    def __init__(
+        self,
+        db_client,
+        fetch: Callable[[Dict], Awaitable[Dict]],
+        interval_days: float = 90,
+        batch_size: int = 20,
+        concurrency: int = 3,
+        batch_pause: float = 2.0
+    ):
+        self.db = db_client
+        self.fetch = fetch
+        self.interval_days = interval_days
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.batch_pause = batch_pause
+
+    def plan(self, limit: Optional[int] = None, now: Optional[datetime] = None) -> List[Dict]:
+        """Fiches dues, de la plus prioritaire à la moins prioritaire
+
+        Seules les fiches assez anciennes pour être dues au poids maximal sont lues,
+        page par page des plus anciennes aux plus récentes; la lecture s'arrête dès
+        qu'aucune fiche restante ne peut entrer dans les `limit` premières.
+        """
+        now = now or datetime.now()
+        cutoff = (now - timedelta(days=self.interval_days / MAX_WEIGHT)).isoformat(timespec='seconds')
+        # Tas des fiches retenues: (priorité, -rang de lecture, fiche), la moins prioritaire en tête
+        top = []
+        read = 0
+        while True:
+            page = (
+                self.db.table('cabinets_comptables').select(PLAN_COLUMNS)
+                .or_(f'last_scraped_at.is.null,last_scraped_at.lt.{cutoff}')
+                .order('last_scraped_at', nullsfirst=True)
+                .order('id')
+                .range(read, read + PLAN_PAGE_SIZE - 1)
+                .execute().data
+            )
+            for company in page:
+                read += 1
+                priority = refresh_priority(company, now, self.interval_days)
+                if priority < 1:
+                    continue
+                item = (priority, -read, company)
+                if not limit or len(top) < limit:
+                    heapq.heappush(top, item)
+                elif item[:2] > top[0][:2]:
+                    heapq.heapreplace(top, item)
+            if len(page) < PLAN_PAGE_SIZE:
+                break
+            if limit and len(top) == limit:
+                # Fiches suivantes plus récentes: priorité au plus âge / intervalle × poids maximal
+                age = _age_days(page[-1].get('last_scraped_at'), now)
+                if age is not None and age / self.interval_days * MAX_WEIGHT < top[0][0]:
+                    break
+        ordered = sorted(top, key=lambda item: item[:2], reverse=True)
+        return [{**company, 'priority': priority} for priority, _, company in ordered]
+
+    async def run(self, limit: Optional[int] = None, status_tracker=None, metrics=None) -> Dict:
+        """Rafraîchit les fiches dues; `metrics` (ScraperMetrics) est publié dans le statut"""
+        queue = self.plan(limit)
+        counters = {'planned': len(queue), 'updated': 0, 'unchanged': 0, 'failed': 0}
+        logger.info(f"Rafraîchissement de {len(queue)} fiches")
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(company: Dict):
+            async with semaphore:
+                try:
+                    counters[await self._refresh_one(company)] += 1
+                except Exception as e:
+                    counters['failed'] += 1
+                    logger.error(f"Erreur rafraîchissement {company.get('siren')}: {e}")
+
+        for start in range(0, len(queue), self.batch_size):
+            batch = queue[start:start + self.batch_size]
+            updated_before = counters['updated']
+            await asyncio.gather(*(refresh(company) for company in batch))
+            if counters['updated'] > updated_before:
+                invalidate_cache()
+
+            done = start + len(batch)
+            if status_tracker is not None:
+                status_tracker.progress = int(done / len(queue) * 100)
+                status_tracker.new_companies = counters['updated']
+                status_tracker.skipped_companies = counters['unchanged']
+                status_tracker.message = f"Rafraîchissement {done}/{len(queue)}"
+                if metrics is not None:
+                    status_tracker.metrics = metrics.snapshot()
+            # Pause entre lots pour rester sous les limites de la source
+            if done < len(queue) and self.batch_pause:
+                await asyncio.sleep(self.batch_pause)
+
+        return counters
+
+    async def _refresh_one(self, company: Dict) -> str:
+        fresh = await self.fetch(company)
+        if not fresh:
+            return 'failed'
+        changes = changed_fields(company, fresh)
+        # last_scraped_at est toujours mis à jour: la fiche sort de la file même inchangée
+        self.db.table('cabinets_comptables').update(
+            {**changes, 'last_scraped_at': datetime.now().isoformat()}
+        ).eq('id', company['id']).execute()
+        if not changes:
+            return 'unchanged'
+        await activity_log.log(
+            company['id'], 'update', {'fields_updated': sorted(changes), 'source': 'refresh'}, 'Rafraîchissement'
+        )
+        return 'updated'
+
+def build_scheduler(db_client, fetch: Callable[[Dict], Awaitable[Dict]]) -> RefreshScheduler:
+    return RefreshScheduler(
+        db_client,
+        fetch,
+        interval_days=settings.REFRESH_INTERVAL_DAYS,
+        batch_size=settings.REFRESH_BATCH_SIZE,
+        concurrency=settings.REFRESH_CONCURRENCY,
+        batch_pause=settings.REFRESH_BATCH_PAUSE
+    )
+
+async def refresh_from_pappers(db_client, limit: Optional[int] = None, status_tracker=None) -> Dict:
+    """Rafraîchit les fiches dues depuis l'API Pappers (/entreprise)"""
+    import aiohttp
+    from app.scrapers.pappers import PappersAPIClient
+
+    client = PappersAPIClient(db_client)
+    # Une fiche du cache disque serait aussi ancienne que la base: on interroge l'API
+    client.detail_cache = None
+
+    async def fetch(company: Dict) -> Dict:
+        details = await client.get_company_details(company['siren'])
+        return client._format_company_data(details) if details else {}
+
+    client.session = aiohttp.ClientSession()
+    try:
+        return await build_scheduler(db_client, fetch).run(limit, status_tracker, client.metrics)
+    finally:
+        await client.session.close()
+
+if __name__ == '__main__':
+    import argparse
+    from app.core.database import get_db, init_db
+    from app.core.job_lock import get_job_locks
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--limit', type=int, default=settings.REFRESH_MAX_PER_RUN, help='fiches max par passage')
+    parser.add_argument('--dry-run', action='store_true', help='affiche la file sans appeler Pappers')
+    args = parser.parse_args()
+
+    async def main():
+        await init_db()
+        if args.dry_run:
+            for company in build_scheduler(get_db(), None).plan(args.limit):
+                print(f"{company['priority']:8.2f}  {company['siren']}  {company['statut'] or '':<16} {company['last_scraped_at'] or 'jamais'}")
+            return
+        # Même bail que POST /scraping/refresh: le cron ne double pas un passage lancé depuis l'API
+        lease = get_job_locks().try_acquire('refresh')
+        if lease is None:
+            print("Rafraîchissement déjà en cours sur un autre worker")
+            return
+        await activity_log.start()
+        try:
+            async with lease:
+                print(await refresh_from_pappers(get_db(), args.limit))
+        finally:
+            await activity_log.stop()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,139 @@
+import bisect
+import heapq
+import logging
+from typing import Dict, List, Set
+from app.core.database import unwrap_client
+from app.core.memory_db import MemoryClient
+from app.core.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Seuil de similarité des trigrammes (valeur par défaut de pg_trgm.word_similarity_threshold)
+SIMILARITY_THRESHOLD = 0.6
+
+def is_siren_query(query: str) -> bool:
+    """Une recherche composée uniquement de chiffres vise un SIREN"""
+    compact = query.replace(' ', '')
+    return bool(compact) and compact.isdigit()
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrammes au format pg_trgm (chaque mot complété par deux espaces devant, un derrière)"""
+    result = set()
+    for word in text.split():
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+def apply_search_filter(query, search: str):
+    """Ajoute un filtre de recherche indexable à une requête postgrest
+
+    SIREN: préfixe (index `text_pattern_ops`); nom: sous-chaîne sur `nom_recherche`
+    (colonne normalisée couverte par un index trigramme).
+    """
+    if is_siren_query(search):
+        return query.like('siren', f"{search.replace(' ', '')}%")
+    return query.ilike('nom_recherche', f"%{normalize_text(search)}%")
+
+class CompanySearchIndex:
+    """Index de recherche en mémoire (SIREN trié + index inversé de trigrammes)"""
+
+    # Nombre de candidats au-delà duquel on arrête d'ajouter des trigrammes fréquents
+    MAX_CANDIDATES = 2000
+
+    def __init__(self, rows: List[Dict]):
+        self.rows = rows
+        self.names = [normalize_text(row.get('nom_entreprise')) for row in rows]
+        self.trigrams = [trigrams(name) for name in self.names]
+        self.sizes = [len(grams) for grams in self.trigrams]
+        self.sirens = sorted((str(row.get('siren', '')), i) for i, row in enumerate(rows))
+        self.postings: Dict[str, List[int]] = {}
+        for i, grams in enumerate(self.trigrams):
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(i)
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        if is_siren_query(query):
+            return self._search_siren(query.replace(' ', ''), limit)
+        return self._search_name(normalize_text(query), limit)
+
+    def _search_siren(self, prefix: str, limit: int) -> List[Dict]:
+        start = bisect.bisect_left(self.sirens, (prefix, -1))
+        results = []
+        for siren, i in self.sirens[start:]:
+            if not siren.startswith(prefix) or len(results) >= limit:
+                break
+            results.append(self._result(i, 1.0))
+        return results
+
+    def _search_name(self, query: str, limit: int) -> List[Dict]:
+        if not query:
+            return []
+        query_grams = trigrams(query)
+
+        postings = sorted((self.postings.get(g, []) for g in query_grams), key=len)
+        if not postings[0]:
+            postings = [p for p in postings if p] or [[]]
+
+        if len(postings[0]) <= self.MAX_CANDIDATES:
+            # Candidats: lignes partageant un trigramme, en partant des plus rares
+            candidates: Set[int] = set()
+            for posting in postings:
+                if candidates and len(candidates) + len(posting) > self.MAX_CANDIDATES:
+                    break
+                candidates.update(posting)
+        else:
+            # Requête très fréquente: lignes contenant tous les trigrammes, tronquées
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates.intersection_update(posting)
+            candidates = set(sorted(candidates)[:self.MAX_CANDIDATES])
+
+        query_size = len(query_grams)
+        scored = []
+        for i in candidates:
+            shared = len(query_grams & self.trigrams[i])
+            word_similarity = shared / query_size
+            contains = query in self.names[i]
+            if not contains and word_similarity < SIMILARITY_THRESHOLD:
+                continue
+            similarity = shared / (query_size + self.sizes[i] - shared)
+            rank = word_similarity + similarity + (1.0 if contains else 0.0)
+            scored.append((rank, i))
+
+        best = heapq.nlargest(limit, scored, key=lambda item: (item[0], -len(self.names[item[1]])))
+        return [self._result(i, rank) for rank, i in best]
+
+    def _result(self, i: int, rank: float) -> Dict:
+        row = self.rows[i]
+        return {
+            'id': row.get('id'),
+            'siren': row.get('siren'),
+            'nom_entreprise': row.get('nom_entreprise'),
+            'adresse': row.get('adresse'),
+            'statut': row.get('statut'),
+            'rank': round(rank, 4)
+        }
+
+# Index en mémoire par client, reconstruit quand la table a été modifiée
+_memory_indexes: Dict[int, tuple] = {}
+
+def _get_memory_index(db: MemoryClient) -> CompanySearchIndex:
+    version = db.versions.get('cabinets_comptables', 0)
+    cached = _memory_indexes.get(id(db))
+    if cached and cached[0] == version:
+        return cached[1]
+    rows = db.table('cabinets_comptables').select('id, siren, nom_entreprise, adresse, statut').execute().data
+    index = CompanySearchIndex(rows)
+    _memory_indexes[id(db)] = (version, index)
+    logger.info(f"Index de recherche reconstruit: {len(rows)} entreprises")
+    return index
+
+def search_companies(db, query: str, limit: int = 10) -> List[Dict]:
+    """Recherche classée par SIREN (préfixe) ou nom (plein texte + trigrammes)"""
+    query = (query or '').strip()
+    if not query:
+        return []
+    if isinstance(unwrap_client(db), MemoryClient):
+        return _get_memory_index(unwrap_client(db)).search(query, limit)
+    response = db.rpc('search_companies', {'query': query, 'max_results': limit}).execute()
+    return response.data or []
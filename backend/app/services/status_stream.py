@@ -0,0 +1,44 @@
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict
+
+def status_delta(previous: Dict, current: Dict) -> Dict:
+    """Champs modifiés par source depuis le dernier envoi"""
+    delta = {}
+    for source, fields in current.items():
+        before = previous.get(source, {})
+        changed = {k: v for k, v in fields.items() if before.get(k) != v}
+        if changed:
+            delta[source] = changed
+    return delta
+
+def format_event(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def status_events(
+    get_statuses: Callable[[], Dict],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    interval: float = 0.5,
+    heartbeat: float = 15.0
+) -> AsyncIterator[str]:
+    """Flux SSE: un snapshot initial puis les deltas, au plus un événement par `interval`
+
+    Les scrapers modifient leur ScrapingStatus à chaque entreprise; l'échantillonnage
+    regroupe ces rafales en un seul delta par intervalle et par client.
+    """
+    last = get_statuses()
+    yield format_event('snapshot', last)
+    last_sent = time.monotonic()
+
+    while not await is_disconnected():
+        await asyncio.sleep(interval)
+        current = get_statuses()
+        delta = status_delta(last, current)
+        if delta:
+            last = current
+            last_sent = time.monotonic()
+            yield format_event('progress', delta)
+        elif time.monotonic() - last_sent >= heartbeat:
+            last_sent = time.monotonic()
+            yield ": keep-alive\n\n"
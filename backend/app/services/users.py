@@ -0,0 +1,98 @@
+import asyncio
+import getpass
+import logging
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+from app.config import settings
+from app.core.database import get_db
+from app.core.security import get_password_hash
+
+logger = logging.getLogger(__name__)
+
+USER_COLUMNS = 'id, username, hashed_password, is_active'
+
+class UserStore:
+    """Accès à la table `users` avec cache LRU en mémoire du processus
+
+    Les comptes existants sont gardés `ttl` secondes, au plus `max_entries`; les
+    noms inconnus ne sont pas mis en cache (des connexions avec des noms
+    aléatoires ne font pas grossir le processus). Toute modification passant par
+    le store invalide l'entrée concernée.
+    """
+    
+    def __init__(self, ttl: int = 30, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+    
+    def get(self, username: str) -> Optional[Dict]:
+        entry = self._entries.get(username)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(username)
+                return entry[1]
+            del self._entries[username]
+        
+        response = get_db().table('users').select(USER_COLUMNS).eq('username', username).execute()
+        user = response.data[0] if response.data else None
+        if user is not None and self.ttl and self.max_entries:
+            self._entries[username] = (time.monotonic() + self.ttl, user)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return user
+    
+    def invalidate(self, username: Optional[str] = None):
+        """Oublie un compte (ou tout le cache si `username` est None)"""
+        if username is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(username, None)
+    
+    def create(self, username: str, password: str, is_active: bool = True) -> Dict:
+        data = {
+            'username': username,
+            'hashed_password': get_password_hash(password),
+            'is_active': is_active
+        }
+        response = get_db().table('users').insert(data).execute()
+        self.invalidate(username)
+        return response.data[0]
+    
+    def update(self, username: str, password: Optional[str] = None, is_active: Optional[bool] = None) -> Optional[Dict]:
+        data = {'updated_at': datetime.now().isoformat()}
+        if password is not None:
+            data['hashed_password'] = get_password_hash(password)
+        if is_active is not None:
+            data['is_active'] = is_active
+        response = get_db().table('users').update(data).eq('username', username).execute()
+        self.invalidate(username)
+        return response.data[0] if response.data else None
+
+user_store = UserStore(settings.USER_CACHE_TTL_SECONDS, settings.USER_CACHE_MAX_ENTRIES)
+
+if __name__ == '__main__':
+    from app.core.database import init_db
+
+    USAGE = "Usage: python -m app.services.users (create|password|disable|enable) <username>"
+
+    async def main(command: str, username: str):
+        await init_db()
+        if command == 'create':
+            user_store.create(username, getpass.getpass("Mot de passe: "))
+        elif command == 'password':
+            user = user_store.update(username, password=getpass.getpass("Nouveau mot de passe: "))
+        elif command in ('disable', 'enable'):
+            user = user_store.update(username, is_active=command == 'enable')
+        else:
+            sys.exit(USAGE)
+        if command != 'create' and user is None:
+            sys.exit(f"Utilisateur inconnu: {username}")
+        print(f"Utilisateur {username}: {command} OK")
+
+    if len(sys.argv) != 3:
+        sys.exit(USAGE)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(sys.argv[1], sys.argv[2]))
@@ -0,0 +1,292 @@
+"""Test de charge des routes de lecture (/companies, /stats) sur une base peuplée de cabinets synthétiques
+
+Peuple la base configurée (par défaut la base en mémoire) puis envoie un trafic
+mixte: liste paginée, filtres, fiche par SIREN, statistiques et villes. Rapporte
+p50/p95/p99 par route et le débit global. Par défaut l'application tourne dans
+le processus (httpx + ASGI) et le cache de réponses est contourné, pour mesurer
+les chemins de lecture eux-mêmes.
+
+Usage (depuis backend/):
+    python -m benchmarks.bench_api [--companies 100000] [--requests 1000] [--concurrency 10]
+        [--cache] [--save baseline.json] [--compare baseline.json] [--tolerance 20] [--max-p95-ms 500]
+
+Contre un serveur lancé à part (`python -m app.server`), avec une base partagée
+(DATABASE_BACKEND=supabase sur un Postgres local) ou déjà peuplée:
+    python -m benchmarks.bench_api --url http://127.0.0.1:8000 [--no-seed]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+os.environ.setdefault("DATABASE_BACKEND", "memory")
+
+import httpx
+
+from app.config import settings
+from app.core.database import get_db, init_db, unwrap_client
+from app.core.memory_db import MemoryClient
+from app.models.schemas import StatusEnum
+
+API = settings.API_V1_STR
+
+# Part de chaque route dans le trafic (proche de l'usage du tableau de bord)
+TRAFFIC_MIX = {
+    "companies_list": 0.30,
+    "companies_filter": 0.20,
+    "company_detail": 0.35,
+    "stats": 0.05,
+    "stats_cities": 0.10,
+}
+
+VILLES = [
+    ("75001", "Paris"), ("75008", "Paris"), ("75015", "Paris"), ("77000", "Melun"), ("77100", "Meaux"),
+    ("78000", "Versailles"), ("78100", "Saint-Germain-en-Laye"), ("91000", "Évry-Courcouronnes"),
+    ("91300", "Massy"), ("92100", "Boulogne-Billancourt"), ("92200", "Neuilly-sur-Seine"),
+    ("92400", "Courbevoie"), ("93100", "Montreuil"), ("93200", "Saint-Denis"), ("94000", "Créteil"),
+    ("94300", "Vincennes"), ("95000", "Cergy"), ("95100", "Argenteuil"),
+]
+STATUTS = [s.value for s in StatusEnum]
+STATUT_WEIGHTS = [0.7, 0.12, 0.08, 0.04, 0.06]
+
+SEED_BATCH_SIZE = 1000
+
+def synthetic_company(index: int, rng: random.Random) -> Dict:
+    """Cabinet synthétique; SIREN dérivé de l'index (unique)"""
+    siren = f"{900000000 + index}"
+    code_postal, ville = rng.choice(VILLES)
+    ca = rng.randint(500_000, 60_000_000)
+    return {
+        "siren": siren,
+        "nom_entreprise": f"Cabinet {rng.choice(['Audit', 'Conseil', 'Expertise', 'Fiduciaire'])} {index}",
+        "forme_juridique": rng.choice(["SAS", "SARL", "SA"]),
+        "date_creation": f"{rng.randint(1970, 2020)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00",
+        "adresse": f"{rng.randint(1, 200)} rue de la Comptabilité {code_postal} {ville}",
+        "code_postal": code_postal,
+        "ville": ville,
+        "email": f"contact{index}@cabinet.example" if rng.random() < 0.6 else None,
+        "telephone": f"01{rng.randint(10000000, 99999999)}" if rng.random() < 0.7 else None,
+        "chiffre_affaires": ca,
+        "resultat": int(ca * rng.uniform(-0.05, 0.15)),
+        "effectif": rng.randint(5, 300),
+        "capital_social": rng.choice([1000, 10000, 50000, 100000]),
+        "code_naf": "69.20Z",
+        "libelle_code_naf": "Activités comptables",
+        "statut": rng.choices(STATUTS, STATUT_WEIGHTS)[0],
+        "score_prospection": round(rng.uniform(0, 100), 1),
+    }
+
+def seed_companies(db, count: int, seed: int = 42) -> List[str]:
+    """Insère `count` cabinets par lots; la base en mémoire est remise à zéro avant"""
+    if isinstance(unwrap_client(db), MemoryClient):
+        unwrap_client(db).reset()
+    rng = random.Random(seed)
+    sirens = []
+    for start in range(0, count, SEED_BATCH_SIZE):
+        rows = [synthetic_company(i, rng) for i in range(start, min(start + SEED_BATCH_SIZE, count))]
+        db.table("cabinets_comptables").insert(rows).execute()
+        sirens.extend(row["siren"] for row in rows)
+    return sirens
+
+def build_requests(count: int, sirens: List[str], companies: int, seed: int = 42) -> List[tuple]:
+    """Séquence déterministe de (route, méthode, chemin, corps JSON)"""
+    rng = random.Random(seed)
+    names = list(TRAFFIC_MIX)
+    weights = [TRAFFIC_MIX[name] for name in names]
+    requests = []
+    for name in rng.choices(names, weights, k=count):
+        if name == "companies_list":
+            skip = rng.randrange(0, max(companies, 1), 100)
+            requests.append((name, "GET", f"{API}/companies/?skip={skip}&limit=100", None))
+        elif name == "companies_filter":
+            filters = rng.choice([
+                {"ville": rng.choice(VILLES)[1], "ca_min": rng.choice([10_000_000, 30_000_000, 50_000_000])},
+                {"ville": rng.choice(VILLES)[1], "statut": rng.choice(STATUTS[1:])},
+                {"ca_min": 55_000_000, "effectif_min": 250},
+            ])
+            requests.append((name, "POST", f"{API}/companies/filter", filters))
+        elif name == "company_detail":
+            requests.append((name, "GET", f"{API}/companies/{rng.choice(sirens)}", None))
+        elif name == "stats":
+            requests.append((name, "GET", f"{API}/stats/", None))
+        else:
+            requests.append((name, "GET", f"{API}/stats/cities", None))
+    return requests
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentile au rang le plus proche (valeurs triées)"""
+    if not values:
+        return 0.0
+    rank = max(int(round(q / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+async def drive(client: httpx.AsyncClient, requests: List[tuple], concurrency: int) -> Dict[str, Dict]:
+    """Envoie les requêtes avec `concurrency` clients simultanés; latences par route"""
+    results = {name: {"latencies": [], "errors": 0} for name in TRAFFIC_MIX}
+    queue = iter(requests)
+
+    async def worker():
+        for name, method, path, body in queue:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            results[name]["latencies"].append(time.perf_counter() - start)
+            if failed:
+                results[name]["errors"] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+async def sample_sirens(client: httpx.AsyncClient, limit: int = 1000) -> List[str]:
+    """SIREN d'une base déjà peuplée (--no-seed), lus via l'API"""
+    response = await client.get(f"{API}/companies/", params={"limit": limit})
+    response.raise_for_status()
+    return [company["siren"] for company in response.json()]
+
+async def run_benchmark(
+    companies: int = 100_000,
+    requests: int = 1000,
+    concurrency: int = 10,
+    url: Optional[str] = None,
+    cache: bool = False,
+    seed_db: bool = True,
+    seed: int = 42
+) -> Dict:
+    """Peuple la base puis envoie le trafic; retourne les mesures (sérialisables en JSON)"""
+    seed_seconds = 0.0
+    sirens: List[str] = []
+    if seed_db:
+        try:
+            db = get_db()
+        except RuntimeError:
+            await init_db()
+            db = get_db()
+        if url and isinstance(unwrap_client(db), MemoryClient):
+            raise RuntimeError("--url demande une base partagée avec le serveur (DATABASE_BACKEND=supabase) ou --no-seed")
+        start = time.perf_counter()
+        sirens = seed_companies(db, companies, seed)
+        seed_seconds = time.perf_counter() - start
+
+    if url:
+        client = httpx.AsyncClient(base_url=url, timeout=60)
+    else:
+        from app.main import app
+        from app.core.cache import invalidate_cache, response_cache
+        invalidate_cache()
+        if not cache:
+            response_cache.ttl = 0
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app, raise_app_exceptions=False), base_url="http://bench", timeout=60)
+
+    async with client:
+        if not sirens:
+            sirens = await sample_sirens(client)
+        plan = build_requests(requests, sirens, companies, seed)
+        start = time.perf_counter()
+        results = await drive(client, plan, concurrency)
+        duration = time.perf_counter() - start
+
+    if not url and not cache:
+        response_cache.ttl = settings.CACHE_TTL_SECONDS
+
+    routes = {}
+    for name, result in results.items():
+        latencies = sorted(result["latencies"])
+        if not latencies:
+            continue
+        routes[name] = {
+            "requests": len(latencies),
+            "errors": result["errors"],
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+            "requests_per_second": round(len(latencies) / duration, 2),
+        }
+    return {
+        "config": {
+            "companies": companies if seed_db else None, "requests": requests, "concurrency": concurrency,
+            "target": url or "in-process", "cache": cache, "database": settings.DATABASE_BACKEND,
+        },
+        "seed_seconds": round(seed_seconds, 2),
+        "duration_seconds": round(duration, 3),
+        "requests_per_second": round(requests / duration, 2),
+        "errors": sum(route["errors"] for route in routes.values()),
+        "routes": routes,
+    }
+
+def regressions(result: Dict, baseline: Dict, tolerance: float = 20.0) -> List[str]:
+    """Routes dont le p95 dépasse la référence de plus de `tolerance` %"""
+    found = []
+    for name, route in result["routes"].items():
+        reference = baseline.get("routes", {}).get(name)
+        if reference and reference["p95_ms"] and route["p95_ms"] > reference["p95_ms"] * (1 + tolerance / 100):
+            found.append(f"{name}: p95 {route['p95_ms']:.1f} ms (référence {reference['p95_ms']:.1f} ms)")
+    return found
+
+def print_report(result: Dict, baseline: Optional[Dict] = None):
+    config = result["config"]
+    companies = f"{config['companies']} cabinets" if config["companies"] else "base existante"
+    print(f"{companies} ({config['database']}), {config['requests']} requêtes, "
+          f"{config['concurrency']} clients, cible {config['target']}, cache {'actif' if config['cache'] else 'contourné'}")
+    if result["seed_seconds"]:
+        print(f"  peuplement           {result['seed_seconds']:10.2f} s")
+    print(f"  durée                {result['duration_seconds']:10.2f} s")
+    print(f"  débit                {result['requests_per_second']:10.2f} req/s")
+    print(f"  erreurs              {result['errors']:10d}")
+    print(f"  {'route':<18} {'requêtes':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, route in result["routes"].items():
+        line = (f"  {name:<18} {route['requests']:8d} {route['p50_ms']:9.1f} {route['p95_ms']:9.1f} "
+                f"{route['p99_ms']:9.1f} {route['max_ms']:9.1f}")
+        reference = (baseline or {}).get("routes", {}).get(name)
+        if reference and reference["p95_ms"]:
+            line += f"   (p95 {(route['p95_ms'] - reference['p95_ms']) / reference['p95_ms'] * 100:+.1f} %)"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=100_000, help="cabinets synthétiques à insérer")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=10, help="clients simultanés")
+    parser.add_argument("--url", help="serveur à tester (défaut: application dans le processus)")
+    parser.add_argument("--no-seed", action="store_true", help="utilise les données déjà en base")
+    parser.add_argument("--cache", action="store_true", help="laisse le cache de réponses actif")
+    parser.add_argument("--save", help="enregistre le résultat (JSON) comme référence")
+    parser.add_argument("--compare", help="compare à une référence enregistrée avec --save")
+    parser.add_argument("--tolerance", type=float, default=20.0, help="hausse de p95 tolérée vs référence (%%)")
+    parser.add_argument("--max-p95-ms", type=float, help="échoue si le p95 d'une route dépasse ce seuil")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_benchmark(
+        args.companies, args.requests, args.concurrency, args.url, args.cache, not args.no_seed
+    ))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Résultat enregistré dans {args.save}", file=sys.stderr)
+
+    failures = regressions(result, baseline, args.tolerance) if baseline else []
+    if args.max_p95_ms:
+        failures += [
+            f"{name}: p95 {route['p95_ms']:.1f} ms > {args.max_p95_ms:.0f} ms"
+            for name, route in result["routes"].items() if route["p95_ms"] > args.max_p95_ms
+        ]
+    if result["errors"]:
+        failures.append(f"{result['errors']} requêtes en erreur")
+    if failures:
+        print("Régressions:\n  " + "\n  ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Coût de l'authentification JWT par requête, avec et sans cache des tokens vérifiés
+
+Usage (depuis backend/): python -m benchmarks.bench_auth [--requests 5000] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import timedelta
+
+os.environ.setdefault("DATABASE_BACKEND", "memory")
+
+import httpx
+from fastapi import Depends, FastAPI
+from app.core import auth
+from app.core.auth import get_current_active_user
+from app.core.database import init_db
+from app.core.security import create_access_token
+
+bench_app = FastAPI()
+
+@bench_app.get("/protected")
+async def protected(user: dict = Depends(get_current_active_user)):
+    return user
+
+@bench_app.get("/public")
+async def public():
+    return {"username": None}
+
+async def run_load(path: str, headers: dict, requests: int, concurrency: int) -> float:
+    """Retourne le nombre de requêtes/s pour `requests` appels avec `concurrency` clients"""
+    transport = httpx.ASGITransport(app=bench_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        per_client = requests // concurrency
+
+        async def worker():
+            for _ in range(per_client):
+                response = await client.get(path, headers=headers)
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return per_client * concurrency / (time.perf_counter() - start)
+
+def decode_cost(token: str, iterations: int = 5000) -> float:
+    """Coût d'une vérification complète du JWT, en microsecondes"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        auth.jwt.decode(token, auth.settings.SECRET_KEY, algorithms=[auth.settings.ALGORITHM])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+async def main(requests: int, concurrency: int):
+    await init_db()
+    token = create_access_token({"sub": "admin"}, expires_delta=timedelta(minutes=30))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    print(f"jwt.decode: {decode_cost(token):.1f} µs/appel")
+
+    baseline = await run_load("/public", {}, requests, concurrency)
+
+    auth.token_cache.max_size = 0
+    auth.token_cache.clear()
+    uncached = await run_load("/protected", headers, requests, concurrency)
+
+    auth.token_cache.max_size = 1024
+    cached = await run_load("/protected", headers, requests, concurrency)
+
+    print(f"{requests} requêtes, {concurrency} clients concurrents")
+    for label, rps in [("sans auth", baseline), ("auth sans cache", uncached), ("auth avec cache", cached)]:
+        overhead = (1 / rps - 1 / baseline) * 1e6
+        print(f"  {label:<16} {rps:8.0f} req/s   surcoût auth: {max(overhead, 0):7.1f} µs/requête")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
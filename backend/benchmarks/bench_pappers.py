@@ -0,0 +1,161 @@
+"""Débit du scraping Pappers de bout en bout, hors ligne (faux Pappers + base en mémoire)
+
+Lance `PappersAPIClient.run_full_scraping` contre benchmarks.fake_pappers et
+rapporte entreprises/s, requêtes par endpoint et pic mémoire.
+
+Usage (depuis backend/):
+    python -m benchmarks.bench_pappers [--companies 250] [--latency 0.02] [--rate-429 0.01]
+        [--error-rate 0.01] [--page-pause 0] [--retry-delay 0] [--detail-cache DIR] [--save baseline.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Dict, Optional
+
+os.environ.setdefault("DATABASE_BACKEND", "memory")
+
+from app.core.database import get_db, init_db
+from app.models.schemas import ScrapingStatus
+from app.scrapers.circuit import reset_guards
+from app.scrapers.detail_cache import DetailCache
+from app.scrapers.pappers import PappersAPIClient
+from app.services.activity_log import activity_log
+from benchmarks.fake_pappers import FakePappers
+
+async def run_benchmark(
+    companies: int = 250,
+    page_size: int = 100,
+    latency: float = 0.02,
+    rate_429: float = 0.0,
+    error_rate: float = 0.0,
+    page_pause: float = 0.0,
+    retry_delay: float = 0.0,
+    departments: Optional[list] = None,
+    seed: int = 42,
+    detail_cache_dir: Optional[str] = None
+) -> Dict:
+    """Un scraping complet; retourne les mesures (sérialisables en JSON)"""
+    try:
+        db = get_db()
+    except RuntimeError:
+        await init_db()
+        db = get_db()
+    db.reset()
+
+    fake = FakePappers(companies, page_size, latency, rate_429=rate_429, error_rate=error_rate, seed=seed)
+    base_url = await fake.start()
+
+    # Disjoncteur et limite AIMD neufs: un passage ne dépend pas du précédent
+    reset_guards()
+    client = PappersAPIClient(db)
+    client.BASE_URL = base_url
+    client.PAGE_PAUSE = page_pause
+    client.RETRY_DELAY = retry_delay
+    # Sans répertoire explicite, pas de cache disque: chaque passage interroge le faux Pappers
+    client.detail_cache = DetailCache(detail_cache_dir, 3600) if detail_cache_dir else None
+    if departments:
+        client.DEPARTEMENTS_IDF = departments
+    status = ScrapingStatus(is_running=True, progress=0, message="", source="pappers")
+
+    # Comme en production: logs d'activité écrits par lots en tâche de fond
+    await activity_log.start()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        await client.run_full_scraping(status)
+    finally:
+        duration = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        await activity_log.stop()
+        await fake.close()
+
+    stored = len(db.table("cabinets_comptables").select("siren").execute().data)
+    total_requests = sum(fake.requests.values())
+    return {
+        "config": {
+            "companies_per_department": companies, "departments": len(client.DEPARTEMENTS_IDF),
+            "page_size": page_size, "latency": latency, "rate_429": rate_429,
+            "error_rate": error_rate, "page_pause": page_pause, "retry_delay": retry_delay,
+        },
+        "duration_seconds": round(duration, 3),
+        "companies_created": client.new_companies_count,
+        "companies_stored": stored,
+        "companies_per_second": round(client.new_companies_count / duration, 2),
+        "requests": fake.request_counts(),
+        "requests_total": total_requests,
+        "requests_per_second": round(total_requests / duration, 2),
+        "max_in_flight": fake.max_in_flight,
+        "details_skipped": status.metrics["details_skipped"] if status.metrics else {},
+        "host": status.metrics["host"] if status.metrics else {},
+        "peak_python_memory_mb": round(peak / 1e6, 2),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages": {name: stage["share"] for name, stage in status.metrics["stages"].items()} if status.metrics else {},
+        "error": status.error,
+    }
+
+def print_report(result: Dict, baseline: Optional[Dict] = None):
+    def delta(key: str) -> str:
+        if not baseline or not baseline.get(key):
+            return ""
+        change = (result[key] - baseline[key]) / baseline[key] * 100
+        return f"   ({change:+.1f} % vs référence)"
+
+    config = result["config"]
+    print(f"{config['departments']} départements x {config['companies_per_department']} cabinets, "
+          f"latence {config['latency'] * 1000:.0f} ms, 429 {config['rate_429']:.1%}, erreurs {config['error_rate']:.1%}")
+    print(f"  durée                {result['duration_seconds']:10.2f} s{delta('duration_seconds')}")
+    print(f"  entreprises créées   {result['companies_created']:10d}{delta('companies_created')}")
+    print(f"  entreprises/s        {result['companies_per_second']:10.2f}{delta('companies_per_second')}")
+    print(f"  requêtes             {result['requests_total']:10d}{delta('requests_total')}")
+    for name, count in result["requests"].items():
+        print(f"    {name:<18} {count:10d}")
+    print(f"  requêtes simultanées {result['max_in_flight']:10d}")
+    if result.get("details_skipped"):
+        print("  détails évités: " + ", ".join(f"{reason} {count}" for reason, count in result["details_skipped"].items()))
+    if result.get("host"):
+        host = result["host"]
+        print(f"  disjoncteur          {host['state']:>10} ({host['trips']} déclenchements), concurrence {host['concurrency_limit']}")
+    print(f"  pic mémoire Python   {result['peak_python_memory_mb']:10.2f} Mo{delta('peak_python_memory_mb')}")
+    print(f"  RSS max              {result['max_rss_mb']:10.1f} Mo")
+    if result["stages"]:
+        print("  temps par étape: " + ", ".join(f"{name} {share:.0%}" for name, share in result["stages"].items() if share))
+    if result["error"]:
+        print(f"  erreur: {result['error']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=250, help="cabinets par département")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.02, help="secondes par requête")
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--page-pause", type=float, default=0.0, help="pause entre pages (0.5 en production)")
+    parser.add_argument("--retry-delay", type=float, default=0.0, help="attente avant une nouvelle tentative (1 en production)")
+    parser.add_argument("--departments", nargs="+", help="départements (défaut: ceux du scraper)")
+    parser.add_argument("--detail-cache", help="répertoire du cache disque des fiches (second passage sans appels)")
+    parser.add_argument("--save", help="enregistre le résultat (JSON) comme référence")
+    parser.add_argument("--compare", help="compare à une référence enregistrée avec --save")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_benchmark(
+        args.companies, args.page_size, args.latency, args.rate_429, args.error_rate,
+        args.page_pause, args.retry_delay, args.departments, detail_cache_dir=args.detail_cache
+    ))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Résultat enregistré dans {args.save}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
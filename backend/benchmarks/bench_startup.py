@@ -0,0 +1,52 @@
+"""Temps d'import de l'application au démarrage d'un worker (`python -X importtime`)
+
+Usage (depuis backend/): python -m benchmarks.bench_startup [--runs 5] [--top 15]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+# Dépendances lourdes qui ne doivent être importées qu'à la première utilisation
+LAZY_MODULES = ('pandas', 'numpy', 'aiohttp', 'playwright', 'openai', 'supabase', 'bs4')
+
+def import_times(module: str = "app.main") -> Dict[str, Tuple[int, int]]:
+    """Module -> (temps propre, temps cumulé) en µs, mesurés dans un interpréteur neuf"""
+    env = {**os.environ, "DATABASE_BACKEND": "memory", "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+def eager_heavy_modules(times: Dict[str, Tuple[int, int]]) -> list:
+    return sorted(name for name in times if name.split('.')[0] in LAZY_MODULES)
+
+def main(runs: int, top: int):
+    totals = []
+    for _ in range(runs):
+        times = import_times()
+        totals.append(times["app.main"][1] / 1000)
+
+    print(f"import app.main: médiane {statistics.median(totals):.0f} ms sur {runs} lancements "
+          f"(min {min(totals):.0f} ms, max {max(totals):.0f} ms)")
+    eager = eager_heavy_modules(times)
+    print(f"Dépendances lourdes importées au démarrage: {', '.join(eager) if eager else 'aucune'}")
+    print(f"Modules les plus coûteux (temps propre):")
+    for name, (self_us, cumulative_us) in sorted(times.items(), key=lambda item: -item[1][0])[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    main(args.runs, args.top)
@@ -0,0 +1,111 @@
+"""Débit (req/s) du serveur de production selon le nombre de workers
+
+Lance `python -m app.server` sur la base en mémoire pour chaque nombre de workers,
+puis le charge depuis plusieurs processus clients.
+
+Usage (depuis backend/): python -m benchmarks.bench_workers [--workers 1 2 4] [--duration 10]
+    [--clients 4] [--concurrency 32] [--path /api/v1/companies/]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DATABASE_BACKEND": "memory",
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(port),
+        "SERVER_WORKERS": str(workers),
+        "SERVER_RELOAD": "false",
+        "LOG_LEVEL": "warning",
+    }
+    process = subprocess.Popen([sys.executable, "-m", "app.server"], env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"Le serveur ({workers} workers) n'a pas démarré")
+
+def stop_server(process: subprocess.Popen):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+async def client_load(url: str, duration: float, concurrency: int) -> tuple:
+    """(requêtes réussies, erreurs) pendant `duration` secondes"""
+    ok = errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        deadline = time.monotonic() + duration
+
+        async def worker():
+            nonlocal ok, errors
+            while time.monotonic() < deadline:
+                try:
+                    response = await client.get(url)
+                    if response.status_code == 200:
+                        ok += 1
+                    else:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return ok, errors
+
+def client_process(args: tuple) -> tuple:
+    return asyncio.run(client_load(*args))
+
+def measure(workers: int, path: str, duration: float, clients: int, concurrency: int) -> tuple:
+    port = free_port()
+    server = start_server(workers, port)
+    try:
+        url = f"http://127.0.0.1:{port}{path}"
+        # Préchauffage: imports paresseux et caches de chaque worker
+        asyncio.run(client_load(url, 1.0, concurrency))
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.map(client_process, [(url, duration, concurrency)] * clients)
+    finally:
+        stop_server(server)
+    ok = sum(r[0] for r in results)
+    errors = sum(r[1] for r in results)
+    return ok / duration, errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=4, help="processus générateurs de charge")
+    parser.add_argument("--concurrency", type=int, default=32, help="connexions par processus client")
+    parser.add_argument("--path", default="/")
+    args = parser.parse_args()
+
+    print(f"GET {args.path}: {args.clients}x{args.concurrency} connexions, {args.duration:.0f}s par mesure, {os.cpu_count()} cœurs")
+    baseline = None
+    for workers in args.workers:
+        rps, errors = measure(workers, args.path, args.duration, args.clients, args.concurrency)
+        baseline = baseline or rps
+        print(f"  {workers:>2} workers {rps:9.0f} req/s   x{rps / baseline:4.2f}   erreurs: {errors}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Faux serveur Pappers (/v2/recherche, /v2/entreprise) pour mesurer le scraping hors ligne
+
+Données synthétiques déterministes: `companies_per_department` cabinets par
+département, dont environ 10 % hors de la tranche de CA ciblée.
+
+Usage autonome (depuis backend/): python -m benchmarks.fake_pappers [--port 8089] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import random
+from collections import Counter
+from typing import Dict, Optional
+from aiohttp import web
+
+VILLES = {
+    '75': ('75008', 'Paris'), '77': ('77000', 'Melun'), '78': ('78000', 'Versailles'),
+    '91': ('91000', 'Évry-Courcouronnes'), '92': ('92100', 'Boulogne-Billancourt'),
+    '93': ('93200', 'Saint-Denis'), '94': ('94000', 'Créteil'), '95': ('95000', 'Cergy'),
+}
+
+class FakePappers:
+    """Application aiohttp imitant l'API Pappers, avec latence et erreurs injectées"""
+
+    def __init__(
+        self,
+        companies_per_department: int = 250,
+        page_size: int = 100,
+        latency: float = 0.0,
+        jitter: float = 0.2,
+        rate_429: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 42
+    ):
+        self.companies_per_department = companies_per_department
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.error_rate = error_rate
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.requests: Counter = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    def company(self, siren: str) -> Dict:
+        """Fiche complète (format /v2/entreprise) d'un SIREN synthétique"""
+        rng = random.Random(f"{self.seed}-{siren}")
+        dept = siren[:2]
+        code_postal, ville = VILLES.get(dept, (f"{dept}000", f"Ville {dept}"))
+        in_range = rng.random() > 0.1
+        ca = rng.randint(3_000_000, 50_000_000) if in_range else rng.choice([rng.randint(100_000, 2_900_000), rng.randint(51_000_000, 90_000_000)])
+        return {
+            'siren': siren,
+            'siret_siege': f"{siren}00012",
+            'nom_entreprise': f"Cabinet {rng.choice(['Audit', 'Conseil', 'Expertise', 'Fiduciaire'])} {siren[-5:]}",
+            'forme_juridique': rng.choice(['SAS', 'SARL', 'SA']),
+            'date_creation': f"{rng.randint(1970, 2020)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'adresse_ligne_1': f"{rng.randint(1, 200)} rue de la Comptabilité",
+            'code_postal': code_postal,
+            'ville': ville,
+            'numero_tva_intracommunautaire': f"FR{rng.randint(10, 99)}{siren}",
+            'chiffre_affaires': ca,
+            'resultat': int(ca * rng.uniform(-0.05, 0.15)),
+            'effectif': rng.randint(5, 300),
+            'capital': rng.choice([1000, 10000, 50000, 100000]),
+            'code_naf': '69.20Z',
+            'libelle_code_naf': 'Activités comptables',
+            'representants': [{'prenom': 'Camille', 'nom': f"Martin{siren[-3:]}", 'qualite': 'Président'}],
+        }
+
+    def search_result(self, siren: str) -> Dict:
+        """Résumé renvoyé par /v2/recherche"""
+        full = self.company(siren)
+        return {k: full[k] for k in ('siren', 'nom_entreprise', 'code_postal', 'ville', 'chiffre_affaires')}
+
+    async def _simulate(self, endpoint: str) -> Optional[web.Response]:
+        """Latence puis, éventuellement, une erreur injectée"""
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency * self.rng.uniform(1 - self.jitter, 1 + self.jitter))
+        finally:
+            self.in_flight -= 1
+        draw = self.rng.random()
+        if draw < self.rate_429:
+            self.requests[(endpoint, 429)] += 1
+            return web.json_response({'error': 'Too many requests'}, status=429, headers={'Retry-After': '1'})
+        if draw < self.rate_429 + self.error_rate:
+            self.requests[(endpoint, 500)] += 1
+            return web.json_response({'error': 'Internal error'}, status=500)
+        self.requests[(endpoint, 200)] += 1
+        return None
+
+    async def recherche(self, request: web.Request) -> web.Response:
+        error = await self._simulate('recherche')
+        if error:
+            return error
+        dept = request.query.get('departement', '75')
+        page = int(request.query.get('page', 1))
+        per_page = min(int(request.query.get('par_page', self.page_size)), self.page_size)
+        start = (page - 1) * per_page
+        stop = min(start + per_page, self.companies_per_department)
+        return web.json_response({
+            'resultats': [self.search_result(f"{dept}{i:07d}") for i in range(start, stop)],
+            'total': self.companies_per_department,
+            'page': page,
+            'par_page': per_page,
+        })
+
+    async def entreprise(self, request: web.Request) -> web.Response:
+        error = await self._simulate('entreprise')
+        if error:
+            return error
+        siren = request.query.get('siren', '')
+        if len(siren) != 9 or not siren.isdigit() or int(siren[2:]) >= self.companies_per_department:
+            return web.json_response({'error': 'Entreprise introuvable'}, status=404)
+        return web.json_response(self.company(siren))
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/v2/recherche', self.recherche)
+        app.router.add_get('/v2/entreprise', self.entreprise)
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Démarre le serveur et retourne l'URL de base (équivalent de PappersAPIClient.BASE_URL)"""
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{bound_port}/v2"
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def request_counts(self) -> Dict[str, int]:
+        return {f"{endpoint} {status}": count for (endpoint, status), count in sorted(self.requests.items())}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--companies', type=int, default=250, help='cabinets par département')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05, help='secondes par requête')
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake = FakePappers(args.companies, args.page_size, args.latency, rate_429=args.rate_429, error_rate=args.error_rate)
+    print(f"Faux Pappers sur http://127.0.0.1:{args.port}/v2")
+    web.run_app(fake.app(), host='127.0.0.1', port=args.port, print=None)
+
+if __name__ == '__main__':
+    main()
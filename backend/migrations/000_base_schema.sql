@@ -0,0 +1,41 @@
+-- Schéma de base (tables créées auparavant à la main depuis le README)
+-- Sans effet sur une base existante: les migrations suivantes s'appuient dessus.
+
+CREATE TABLE IF NOT EXISTS cabinets_comptables (
+    id SERIAL PRIMARY KEY,
+    siren VARCHAR(9) NOT NULL,
+    siret_siege VARCHAR(14),
+    nom_entreprise VARCHAR(255) NOT NULL,
+    forme_juridique VARCHAR(100),
+    date_creation DATE,
+    adresse TEXT,
+    email VARCHAR(255),
+    telephone VARCHAR(20),
+    numero_tva VARCHAR(20),
+    chiffre_affaires DECIMAL(15,2),
+    resultat DECIMAL(15,2),
+    effectif INTEGER,
+    capital_social DECIMAL(15,2),
+    code_naf VARCHAR(10),
+    libelle_code_naf VARCHAR(255),
+    dirigeant_principal VARCHAR(255),
+    dirigeants_json JSONB,
+    statut VARCHAR(50) DEFAULT 'à contacter',
+    score_prospection DECIMAL(5,2),
+    score_details JSONB,
+    lien_pappers VARCHAR(255),
+    lien_societe_com VARCHAR(255),
+    details_complets JSONB,
+    last_scraped_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS activity_logs (
+    id SERIAL PRIMARY KEY,
+    cabinet_id INTEGER REFERENCES cabinets_comptables(id),
+    action VARCHAR(50),
+    details JSONB,
+    user_info VARCHAR(255),
+    created_at TIMESTAMP DEFAULT NOW()
+);
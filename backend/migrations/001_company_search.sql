@@ -0,0 +1,70 @@
+-- Recherche entreprises: plein texte français sans accents + trigrammes + préfixe SIREN
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- unaccent() n'est pas IMMUTABLE: wrapper utilisable dans les colonnes générées et index
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, $1)
+$$;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'french_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION french_unaccent (COPY = french);
+        ALTER TEXT SEARCH CONFIGURATION french_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+    END IF;
+END
+$$;
+
+-- Nom normalisé (équivalent de app.core.text.normalize_text)
+ALTER TABLE cabinets_comptables
+    ADD COLUMN IF NOT EXISTS nom_recherche TEXT
+    GENERATED ALWAYS AS (btrim(regexp_replace(lower(f_unaccent(nom_entreprise)), '\s+', ' ', 'g'))) STORED;
+
+ALTER TABLE cabinets_comptables
+    ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('french_unaccent', coalesce(nom_entreprise, ''))) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_cabinets_nom_trgm ON cabinets_comptables USING GIN (nom_recherche gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_cabinets_search_vector ON cabinets_comptables USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_cabinets_siren_prefix ON cabinets_comptables (siren text_pattern_ops);
+
+-- Autocomplétion: appelée via db.rpc('search_companies', {'query': ..., 'max_results': ...})
+CREATE OR REPLACE FUNCTION search_companies(query TEXT, max_results INTEGER DEFAULT 10)
+RETURNS TABLE (
+    id INTEGER,
+    siren VARCHAR,
+    nom_entreprise VARCHAR,
+    adresse TEXT,
+    statut VARCHAR,
+    rank REAL
+)
+LANGUAGE plpgsql STABLE AS $$
+DECLARE
+    normalized TEXT := btrim(regexp_replace(lower(f_unaccent(query)), '\s+', ' ', 'g'));
+BEGIN
+    IF replace(query, ' ', '') ~ '^[0-9]+$' THEN
+        RETURN QUERY
+        SELECT c.id, c.siren, c.nom_entreprise, c.adresse, c.statut, 1.0::REAL
+        FROM cabinets_comptables c
+        WHERE c.siren LIKE replace(query, ' ', '') || '%'
+        ORDER BY c.siren
+        LIMIT max_results;
+    ELSE
+        RETURN QUERY
+        SELECT c.id, c.siren, c.nom_entreprise, c.adresse, c.statut,
+               (word_similarity(normalized, c.nom_recherche)
+                + similarity(normalized, c.nom_recherche)
+                + CASE WHEN c.nom_recherche LIKE '%' || normalized || '%' THEN 1.0 ELSE 0.0 END
+                + ts_rank(c.search_vector, plainto_tsquery('french_unaccent', query)))::REAL AS rank
+        FROM cabinets_comptables c
+        WHERE normalized <% c.nom_recherche
+           OR c.search_vector @@ plainto_tsquery('french_unaccent', query)
+        ORDER BY rank DESC, length(c.nom_entreprise)
+        LIMIT max_results;
+    END IF;
+END
+$$;
@@ -0,0 +1,15 @@
+-- Code postal et ville extraits à l'écriture (scrapers, import CSV, mises à jour)
+-- Les lignes existantes sont complétées par: python -m app.services.address
+
+ALTER TABLE cabinets_comptables ADD COLUMN IF NOT EXISTS code_postal VARCHAR(5);
+ALTER TABLE cabinets_comptables ADD COLUMN IF NOT EXISTS ville VARCHAR(100);
+
+CREATE INDEX IF NOT EXISTS idx_cabinets_ville ON cabinets_comptables (ville);
+CREATE INDEX IF NOT EXISTS idx_cabinets_code_postal ON cabinets_comptables (code_postal);
+
+-- Liste des villes pour /stats/cities (DISTINCT servi par idx_cabinets_ville)
+CREATE OR REPLACE VIEW cabinets_villes AS
+    SELECT DISTINCT ville
+    FROM cabinets_comptables
+    WHERE ville IS NOT NULL
+    ORDER BY ville;
@@ -0,0 +1,38 @@
+-- Fiche entreprise: logs embarqués via PostgREST et suppression transactionnelle
+
+-- Les logs survivent à la suppression de l'entreprise (sinon la FK bloque le DELETE)
+ALTER TABLE activity_logs DROP CONSTRAINT IF EXISTS activity_logs_cabinet_id_fkey;
+ALTER TABLE activity_logs
+    ADD CONSTRAINT activity_logs_cabinet_id_fkey
+    FOREIGN KEY (cabinet_id) REFERENCES cabinets_comptables(id) ON DELETE SET NULL;
+
+-- Supprime l'entreprise et journalise en une seule transaction.
+-- Appelée via db.rpc('delete_company', {'p_siren': ..., 'p_user_info': ...}); NULL si absente.
+CREATE OR REPLACE FUNCTION delete_company(p_siren TEXT, p_user_info TEXT DEFAULT 'API User')
+RETURNS JSONB
+LANGUAGE plpgsql AS $$
+DECLARE
+    deleted RECORD;
+BEGIN
+    SELECT id, siren, nom_entreprise INTO deleted
+    FROM cabinets_comptables
+    WHERE siren = p_siren
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO activity_logs (cabinet_id, action, details, user_info)
+    VALUES (
+        deleted.id,
+        'delete',
+        jsonb_build_object('siren', deleted.siren, 'nom_entreprise', deleted.nom_entreprise),
+        p_user_info
+    );
+
+    DELETE FROM cabinets_comptables WHERE id = deleted.id;
+
+    RETURN to_jsonb(deleted);
+END
+$$;
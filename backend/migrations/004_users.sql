@@ -0,0 +1,15 @@
+-- Utilisateurs de l'application (remplace le dictionnaire codé en dur de l'API)
+
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    username VARCHAR(100) UNIQUE NOT NULL,
+    hashed_password VARCHAR(255) NOT NULL,
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Compte initial (mot de passe "secret"): à changer via `python -m app.services.users`
+INSERT INTO users (username, hashed_password)
+VALUES ('admin', '$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW')
+ON CONFLICT (username) DO NOTHING;
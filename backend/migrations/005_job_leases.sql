@@ -0,0 +1,49 @@
+-- Baux des tâches longues (scrapings, rafraîchissement): une seule exécution par tâche
+-- entre tous les workers. Utilisés par app/core/job_lock.py via db.rpc(...).
+--
+-- Pas de pg_advisory_lock: chaque appel PostgREST est une transaction distincte, un
+-- verrou de session ne survivrait pas à l'appel. L'expiration suit l'horloge du serveur.
+
+CREATE TABLE IF NOT EXISTS job_leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    acquired_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+-- Prend le bail s'il est libre, expiré ou déjà détenu par p_holder; TRUE si pris
+CREATE OR REPLACE FUNCTION acquire_job_lease(p_name TEXT, p_holder TEXT, p_ttl_seconds INTEGER)
+RETURNS BOOLEAN
+LANGUAGE plpgsql AS $$
+DECLARE
+    acquired BOOLEAN;
+BEGIN
+    INSERT INTO job_leases (name, holder, acquired_at, expires_at)
+    VALUES (p_name, p_holder, NOW(), NOW() + make_interval(secs => p_ttl_seconds))
+    ON CONFLICT (name) DO UPDATE
+        SET holder = EXCLUDED.holder,
+            acquired_at = EXCLUDED.acquired_at,
+            expires_at = EXCLUDED.expires_at
+        WHERE job_leases.expires_at < NOW() OR job_leases.holder = EXCLUDED.holder
+    RETURNING TRUE INTO acquired;
+    RETURN COALESCE(acquired, FALSE);
+END
+$$;
+
+-- Heartbeat: FALSE si le bail a expiré et a été repris par un autre détenteur
+CREATE OR REPLACE FUNCTION renew_job_lease(p_name TEXT, p_holder TEXT, p_ttl_seconds INTEGER)
+RETURNS BOOLEAN
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE job_leases
+    SET expires_at = NOW() + make_interval(secs => p_ttl_seconds)
+    WHERE name = p_name AND holder = p_holder;
+    RETURN FOUND;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION release_job_lease(p_name TEXT, p_holder TEXT)
+RETURNS VOID
+LANGUAGE sql AS $$
+    DELETE FROM job_leases WHERE name = p_name AND holder = p_holder;
+$$;
@@ -0,0 +1,43 @@
+-- Index des requêtes fréquentes (vérifiés par tests/test_query_plans.py)
+--   filter_companies: statut =, chiffre_affaires >=, effectif >=, ORDER BY score_prospection DESC
+--   fiche, mises à jour, upserts des scrapers: siren =
+--   fiche: activity_logs par cabinet_id, les plus récents d'abord
+
+-- SIREN unique: cible de `upsert(..., on_conflict='siren')`. Une base créée depuis le
+-- README a déjà la contrainte UNIQUE (index cabinets_comptables_siren_key): pas de doublon.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+        WHERE i.indrelid = 'cabinets_comptables'::regclass
+          AND i.indisunique AND i.indnkeyatts = 1 AND a.attname = 'siren'
+    ) THEN
+        CREATE UNIQUE INDEX idx_cabinets_siren_unique ON cabinets_comptables (siren);
+    END IF;
+END
+$$;
+
+-- Filtre par statut trié par score: parcours de l'index dans l'ordre, sans tri
+CREATE INDEX IF NOT EXISTS idx_cabinets_statut_score
+    ON cabinets_comptables (statut, score_prospection DESC NULLS FIRST);
+-- Statut + tranche de CA
+CREATE INDEX IF NOT EXISTS idx_cabinets_statut_ca
+    ON cabinets_comptables (statut, chiffre_affaires);
+-- Tranche de CA (+ effectif filtré dans l'index)
+CREATE INDEX IF NOT EXISTS idx_cabinets_ca_effectif
+    ON cabinets_comptables (chiffre_affaires, effectif);
+CREATE INDEX IF NOT EXISTS idx_cabinets_effectif
+    ON cabinets_comptables (effectif);
+-- Tri par score sans filtre
+CREATE INDEX IF NOT EXISTS idx_cabinets_score
+    ON cabinets_comptables (score_prospection DESC NULLS FIRST);
+
+CREATE INDEX IF NOT EXISTS idx_activity_logs_cabinet_created
+    ON activity_logs (cabinet_id, created_at DESC);
+
+-- Index du README couverts par les précédents (préfixes ou doublon de l'index unique)
+DROP INDEX IF EXISTS idx_cabinets_siren;
+DROP INDEX IF EXISTS idx_cabinets_statut;
+DROP INDEX IF EXISTS idx_cabinets_ca;
@@ -0,0 +1,4 @@
+-- File de rafraîchissement (app/services/refresh.py): fiches jamais ou anciennement
+-- scrapées, lues par pages des plus anciennes aux plus récentes
+CREATE INDEX IF NOT EXISTS idx_cabinets_last_scraped
+    ON cabinets_comptables (last_scraped_at NULLS FIRST, id);
@@ -0,0 +1,100 @@
+import os
+import tempfile
+
+# Les tests tournent sur la base en mémoire, sans Supabase
+os.environ.setdefault("DATABASE_BACKEND", "memory")
+# Pas de cache disque des fiches Pappers entre deux tests
+os.environ.setdefault("PAPPERS_DETAIL_CACHE_TTL_SECONDS", "0")
+# Disjoncteur des scrapers: pauses courtes
+os.environ.setdefault("SCRAPING_BREAKER_OPEN_SECONDS", "0.05")
+# Baux des tâches dans un fichier propre à la session de tests
+os.environ.setdefault("JOB_LOCK_SQLITE_PATH", os.path.join(tempfile.mkdtemp(), "job_locks.sqlite3"))
+
+import asyncio
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from app.core.database import Database, init_db
+from app.core.cache import invalidate_cache
+from app.scrapers.circuit import reset_guards
+from app.scrapers.pappers import PappersAPIClient
+from app.services.users import user_store
+
+asyncio.run(init_db())
+
+@pytest.fixture
+def db():
+    """Base en mémoire remise à zéro pour chaque test"""
+    client = Database.get_client()
+    client.reset()
+    invalidate_cache()
+    user_store.invalidate()
+    yield client
+    client.reset()
+    invalidate_cache()
+    user_store.invalidate()
+
+@pytest.fixture(autouse=True)
+def fresh_guards():
+    """Disjoncteurs et limites de concurrence des hôtes repartent de zéro à chaque test"""
+    reset_guards()
+    yield
+    reset_guards()
+
+class TableCalls(list):
+    """Tables ouvertes via `db.table`, dans l'ordre, et contenu des écritures par méthode"""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = {'insert': [], 'update': [], 'upsert': []}
+
+    def clear(self):
+        super().clear()
+        for payloads in self.writes.values():
+            payloads.clear()
+
+@pytest.fixture
+def table_calls(db):
+    """Espionne `db.table` pendant le test (appeler `clear()` après l'amorçage des données)"""
+    calls = TableCalls()
+    table = db.table
+
+    def recording_table(name):
+        calls.append(name)
+        builder = table(name)
+        for method, payloads in calls.writes.items():
+            write = getattr(builder, method)
+            setattr(builder, method, lambda json, _write=write, _payloads=payloads, **kwargs:
+                    _payloads.append(json) or _write(json, **kwargs))
+        return builder
+
+    db.table = recording_table
+    yield calls
+    del db.table
+
+@pytest_asyncio.fixture
+async def pappers_stub(monkeypatch):
+    """Démarre un faux Pappers (gestionnaires aiohttp de /recherche et /entreprise) et y branche le client
+
+    Un seul département, pas d'attente entre pages ni avant les nouvelles tentatives,
+    sauf attributs de classe passés en mots-clés.
+    """
+    servers = []
+
+    async def start(recherche, entreprise, **overrides):
+        app = web.Application()
+        app.router.add_get("/v2/recherche", recherche)
+        app.router.add_get("/v2/entreprise", entreprise)
+        server = TestServer(app)
+        await server.start_server()
+        servers.append(server)
+        attributes = {"BASE_URL": str(server.make_url("/v2")), "DEPARTEMENTS_IDF": ["75"],
+                      "RETRY_DELAY": 0, "PAGE_PAUSE": 0, **overrides}
+        for name, value in attributes.items():
+            monkeypatch.setattr(PappersAPIClient, name, value)
+        return server
+
+    yield start
+    for server in servers:
+        await server.close()
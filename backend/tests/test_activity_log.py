@@ -0,0 +1,44 @@
+import asyncio
+import pytest
+from app.services.activity_log import ActivityLogWriter
+
+def count_logs(db):
+    return len(db.table("activity_logs").select("id").execute().data)
+
+@pytest.mark.asyncio
+async def test_events_are_flushed_in_batches(db, table_calls):
+    inserts = table_calls.writes["insert"]
+    writer = ActivityLogWriter(batch_size=50, flush_interval=0.05)
+    await writer.start()
+    try:
+        for i in range(120):
+            await writer.log(None, "update", {"n": i})
+        assert inserts == []
+        await asyncio.sleep(0.2)
+    finally:
+        await writer.stop()
+
+    assert count_logs(db) == 120
+    assert sorted(len(batch) for batch in inserts) == [20, 50, 50]
+
+@pytest.mark.asyncio
+async def test_stop_flushes_pending_events(db):
+    writer = ActivityLogWriter(batch_size=1000, flush_interval=60)
+    await writer.start()
+    for i in range(10):
+        await writer.log(None, "update", {"n": i})
+    await writer.stop()
+    assert count_logs(db) == 10
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_oldest_events(db):
+    writer = ActivityLogWriter(max_queue=5, flush_interval=60, overflow="drop_oldest")
+    await writer.start()
+    writer._task.cancel()  # simule un flusher bloqué
+    for i in range(8):
+        await writer.log(None, "update", {"n": i})
+    assert writer.dropped == 3
+    await writer.stop()
+
+    logged = [log["details"]["n"] for log in db.table("activity_logs").select("*").execute().data]
+    assert logged == [3, 4, 5, 6, 7]
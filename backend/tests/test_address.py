@@ -0,0 +1,66 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.services.address import backfill_locations, parse_address
+
+client = TestClient(app)
+
+@pytest.mark.parametrize("adresse,expected", [
+    ("12 rue de la Paix, 75002 PARIS", ("75002", "PARIS")),
+    ("3 avenue Foch, 92100 Boulogne-Billancourt", ("92100", "BOULOGNE-BILLANCOURT")),
+    ("Tour Europlaza, 20 avenue André Prothin, 92927 Paris La Défense Cedex", ("92927", "PARIS LA DÉFENSE")),
+    ("5 place du Marché 78000 Versailles", ("78000", "VERSAILLES")),
+    ("Zone d'activité 91000", ("91000", None)),
+    (None, (None, None)),
+])
+def test_parse_address(adresse, expected):
+    result = parse_address(adresse)
+    assert (result["code_postal"], result["ville"]) == expected
+
+@pytest.mark.asyncio
+async def test_backfill_and_cities_endpoint(db):
+    db.table("cabinets_comptables").insert([
+        {"siren": "111111111", "nom_entreprise": "A", "adresse": "1 rue A, 75001 Paris"},
+        {"siren": "222222222", "nom_entreprise": "B", "adresse": "2 rue B, 78000 VERSAILLES"},
+        {"siren": "333333333", "nom_entreprise": "C", "adresse": "3 rue C, 75008 PARIS"},
+        {"siren": "444444444", "nom_entreprise": "D", "adresse": "adresse inconnue"},
+    ]).execute()
+
+    assert await backfill_locations(db, batch_size=2) == 3
+
+    response = client.get(f"{settings.API_V1_STR}/stats/cities")
+    assert response.json() == {"cities": ["PARIS", "VERSAILLES"]}
+
+    response = client.post(f"{settings.API_V1_STR}/companies/filter", json={"ville": "Paris"})
+    assert sorted(c["siren"] for c in response.json()) == ["111111111", "333333333"]
+
+@pytest.mark.asyncio
+async def test_backfill_updates_each_location_once(db, table_calls):
+    db.table("cabinets_comptables").insert([
+        {"siren": f"10000000{i}", "nom_entreprise": f"Cabinet {i}", "adresse": f"{i} rue A, 75001 Paris"}
+        for i in range(4)
+    ] + [{"siren": "200000000", "nom_entreprise": "Cabinet V", "adresse": "1 rue B, 78000 Versailles"}]).execute()
+
+    assert await backfill_locations(db) == 5
+
+    assert sorted(update["ville"] for update in table_calls.writes["update"]) == ["PARIS", "VERSAILLES"]
+    rows = db.table("cabinets_comptables").select("*").execute().data
+    assert len(rows) == 5 and all(row["nom_entreprise"].startswith("Cabinet") for row in rows)
+
+def test_location_written_on_import_and_update(db):
+    csv = "siren;nom;adresse;cp;ville\n555555555;Cabinet E;4 rue E;91300;Massy\n".replace(";", ",")
+    response = client.post(
+        f"{settings.API_V1_STR}/companies/upload",
+        files={"file": ("import.csv", csv.encode(), "text/csv")},
+    )
+    assert response.json()["new_companies"] == 1
+    company = db.table("cabinets_comptables").select("*").eq("siren", "555555555").single().execute().data
+    assert (company["code_postal"], company["ville"]) == ("91300", "MASSY")
+
+    client.put(
+        f"{settings.API_V1_STR}/companies/555555555",
+        json={"adresse": "8 boulevard F, 94200 Ivry-sur-Seine"},
+    )
+    company = db.table("cabinets_comptables").select("*").eq("siren", "555555555").single().execute().data
+    assert (company["code_postal"], company["ville"]) == ("94200", "IVRY-SUR-SEINE")
@@ -0,0 +1,43 @@
+import time
+import pytest
+from datetime import timedelta
+from fastapi import HTTPException
+from app.core import auth
+from app.core.auth import VerifiedTokenCache, get_current_user
+from app.core.security import create_access_token
+
+@pytest.fixture
+def decode_calls(monkeypatch):
+    calls = []
+    decode = auth.jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *a, **kw: calls.append(a[0]) or decode(*a, **kw))
+    auth.token_cache.clear()
+    yield calls
+    auth.token_cache.clear()
+
+@pytest.mark.asyncio
+async def test_repeat_requests_skip_verification(decode_calls):
+    token = create_access_token({"sub": "admin"}, expires_delta=timedelta(minutes=5))
+    for _ in range(3):
+        assert await get_current_user(token) == {"username": "admin"}
+    assert len(decode_calls) == 1
+
+@pytest.mark.asyncio
+async def test_invalid_tokens_are_not_cached(decode_calls):
+    token = create_access_token({"sub": "admin"}, expires_delta=timedelta(minutes=5)) + "x"
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            await get_current_user(token)
+    assert len(decode_calls) == 2
+
+def test_cache_respects_expiry_and_size():
+    cache = VerifiedTokenCache(max_size=2)
+    cache.put("expired", {"sub": "a", "exp": time.time() - 1})
+    assert cache.get("expired") is None
+
+    cache.put("t1", {"sub": "a", "exp": time.time() + 60})
+    cache.put("t2", {"sub": "b", "exp": time.time() + 60})
+    cache.get("t1")
+    cache.put("t3", {"sub": "c", "exp": time.time() + 60})
+    assert cache.get("t2") is None
+    assert cache.get("t1")["sub"] == "a"
@@ -0,0 +1,40 @@
+import pytest
+from app.core.memory_db import MemoryDBError
+from benchmarks.bench_api import TRAFFIC_MIX, percentile, regressions, run_benchmark, seed_companies
+
+@pytest.mark.asyncio
+async def test_mixed_traffic_covers_every_read_route(db):
+    result = await run_benchmark(companies=300, requests=150, concurrency=4)
+
+    assert result["errors"] == 0
+    assert set(result["routes"]) == set(TRAFFIC_MIX)
+    for route in result["routes"].values():
+        assert 0 < route["p50_ms"] <= route["p95_ms"] <= route["p99_ms"] <= route["max_ms"]
+    assert result["requests_per_second"] > 0
+
+def test_regressions_compare_p95_to_baseline():
+    baseline = {"routes": {"stats": {"p95_ms": 100.0}, "company_detail": {"p95_ms": 10.0}}}
+    result = {"routes": {"stats": {"p95_ms": 150.0}, "company_detail": {"p95_ms": 11.0}}}
+
+    assert [r.split(":")[0] for r in regressions(result, baseline, tolerance=20)] == ["stats"]
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 99) == 4.0
+
+def test_seeded_rows_keep_unique_lookups_consistent(db):
+    sirens = seed_companies(db, 50)
+    table = db.table("cabinets_comptables")
+
+    with pytest.raises(MemoryDBError):
+        table.insert({"siren": sirens[0], "nom_entreprise": "Doublon"}).execute()
+
+    db.table("cabinets_comptables").update({"siren": "123456789"}).eq("siren", sirens[1]).execute()
+    assert db.table("cabinets_comptables").select("siren").eq("siren", sirens[1]).execute().data == []
+    assert len(db.table("cabinets_comptables").select("id").eq("siren", "123456789").execute().data) == 1
+
+    db.table("cabinets_comptables").delete().eq("siren", sirens[2]).execute()
+    db.table("cabinets_comptables").insert({"siren": sirens[2], "nom_entreprise": "Recréé"}).execute()
+    upserted = db.table("cabinets_comptables").upsert(
+        {"siren": sirens[2], "nom_entreprise": "Mis à jour"}, on_conflict="siren"
+    ).execute().data
+    assert upserted[0]["nom_entreprise"] == "Mis à jour"
+    assert len(db.table("cabinets_comptables").select("id").execute().data) == 50
@@ -0,0 +1,42 @@
+import pytest
+from benchmarks.bench_pappers import run_benchmark
+from benchmarks.fake_pappers import FakePappers
+
+def in_range_count(companies, departments):
+    fake = FakePappers(companies)
+    return sum(
+        3_000_000 <= fake.company(f"{dept}{i:07d}")["chiffre_affaires"] <= 50_000_000
+        for dept in departments for i in range(companies)
+    )
+
+@pytest.mark.asyncio
+async def test_offline_pappers_run_end_to_end(db):
+    result = await run_benchmark(companies=25, page_size=10, latency=0, departments=["75", "92"])
+
+    assert result["error"] is None
+    assert result["requests"]["recherche 200"] == 6
+    # Les résultats hors tranche de CA sont écartés sans appel de détail
+    in_range = in_range_count(25, ["75", "92"])
+    assert result["requests"]["entreprise 200"] == in_range
+    assert result["details_skipped"]["filtered"] == 50 - in_range
+    assert result["companies_created"] == result["companies_stored"] == in_range
+    assert result["companies_per_second"] > 0
+    assert result["peak_python_memory_mb"] > 0
+
+@pytest.mark.asyncio
+async def test_injected_errors_are_reported(db):
+    result = await run_benchmark(companies=20, page_size=20, latency=0, error_rate=0.3, departments=["75"])
+
+    errors = sum(count for name, count in result["requests"].items() if not name.endswith(" 200"))
+    assert errors > 0
+    assert result["companies_created"] < 20
+
+@pytest.mark.asyncio
+async def test_second_run_reads_details_from_disk_cache(db, tmp_path):
+    first = await run_benchmark(companies=10, page_size=10, latency=0, departments=["75"], detail_cache_dir=str(tmp_path))
+    second = await run_benchmark(companies=10, page_size=10, latency=0, departments=["75"], detail_cache_dir=str(tmp_path))
+
+    assert first["requests"]["entreprise 200"] > 0
+    assert "entreprise 200" not in second["requests"]
+    assert second["details_skipped"]["cache"] == first["requests"]["entreprise 200"]
+    assert second["companies_created"] == first["companies_created"]
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import pytest
+from app.scrapers.browser import BrowserPool, process_tree_rss
+from app.scrapers.metrics import ScraperMetrics
+
+class FakeContext:
+    def __init__(self, browser, options):
+        self.browser = browser
+        self.options = options
+        self.closed = False
+
+    async def add_init_script(self, script):
+        self.script = script
+
+    async def new_page(self):
+        return (self, object())
+
+    async def close(self):
+        self.closed = True
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+        self.closed = False
+
+    async def new_context(self, **options):
+        self.contexts.append(FakeContext(self, options))
+        return self.contexts[-1]
+
+    async def close(self):
+        self.closed = True
+
+class FakePlaywright:
+    def __init__(self):
+        self.browsers = []
+        self.stopped = False
+        self.chromium = self
+
+    async def launch(self, **options):
+        self.browsers.append(FakeBrowser())
+        return self.browsers[-1]
+
+    async def stop(self):
+        self.stopped = True
+
+def make_pool(memory=lambda: 100_000_000, **kwargs):
+    driver = FakePlaywright()
+
+    async def start_playwright():
+        return driver
+
+    pool = BrowserPool(
+        tabs=2, launch_options={"headless": True}, context_options=lambda: {"locale": "fr-FR"},
+        init_script="// anti-détection", start_playwright=start_playwright, memory_usage=memory, **kwargs
+    )
+    return pool, driver
+
+@pytest.mark.asyncio
+async def test_context_is_recycled_after_max_pages_once_tabs_are_returned():
+    pool, driver = make_pool(max_pages=3)
+    await pool.start()
+    first_context = pool.context
+
+    async def load(delay):
+        async with pool.page() as (context, _):
+            await asyncio.sleep(delay)
+            return context
+
+    used = await asyncio.gather(load(0.01), load(0.02), load(0), load(0))
+
+    assert used[:2] == [first_context, first_context]
+    assert first_context.closed
+    assert pool.context is not first_context and pool.context.script == "// anti-détection"
+    assert pool.context_recycles == 1 and pool.browser_restarts == 0
+    assert len(driver.browsers) == 1
+
+@pytest.mark.asyncio
+async def test_browser_restarts_over_memory_threshold_and_close_stops_driver():
+    metrics = ScraperMetrics("societe")
+    readings = iter([2_000_000_000, 300_000_000])
+    pool, driver = make_pool(memory=lambda: next(readings), max_memory_mb=1500, memory_check_every=1, metrics=metrics)
+    await pool.start()
+
+    async with pool.page():
+        pass
+    assert pool.browser_restarts == 1
+    assert driver.browsers[0].closed and len(driver.browsers) == 2
+    assert metrics.snapshot()["browser"] == {"memory_mb": 2000.0, "context_recycles": 1, "browser_restarts": 1}
+
+    async with pool.page():
+        pass
+    assert pool.browser_restarts == 1
+    assert metrics.snapshot()["browser"]["memory_mb"] == 300.0
+
+    await pool.close()
+    assert driver.browsers[1].closed and driver.stopped
+
+def test_process_tree_rss_counts_child_processes():
+    if not os.path.isdir("/proc"):
+        pytest.skip("/proc indisponible")
+    import subprocess
+    child = subprocess.Popen(["sleep", "5"])
+    try:
+        assert process_tree_rss(os.getpid()) > 0
+        assert process_tree_rss(child.pid) == 0
+    finally:
+        child.kill()
+        child.wait()
+
+@pytest.mark.asyncio
+async def test_callers_waiting_during_a_recycle_do_not_recycle_again(monkeypatch):
+    pool, driver = make_pool(max_pages=2)
+    await pool.start()
+    pool.pages_loaded = 2
+
+    async def slow_close(self):
+        # Fermeture réelle: le verrou est tenu pendant l'attente
+        await asyncio.sleep(0.01)
+        self.closed = True
+
+    monkeypatch.setattr(FakeContext, "close", slow_close)
+    # Deux appelants ont franchi le seuil; le second attend le verrou pendant le recyclage du premier
+    await asyncio.gather(pool._maybe_recycle(), pool._maybe_recycle())
+
+    assert pool.context_recycles == 1
+    assert len(driver.browsers[0].contexts) == 2
@@ -0,0 +1,52 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+
+client = TestClient(app)
+URL = f"{settings.API_V1_STR}/companies/bulk"
+
+def seed(db, count):
+    db.table("cabinets_comptables").insert([
+        {"siren": f"{i:09d}", "nom_entreprise": f"Cabinet {i}", "chiffre_affaires": i * 1000000}
+        for i in range(1, count + 1)
+    ]).execute()
+
+def statuses(db):
+    return {c["siren"]: c["statut"] for c in db.table("cabinets_comptables").select("siren, statut").execute().data}
+
+def test_bulk_items_are_grouped_into_few_statements(db, table_calls):
+    seed(db, 450)
+    table_calls.clear()
+
+    items = [{"siren": f"{i:09d}", "statut": "en discussion"} for i in range(1, 451)]
+    items.append({"siren": "999999999", "statut": "en discussion"})
+    items.append({"siren": "000000001", "statut": "abandonné", "telephone": "0102030405"})
+
+    response = client.post(URL, json={"items": items[1:]})
+
+    assert response.status_code == 200
+    assert response.json() == {"updated": 450, "not_found": ["999999999"]}
+    assert len(table_calls.writes["update"]) == 4  # 3 lots de 200 pour le premier patch, 1 pour le second
+
+    current = statuses(db)
+    assert current["000000002"] == "en discussion"
+    assert current["000000001"] == "abandonné"
+
+    logs = db.table("activity_logs").select("*").execute().data
+    assert len(logs) == 1
+    assert logs[0]["action"] == "bulk_update"
+    assert logs[0]["details"]["count"] == 450
+
+def test_bulk_patch_by_filter(db):
+    seed(db, 10)
+    response = client.post(URL, json={"filters": {"ca_min": 6000000}, "patch": {"statut": "en négociation"}})
+    assert response.json()["updated"] == 5
+    assert sorted(s for s, statut in statuses(db).items() if statut == "en négociation") == [f"{i:09d}" for i in range(6, 11)]
+
+def test_bulk_patch_requires_a_filter(db):
+    seed(db, 3)
+    for filters in ({}, {"ca_min": 0}, {"search": ""}, {"search": "   "}, {"ville": ""}, {"effectif_min": 0}):
+        response = client.post(URL, json={"filters": filters, "patch": {"statut": "abandonné"}})
+        assert response.status_code == 400, filters
+    statuts = {row["statut"] for row in db.table("cabinets_comptables").select("statut").execute().data}
+    assert "abandonné" not in statuts
@@ -0,0 +1,80 @@
+import time
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.core import cache
+from app.core.cache import InvalidationBatch, MemoryLRUCache, ResponseCache
+
+client = TestClient(app)
+
+def test_etag_and_conditional_get(db):
+    db.table("cabinets_comptables").insert({"siren": "123456789", "nom_entreprise": "Cabinet A"}).execute()
+    url = f"{settings.API_V1_STR}/companies/"
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.headers["x-cache"] == "MISS"
+    etag = first.headers["etag"]
+
+    second = client.get(url)
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json()
+
+    not_modified = client.get(url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+def test_writes_invalidate_cached_responses(db):
+    db.table("cabinets_comptables").insert({"siren": "123456789", "nom_entreprise": "Cabinet A"}).execute()
+    url = f"{settings.API_V1_STR}/companies/123456789"
+
+    etag = client.get(url).headers["etag"]
+    client.put(url, json={"statut": "en discussion"})
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["statut"] == "en discussion"
+
+def test_query_params_are_part_of_the_key(db):
+    url = f"{settings.API_V1_STR}/companies/"
+    client.get(url, params={"skip": 0, "limit": 10})
+    assert client.get(url, params={"limit": 10, "skip": 0}).headers["x-cache"] == "HIT"
+    assert client.get(url, params={"limit": 5, "skip": 0}).headers["x-cache"] == "MISS"
+
+def test_lru_eviction_and_ttl():
+    cache = MemoryLRUCache(max_entries=2)
+    cache.set("a", {"v": 1}, ttl=60)
+    cache.set("b", {"v": 2}, ttl=60)
+    cache.get("a")
+    cache.set("c", {"v": 3}, ttl=60)
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+
+    cache.set("d", {"v": 4}, ttl=0)
+    time.sleep(0.01)
+    assert cache.get("d") is None
+
+def test_invalidation_from_another_worker_discards_in_flight_responses():
+    # Deux workers partageant un backend (comme avec Redis)
+    backend = MemoryLRUCache()
+    reader, writer = ResponseCache(backend, ttl=60), ResponseCache(backend, ttl=60)
+
+    generation = reader.current_generation()
+    writer.invalidate()
+    reader.set("/companies/?", {"body": "avant écriture"}, generation)
+
+    assert reader.get("/companies/?", reader.current_generation()) is None
+    assert writer.get("/companies/?", writer.current_generation()) is None
+
+def test_bulk_writes_invalidate_once_per_batch(monkeypatch):
+    cleared = []
+    monkeypatch.setattr(cache, "invalidate_cache", lambda: cleared.append(1))
+    batch = InvalidationBatch(batch_size=3)
+
+    for _ in range(7):
+        batch.add()
+    assert len(cleared) == 2
+    batch.flush()
+    batch.flush()
+    assert len(cleared) == 3
@@ -0,0 +1,165 @@
+import asyncio
+import pytest
+from aiohttp import web
+from app.models.schemas import ScrapingStatus
+from app.scrapers.circuit import CircuitOpenError, HostGuard
+from app.scrapers.pappers import PappersAPIClient
+from app.scrapers.societe import SocieteScraper
+
+class HTTPError(Exception):
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.headers = headers or {}
+
+async def call(guard, failure=None, error=None):
+    async with guard.request() as request:
+        if error:
+            raise error
+        if failure:
+            request.fail(failure)
+
+@pytest.mark.asyncio
+async def test_aimd_halves_once_per_window_and_grows_back():
+    guard = HostGuard("test", max_concurrency=8, min_requests=100)
+    # Trois échecs de requêtes parties ensemble: une seule diminution
+    seqs = [await guard.acquire() for _ in range(3)]
+    for seq in seqs:
+        await guard.release(seq, "http_5xx")
+    assert guard.limit == 4
+
+    with pytest.raises(HTTPError):
+        await call(guard, error=HTTPError(503))
+    assert guard.limit == 2
+    # +1 après « limite » succès: de 2 à 8 en une trentaine de requêtes
+    for _ in range(30):
+        await call(guard)
+    assert guard.limit == 8
+    # Un 404 ne dit rien de la santé de l'hôte
+    with pytest.raises(HTTPError):
+        await call(guard, error=HTTPError(404))
+    assert guard.limit == 8 and guard.state == "closed"
+
+@pytest.mark.asyncio
+async def test_limit_caps_requests_in_flight():
+    guard = HostGuard("test", max_concurrency=2)
+    in_flight, peak = 0, 0
+
+    async def request():
+        nonlocal in_flight, peak
+        async with guard.request():
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    await asyncio.gather(*(request() for _ in range(6)))
+    assert peak == 2
+    assert guard.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_block_opens_then_half_open_probe_closes():
+    guard = HostGuard("test", max_concurrency=4, open_seconds=0.05)
+    with pytest.raises(HTTPError):
+        await call(guard, error=HTTPError(429, {"Retry-After": "0.1"}))
+    assert guard.state == "open"
+    assert guard.snapshot()["open_for_seconds"] > 0
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await call(guard)
+    # Retry-After (0.1 s) respecté plutôt que la pause par défaut
+    assert loop.time() - start >= 0.09
+    assert guard.state == "closed" and guard.trips == 0
+
+@pytest.mark.asyncio
+async def test_error_rate_trips_and_repeated_blocks_give_up():
+    guard = HostGuard("test", window=10, min_requests=4, error_rate=0.5, open_seconds=0.01, max_trips=2)
+    await call(guard)
+    await call(guard)
+    await call(guard, failure="timeout")
+    assert guard.state == "closed"
+    await call(guard, failure="timeout")
+    assert guard.state == "open"
+
+    # Chaque essai semi-ouvert échoue: la pause double puis les appelants abandonnent
+    await call(guard, failure="captcha")
+    assert guard.trips == 2
+    await call(guard, failure="captcha")
+    with pytest.raises(CircuitOpenError):
+        await call(guard)
+
+class CaptchaPage:
+    def __init__(self):
+        self.visits = 0
+
+    async def goto(self, url, wait_until=None):
+        self.visits += 1
+
+    def locator(self, selector):
+        return self
+
+    async def count(self):
+        return 1
+
+class FakePool:
+    def __init__(self, page):
+        self._page = page
+
+    def page(self):
+        page = self._page
+
+        class Lease:
+            async def __aenter__(self):
+                return page
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Lease()
+
+    async def close(self):
+        pass
+
+@pytest.mark.asyncio
+async def test_societe_captcha_stops_the_crawl(db, monkeypatch):
+    scraper = SocieteScraper(db)
+    scraper.guard.max_trips = 1
+    page = CaptchaPage()
+
+    async def setup_browser():
+        scraper.browser_pool = FakePool(page)
+
+    async def no_delay(*args):
+        pass
+
+    monkeypatch.setattr(scraper, "_setup_browser", setup_browser)
+    monkeypatch.setattr(scraper, "_random_delay", no_delay)
+    status = ScrapingStatus(is_running=True, progress=0, message="")
+
+    await scraper.run_full_scraping(status)
+
+    assert status.error == "Société.com bloque le scraping (captcha)"
+    assert status.metrics["errors"] == {"captcha": 2}
+    assert status.metrics["host"]["state"] == "open"
+    # Plus aucune page demandée après l'abandon: les 7 autres départements ne sont pas visités
+    assert page.visits == 2
+
+@pytest.mark.asyncio
+async def test_pappers_saves_search_data_once_the_breaker_gives_up(db, pappers_stub):
+    async def recherche(request):
+        results = [{"siren": f"10000000{i}", "nom_entreprise": f"Cabinet {i}", "chiffre_affaires": 5000000} for i in range(4)]
+        return web.json_response({"resultats": results, "total": 4, "par_page": 100})
+
+    async def entreprise(request):
+        return web.json_response({"error": "quota"}, status=429)
+
+    await pappers_stub(recherche, entreprise)
+    client = PappersAPIClient(db)
+    client.guard.max_trips = 1
+    status = ScrapingStatus(is_running=True, progress=0, message="")
+    await client.run_full_scraping(status)
+
+    # Aucune fiche perdue: toutes écrites depuis la recherche, sans erreur d'étape
+    assert status.metrics["companies"] == {"created": 4}
+    assert status.metrics["details_skipped"]["circuit"] >= 1
+    assert len(db.table("cabinets_comptables").select("siren").execute().data) == 4
@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+
+client = TestClient(app)
+
+def seed_company_with_logs(db, log_count=12):
+    company = db.table("cabinets_comptables").insert({"siren": "123456789", "nom_entreprise": "Cabinet A"}).execute().data[0]
+    db.table("activity_logs").insert([
+        {"cabinet_id": company["id"], "action": "update", "details": {"n": i}, "created_at": f"2024-01-{i + 1:02d}T00:00:00"}
+        for i in range(log_count)
+    ]).execute()
+    return company
+
+def test_detail_embeds_latest_logs_in_one_query(db, table_calls):
+    seed_company_with_logs(db)
+    table_calls.clear()
+    response = client.get(f"{settings.API_V1_STR}/companies/123456789")
+
+    assert response.status_code == 200
+    assert table_calls == ["cabinets_comptables"]
+    logs = response.json()["activity_logs"]
+    assert len(logs) == 10
+    assert [log["details"]["n"] for log in logs] == list(range(11, 1, -1))
+
+def test_detail_returns_404_for_unknown_siren(db):
+    response = client.get(f"{settings.API_V1_STR}/companies/000000000")
+    assert response.status_code == 404
+
+def test_delete_logs_and_removes_company(db):
+    seed_company_with_logs(db, log_count=2)
+
+    response = client.delete(f"{settings.API_V1_STR}/companies/123456789")
+    assert response.status_code == 200
+    assert db.table("cabinets_comptables").select("id").execute().data == []
+
+    logs = db.table("activity_logs").select("*").eq("action", "delete").execute().data
+    assert logs[0]["details"] == {"siren": "123456789", "nom_entreprise": "Cabinet A"}
+    assert all(log["cabinet_id"] is None for log in db.table("activity_logs").select("*").execute().data)
+
+    assert client.delete(f"{settings.API_V1_STR}/companies/123456789").status_code == 404
@@ -0,0 +1,133 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from app.scrapers.infogreffe import InfogreffeClient
+from app.services.enrichment import EnrichmentService
+from app.models.schemas import ScrapingStatus
+from app.api.routes import scraping
+from app.config import settings
+from app.core.memory_db import MemoryQueryBuilder
+
+REGISTRY = {
+    "111111111": {"siren": "111111111", "ca_1": "32000000", "resultat_1": "4000000", "effectif_1": "80", "ca_2": "30000000"},
+    "222222222": {"siren": "222222222", "ca_1": "12500000", "resultat_1": "150000", "effectif_1": "25"},
+}
+# SIREN pour lequel le faux registre répond 500
+UNAVAILABLE_SIREN = "333333333"
+
+@pytest_asyncio.fixture
+async def registry_server():
+    """Serveur local imitant l'API open data Infogreffe"""
+    state = {"in_flight": 0, "max_in_flight": 0, "requests": 0}
+
+    async def records(request):
+        state["requests"] += 1
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        await asyncio.sleep(0.02)
+        state["in_flight"] -= 1
+        siren = request.query["where"].split('"')[1]
+        if siren == UNAVAILABLE_SIREN:
+            return web.json_response({"error": "internal"}, status=500)
+        record = REGISTRY.get(siren)
+        return web.json_response({"total_count": int(bool(record)), "results": [record] if record else []})
+
+    app = web.Application()
+    app.router.add_get("/records", records)
+    server = TestServer(app)
+    await server.start_server()
+    yield str(server.make_url("/records")), state
+    await server.close()
+
+def seed(db, count=12):
+    rows = [
+        {"siren": "111111111", "nom_entreprise": "Cabinet Alpha", "chiffre_affaires": 11000000},
+        {"siren": "222222222", "nom_entreprise": "Cabinet Beta", "chiffre_affaires": 12000000},
+    ]
+    rows += [
+        {"siren": f"9{i:08d}", "nom_entreprise": f"Cabinet {i}", "chiffre_affaires": 15000000}
+        for i in range(count - 2)
+    ]
+    db.table("cabinets_comptables").insert(rows).execute()
+
+@pytest.mark.asyncio
+async def test_enrichment_merges_registry_data(db, registry_server):
+    url, state = registry_server
+    seed(db)
+    status = ScrapingStatus(is_running=True, progress=0, message="")
+
+    service = EnrichmentService(db, concurrency=3, batch_size=5)
+    async with InfogreffeClient(base_url=url) as registry:
+        result = await service.enrich_companies(lookup=registry.lookup, status_tracker=status)
+
+    assert result["total_processed"] == 12
+    assert result["enriched_count"] == 12
+    assert result["registry_matches"] == 2
+    assert state["requests"] == 12
+    assert 1 < state["max_in_flight"] <= 3
+    assert status.progress == 100
+
+    alpha = db.table("cabinets_comptables").select("*").eq("siren", "111111111").single().execute().data
+    assert alpha["chiffre_affaires"] == 32000000
+    assert alpha["effectif"] == 80
+    assert alpha["details_complets"]["infogreffe"]["chiffre_affaires_n1"] == 30000000
+    assert alpha["score_prospection"] is not None
+
+@pytest.mark.asyncio
+async def test_enrichment_updates_only_enriched_columns(db, registry_server, table_calls):
+    url, _ = registry_server
+    seed(db)
+    service = EnrichmentService(db, concurrency=4, batch_size=5)
+    async with InfogreffeClient(base_url=url) as registry:
+        await service.enrich_companies(lookup=registry.lookup)
+
+    calls = table_calls.writes["update"]
+    # Les lignes au contenu identique partagent une requête; l'identité n'est jamais réécrite
+    assert 2 < len(calls) < 12
+    assert all("siren" not in payload and "nom_entreprise" not in payload for payload in calls)
+    rows = db.table("cabinets_comptables").select("*").execute().data
+    assert all(row["score_prospection"] is not None for row in rows)
+
+@pytest.mark.asyncio
+async def test_enrichment_counts_failed_writes(db, registry_server, monkeypatch):
+    url, _ = registry_server
+    seed(db)
+    update = MemoryQueryBuilder.update
+
+    def failing_update(self, json, **kwargs):
+        if json.get("chiffre_affaires") == 32000000:
+            raise RuntimeError("connexion perdue")
+        return update(self, json, **kwargs)
+
+    monkeypatch.setattr(MemoryQueryBuilder, "update", failing_update)
+    service = EnrichmentService(db, concurrency=4, batch_size=5)
+    async with InfogreffeClient(base_url=url) as registry:
+        result = await service.enrich_companies(lookup=registry.lookup)
+
+    assert result["enriched_count"] == 11
+    assert result["write_errors"] == 1
+    alpha = db.table("cabinets_comptables").select("*").eq("siren", "111111111").single().execute().data
+    assert alpha["chiffre_affaires"] == 11000000
+
+@pytest.mark.asyncio
+async def test_registry_outage_is_counted_not_hidden(db, registry_server, monkeypatch):
+    url, _ = registry_server
+    seed(db)
+    db.table("cabinets_comptables").insert(
+        {"siren": UNAVAILABLE_SIREN, "nom_entreprise": "Cabinet Gamma", "chiffre_affaires": 13000000}
+    ).execute()
+    monkeypatch.setattr(settings, "INFOGREFFE_API_URL", url)
+
+    service = EnrichmentService(db, concurrency=3, batch_size=5)
+    async with InfogreffeClient(base_url=url) as registry:
+        result = await service.enrich_companies(lookup=registry.lookup)
+
+    assert result["registry_errors"] == 1
+    assert result["enriched_count"] == 12
+    gamma = db.table("cabinets_comptables").select("*").eq("siren", UNAVAILABLE_SIREN).single().execute().data
+    assert gamma.get("score_prospection") is None
+
+    await scraping.run_infogreffe_enrichment(db, min_ca=10000000, min_score=0)
+    assert scraping.scraping_status["infogreffe"].metrics["registry_errors"] == 1
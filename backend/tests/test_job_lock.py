@@ -0,0 +1,73 @@
+import asyncio
+import subprocess
+import sys
+import pytest
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.core.job_lock import JobLease, SQLiteLeaseStore, get_job_locks
+from app.main import app
+
+def test_lease_is_exclusive_until_it_expires(tmp_path):
+    store = SQLiteLeaseStore(str(tmp_path / "locks.sqlite3"))
+
+    assert store.acquire("pappers", "worker-a", ttl=60)
+    assert not store.acquire("pappers", "worker-b", ttl=60)
+    assert store.acquire("societe", "worker-b", ttl=60)
+    assert store.current("pappers")["holder"] == "worker-a"
+
+    # Holder mort: son bail expiré est repris, et son heartbeat échoue ensuite
+    assert store.acquire("refresh", "worker-a", ttl=0)
+    assert store.acquire("refresh", "worker-b", ttl=60)
+    assert not store.renew("refresh", "worker-a", ttl=60)
+
+    store.release("pappers", "worker-b")
+    assert store.current("pappers")["holder"] == "worker-a"
+    store.release("pappers", "worker-a")
+    assert store.acquire("pappers", "worker-b", ttl=60)
+
+def test_lease_held_by_another_process(tmp_path):
+    path = str(tmp_path / "locks.sqlite3")
+    code = (
+        "import sys; from app.core.job_lock import SQLiteLeaseStore; "
+        "sys.exit(0 if SQLiteLeaseStore(sys.argv[1]).acquire('pappers', 'other', 60) else 1)"
+    )
+    assert subprocess.run([sys.executable, "-c", code, path]).returncode == 0
+
+    assert not SQLiteLeaseStore(path).acquire("pappers", "me", ttl=60)
+    assert subprocess.run([sys.executable, "-c", code, path]).returncode == 0  # même détenteur: renouvelé
+
+@pytest.mark.asyncio
+async def test_heartbeat_extends_lease_and_loss_stops_the_job(tmp_path):
+    store = SQLiteLeaseStore(str(tmp_path / "locks.sqlite3"))
+    assert store.acquire("pappers", "me", ttl=1)
+    lease = JobLease(store, "pappers", "me", ttl=1, heartbeat_interval=0.02)
+    first_expiry = store.current("pappers")["expires_at"]
+    finished = False
+
+    async def job():
+        nonlocal finished
+        async with lease:
+            await asyncio.sleep(0.1)
+            assert store.current("pappers")["expires_at"] > first_expiry
+            # Un autre worker reprend le bail (ex: heartbeat bloqué au-delà du TTL)
+            store.release("pappers", "me")
+            store.acquire("pappers", "other", ttl=60)
+            await asyncio.sleep(5)
+            finished = True
+
+    await asyncio.wait_for(job(), timeout=2)
+    assert lease.lost and not finished
+    # Le bail repris n'est pas libéré par l'ancien détenteur
+    assert store.current("pappers")["holder"] == "other"
+
+def test_start_route_refuses_when_another_worker_holds_the_lease():
+    client = TestClient(app)
+    token = client.post(f"{settings.API_V1_STR}/auth/login", json={"username": "admin", "password": "secret"}).json()["access_token"]
+    locks = get_job_locks()
+    assert locks.store.acquire("societe", "autre-worker", ttl=60)
+    try:
+        response = client.post(f"{settings.API_V1_STR}/scraping/societe", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 400
+        assert "another worker" in response.json()["detail"]
+    finally:
+        locks.store.release("societe", "autre-worker")
@@ -0,0 +1,94 @@
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.api.routes.auth import authenticate_user
+from app.main import app
+from app.config import settings
+from app.core import security
+from app.core.security import LoginThrottle, login_throttle, verify_password_async
+
+client = TestClient(app)
+LOGIN_URL = f"{settings.API_V1_STR}/auth/login"
+
+@pytest.fixture(autouse=True)
+def clear_throttle():
+    login_throttle._attempts.clear()
+    yield
+    login_throttle._attempts.clear()
+
+def test_failed_logins_are_throttled_per_user():
+    for _ in range(settings.LOGIN_MAX_ATTEMPTS_PER_USER):
+        response = client.post(LOGIN_URL, json={"username": "admin", "password": "wrong"})
+        assert response.status_code == 401
+
+    response = client.post(LOGIN_URL, json={"username": "admin", "password": "secret"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+def test_successful_login_resets_user_counter():
+    for _ in range(settings.LOGIN_MAX_ATTEMPTS_PER_USER - 1):
+        client.post(LOGIN_URL, json={"username": "admin", "password": "wrong"})
+    assert client.post(LOGIN_URL, json={"username": "admin", "password": "secret"}).status_code == 200
+    assert client.post(LOGIN_URL, json={"username": "admin", "password": "wrong"}).status_code == 401
+
+def test_throttle_window_expires(monkeypatch):
+    throttle = LoginThrottle(window_seconds=10)
+    now = time.monotonic()
+    monkeypatch.setattr(security.time, "monotonic", lambda: now)
+    throttle.record("ip:1.2.3.4", "ip:1.2.3.4")
+    assert throttle.retry_after([("ip:1.2.3.4", 2)]) == 11
+    assert throttle.retry_after([("ip:1.2.3.4", 3)]) == 0
+
+    monkeypatch.setattr(security.time, "monotonic", lambda: now + 10.5)
+    assert throttle.retry_after([("ip:1.2.3.4", 2)]) == 0
+
+@pytest.mark.asyncio
+async def test_verification_does_not_block_event_loop():
+    hashed = security.get_password_hash("secret")
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    task = asyncio.create_task(ticker())
+    assert await verify_password_async("secret", hashed)
+    task.cancel()
+    assert ticks > 1
+
+@pytest.mark.asyncio
+async def test_concurrent_attempts_are_throttled_before_bcrypt(monkeypatch):
+    verifications = 0
+    verify = security.verify_password
+
+    def counting_verify(plain, hashed):
+        nonlocal verifications
+        verifications += 1
+        return verify(plain, hashed)
+
+    monkeypatch.setattr(security, "verify_password", counting_verify)
+    request = SimpleNamespace(client=SimpleNamespace(host="10.0.0.1"))
+    results = await asyncio.gather(
+        *(authenticate_user("admin", "wrong", request) for _ in range(50)), return_exceptions=True
+    )
+
+    throttled = [r for r in results if isinstance(r, HTTPException) and r.status_code == 429]
+    assert len(throttled) == 50 - settings.LOGIN_MAX_ATTEMPTS_PER_USER
+    assert verifications == settings.LOGIN_MAX_ATTEMPTS_PER_USER
+
+@pytest.mark.asyncio
+async def test_full_hash_queue_answers_429(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 2)
+    results = await asyncio.gather(*(
+        authenticate_user("admin", "wrong", SimpleNamespace(client=SimpleNamespace(host=f"10.0.2.{i}")))
+        for i in range(4)
+    ), return_exceptions=True)
+    busy = [r for r in results if isinstance(r, HTTPException) and r.status_code == 429]
+    assert len(busy) == 2
+    # Tentatives refusées faute de place: non comptées contre l'utilisateur
+    assert len(login_throttle._attempts["user:admin"]) == 2
@@ -0,0 +1,57 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.core.metrics import Histogram, http_db_queries, http_requests, db_queries
+
+client = TestClient(app)
+DETAIL_ROUTE = f"{settings.API_V1_STR}/companies/{{siren}}"
+
+def test_requests_are_labelled_by_route_template(db):
+    db.table("cabinets_comptables").insert({"siren": "123456789", "nom_entreprise": "Cabinet A"}).execute()
+    before = http_requests.value(method="GET", route=DETAIL_ROUTE, status=200)
+    queries_before = http_db_queries.total(method="GET", route=DETAIL_ROUTE)
+
+    response = client.get(f"{settings.API_V1_STR}/companies/123456789")
+
+    assert response.status_code == 200
+    assert 'desc="1 queries"' in response.headers["server-timing"]
+    assert http_requests.value(method="GET", route=DETAIL_ROUTE, status=200) == before + 1
+    assert http_db_queries.total(method="GET", route=DETAIL_ROUTE) == queries_before + 1
+
+def test_cache_hits_keep_their_route_label(db):
+    db.table("cabinets_comptables").insert({"siren": "123456789", "nom_entreprise": "Cabinet A"}).execute()
+    url = f"{settings.API_V1_STR}/companies/123456789"
+    assert client.get(url).headers["x-cache"] == "MISS"
+    before = http_requests.value(method="GET", route=DETAIL_ROUTE, status=200)
+    unmatched = http_requests.value(method="GET", route="unmatched", status=200)
+
+    assert client.get(url).headers["x-cache"] == "HIT"
+
+    assert http_requests.value(method="GET", route=DETAIL_ROUTE, status=200) == before + 1
+    assert http_requests.value(method="GET", route="unmatched", status=200) == unmatched
+
+def test_db_queries_are_counted_by_table_and_operation(db):
+    before = db_queries.value(table="cabinets_comptables", operation="insert")
+    db.table("cabinets_comptables").insert({"siren": "123456789", "nom_entreprise": "Cabinet A"}).execute()
+    assert db_queries.value(table="cabinets_comptables", operation="insert") == before + 1
+
+def test_metrics_endpoint_renders_prometheus_text(db):
+    client.get("/")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in response.text
+    assert "/metrics" not in response.text.split("# TYPE http_requests_total")[1].split("# TYPE")[0]
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_seconds", "test", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, route="/x")
+
+    lines = histogram.render()
+    assert 'test_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/x",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{route="/x"} 3' in lines
@@ -0,0 +1,124 @@
+import pytest
+import pytest_asyncio
+from collections import Counter
+from aiohttp import web
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.main import app
+from app.models.schemas import ScrapingStatus
+from app.scrapers.orchestrator import CrawlOrchestrator
+from app.scrapers.pappers import PappersAPIClient
+from app.scrapers.societe import SocieteScraper
+
+PAPPERS_RESULTS = [
+    {"siren": "111111111", "nom_entreprise": "Cabinet Alpha", "chiffre_affaires": 5000000},
+    {"siren": "222222222", "nom_entreprise": "Cabinet Beta", "chiffre_affaires": 6000000},
+    {"siren": "333333333", "nom_entreprise": "Cabinet Trop Gros", "chiffre_affaires": 90000000},
+]
+SOCIETE_RESULTS = [
+    {"siren": "222222222", "nom_entreprise": "CABINET BETA", "url": "https://www.societe.com/societe/beta/222222222.html"},
+    {"siren": "444444444", "nom_entreprise": "Cabinet Delta", "url": "https://www.societe.com/societe/delta/444444444.html"},
+    {"siren": "555555555", "nom_entreprise": "Cabinet Connu", "url": "https://www.societe.com/societe/connu/555555555.html"},
+]
+
+@pytest_asyncio.fixture
+async def sources(monkeypatch, pappers_stub):
+    """Faux Pappers (serveur local) et faux Société.com (méthodes remplacées); compte les fiches ouvertes"""
+    fetched = Counter()
+
+    async def recherche(request):
+        return web.json_response({"resultats": [dict(r) for r in PAPPERS_RESULTS], "total": 3, "par_page": 100})
+
+    async def entreprise(request):
+        siren = request.query["siren"]
+        fetched["pappers", siren] += 1
+        return web.json_response({"siren": siren, "effectif": 40, "adresse_ligne_1": "1 rue de Rivoli",
+                                  "code_postal": "75001", "ville": "Paris", "chiffre_affaires": 5000000})
+
+    await pappers_stub(recherche, entreprise)
+
+    async def setup_browser(self):
+        pass
+
+    async def discover_companies(self, status_tracker, departments):
+        for company in SOCIETE_RESULTS:
+            if company["siren"] not in self.existing_sirens:
+                yield dict(company)
+
+    async def fetch_company(self, company_info):
+        fetched["societe", company_info["siren"]] += 1
+        return {"siren": company_info["siren"], "nom_entreprise": company_info["nom_entreprise"],
+                "forme_juridique": "SAS", "chiffre_affaires": 4000000, "lien_societe_com": company_info["url"]}
+
+    monkeypatch.setattr(SocieteScraper, "_setup_browser", setup_browser)
+    monkeypatch.setattr(SocieteScraper, "discover_companies", discover_companies)
+    monkeypatch.setattr(SocieteScraper, "fetch_company", fetch_company)
+    return fetched
+
+def stored(db):
+    return {row["siren"]: row for row in db.table("cabinets_comptables").select("*").execute().data}
+
+@pytest.mark.asyncio
+async def test_each_company_is_fetched_once_from_the_cheapest_source(db, sources, monkeypatch):
+    monkeypatch.setenv("PAPPERS_API_KEY", "test")
+    db.table("cabinets_comptables").insert({"siren": "555555555", "nom_entreprise": "Cabinet Connu"}).execute()
+    status = ScrapingStatus(is_running=True, progress=0, message="")
+
+    report = await CrawlOrchestrator(db).run(status)
+
+    # Pappers couvre tous les champs manquants au moindre coût; le SIREN hors tranche n'est pas ouvert
+    assert sources == Counter({("pappers", "111111111"): 1, ("pappers", "222222222"): 1, ("pappers", "444444444"): 1})
+    assert report["fetches"] == {"pappers": 3, "societe": 0}
+    assert report["created"] == 3 and report["filtered"] == 1
+    assert report["fetches_per_company"] == 1.0
+    rows = stored(db)
+    assert set(rows) == {"111111111", "222222222", "444444444", "555555555"}
+    assert rows["444444444"]["effectif"] == 40 and rows["444444444"]["ville"] == "PARIS"
+    assert status.new_companies == 3 and status.progress == 100 and status.error is None
+
+@pytest.mark.asyncio
+async def test_falls_back_to_societe_when_pappers_cannot_fetch(db, sources, monkeypatch):
+    monkeypatch.setenv("PAPPERS_API_KEY", "")
+    status = ScrapingStatus(is_running=True, progress=0, message="")
+
+    report = await CrawlOrchestrator(db).run(status)
+
+    # Sans clé, seules les fiches dont Société.com connaît l'URL sont ouvertes
+    assert set(sources) <= {("societe", "222222222"), ("societe", "444444444"), ("societe", "555555555")}
+    assert all(count == 1 for count in sources.values())
+    assert report["fetches"]["pappers"] == 0
+    rows = stored(db)
+    assert rows["444444444"]["forme_juridique"] == "SAS"
+    # Alpha n'est connu que par la recherche Pappers: écrit sans fiche détaillée
+    assert rows["111111111"]["nom_entreprise"] == "Cabinet Alpha"
+    assert report["created"] == len(rows)
+
+@pytest.mark.asyncio
+async def test_existing_company_is_left_untouched_when_siren_list_is_incomplete(db, sources, monkeypatch):
+    monkeypatch.setenv("PAPPERS_API_KEY", "test")
+    db.table("cabinets_comptables").insert({"siren": "111111111", "nom_entreprise": "Cabinet Alpha", "statut": "client"}).execute()
+
+    async def load_nothing(self):
+        # Chargement tronqué (max-rows PostgREST) ou en erreur
+        self.existing_sirens = set()
+
+    monkeypatch.setattr(PappersAPIClient, "_load_existing_sirens", load_nothing)
+    monkeypatch.setattr(SocieteScraper, "_load_existing_sirens", load_nothing)
+
+    report = await CrawlOrchestrator(db).run(ScrapingStatus(is_running=True, progress=0, message=""))
+
+    rows = stored(db)
+    assert rows["111111111"]["statut"] == "client" and rows["111111111"].get("effectif") is None
+    assert rows["444444444"]["statut"] == "à contacter"
+    logged = {log["cabinet_id"] for log in db.table("activity_logs").select("*").execute().data}
+    assert rows["111111111"]["id"] not in logged
+    assert report["created"] == 3 and report["skipped"] >= 1
+
+def test_crawl_rejects_unknown_source(db):
+    client = TestClient(app)
+    token = client.post(f"{settings.API_V1_STR}/auth/login", json={"username": "admin", "password": "secret"}).json()["access_token"]
+
+    response = client.post(f"{settings.API_V1_STR}/scraping/crawl?sources=pappers,infogreffe",
+                           headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 422
@@ -0,0 +1,107 @@
+import asyncio
+import pytest
+from app.models.schemas import ScrapingStatus
+from app.scrapers.pipeline import Pipeline, Stage
+from app.scrapers.societe import SocieteScraper
+
+async def pages(count, per_page, delay=0.0):
+    for page in range(count):
+        await asyncio.sleep(delay)
+        for i in range(per_page):
+            yield page * per_page + i
+
+@pytest.mark.asyncio
+async def test_stages_run_concurrently_and_drop_items():
+    state = {"in_flight": 0, "max_in_flight": 0}
+    written = []
+
+    async def fetch(item):
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        await asyncio.sleep(0.01)
+        state["in_flight"] -= 1
+        return item
+
+    async def parse(item):
+        return None if item % 5 == 0 else item * 10
+
+    async def write(item):
+        written.append(item)
+        return item
+
+    stats = await Pipeline(pages(3, 10), [
+        Stage("fetch", fetch, concurrency=4), Stage("parse", parse), Stage("write", write)
+    ]).run()
+
+    assert sorted(written) == [i * 10 for i in range(30) if i % 5]
+    assert state["max_in_flight"] == 4
+    assert stats["discover"] == {"out": 30}
+    assert stats["parse"] == {"in": 30, "out": 24, "dropped": 6, "errors": 0}
+
+@pytest.mark.asyncio
+async def test_bounded_queues_apply_backpressure_to_discovery():
+    pipeline = None
+    lead = []
+
+    async def slow(item):
+        await asyncio.sleep(0.005)
+        lead.append(pipeline.discovered - pipeline.stages[0].stats["in"])
+        return item
+
+    pipeline = Pipeline(pages(1, 40), [Stage("fetch", slow, concurrency=2, queue_size=3)])
+    await pipeline.run()
+
+    # La découverte ne prend jamais plus d'avance que la file (+ l'élément en attente d'y entrer)
+    assert max(lead) <= 3 + 1
+
+@pytest.mark.asyncio
+async def test_stage_errors_are_counted_and_discovery_errors_propagate():
+    async def flaky(item):
+        if item == 3:
+            raise ValueError("boom")
+        return item
+
+    stats = await Pipeline(pages(1, 5), [Stage("fetch", flaky, concurrency=2)]).run()
+    assert stats["fetch"] == {"in": 5, "out": 4, "dropped": 0, "errors": 1}
+
+    async def broken():
+        yield 1
+        raise RuntimeError("quota")
+
+    with pytest.raises(RuntimeError):
+        await Pipeline(broken(), [Stage("fetch", flaky)]).run()
+
+@pytest.mark.asyncio
+async def test_societe_search_runs_ahead_of_detail_pages(db, monkeypatch):
+    events = []
+    scraper = SocieteScraper(db)
+
+    async def setup_browser():
+        pass
+
+    async def search_companies(dept, page_num):
+        events.append(("search", dept))
+        companies = [{"siren": f"{dept}000000{i}", "nom_entreprise": f"Cabinet {dept}-{i}", "url": "u"} for i in range(2)]
+        return companies, False
+
+    async def fetch_company(company):
+        await asyncio.sleep(0.01)
+        events.append(("detail", company["siren"]))
+        return {"siren": company["siren"], "nom_entreprise": company["nom_entreprise"], "chiffre_affaires": 5000000}
+
+    async def no_delay(*args):
+        pass
+
+    monkeypatch.setattr(scraper, "_setup_browser", setup_browser)
+    monkeypatch.setattr(scraper, "search_companies", search_companies)
+    monkeypatch.setattr(scraper, "fetch_company", fetch_company)
+    monkeypatch.setattr(scraper, "_random_delay", no_delay)
+    status = ScrapingStatus(is_running=True, progress=0, message="")
+
+    await scraper.run_full_scraping(status)
+
+    assert status.new_companies == 16
+    assert len(db.table("cabinets_comptables").select("siren").execute().data) == 16
+    # Toutes les recherches sont faites avant la fin de la lecture des fiches de la première page
+    first_details_done = events.index(("detail", "750000001"))
+    assert sum(1 for kind, _ in events[:first_details_done] if kind == "search") > 1
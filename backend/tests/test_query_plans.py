@@ -0,0 +1,127 @@
+import os
+import pytest
+from app.core.migrations import MigrationError, discover, migrate, pending
+
+# Base Postgres jetable (les migrations y sont appliquées), ex. postgresql://postgres@localhost/scraping_test
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+# Requêtes fréquentes, telles que PostgREST les envoie (routes companies, file de rafraîchissement)
+HOT_QUERIES = {
+    "filter_statut_ca_effectif": (
+        "SELECT * FROM cabinets_comptables WHERE chiffre_affaires >= 3000000 AND effectif >= 10 "
+        "AND statut = 'à contacter' ORDER BY score_prospection DESC"
+    ),
+    "filter_ca_effectif": (
+        "SELECT * FROM cabinets_comptables WHERE chiffre_affaires >= 3000000 AND effectif >= 10 "
+        "ORDER BY score_prospection DESC"
+    ),
+    "filter_statut": "SELECT * FROM cabinets_comptables WHERE statut = 'client' ORDER BY score_prospection DESC",
+    "filter_ville": "SELECT * FROM cabinets_comptables WHERE ville = 'LYON' ORDER BY score_prospection DESC",
+    "by_siren": "SELECT * FROM cabinets_comptables WHERE siren = '100000042'",
+    "bulk_by_siren": "SELECT id FROM cabinets_comptables WHERE siren IN ('100000001', '100000002', '100000003')",
+    "activity_logs": "SELECT * FROM activity_logs WHERE cabinet_id = 42 ORDER BY created_at DESC",
+    "refresh_queue": (
+        "SELECT id, siren FROM cabinets_comptables WHERE last_scraped_at IS NULL OR last_scraped_at < '2026-01-01' "
+        "ORDER BY last_scraped_at ASC NULLS FIRST, id LIMIT 500"
+    ),
+}
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append(sql)
+        if sql.startswith("INSERT INTO schema_migrations"):
+            self.conn.applied[params[0]] = params[2]
+
+    def fetchall(self):
+        return list(self.conn.applied.items())
+
+class FakeConnection:
+    def __init__(self, applied=None):
+        self.applied = dict(applied or {})
+        self.executed = []
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+def test_migrations_are_ordered_and_cover_hot_paths():
+    migrations = discover()
+    versions = [migration.version for migration in migrations]
+
+    assert versions[0] == "000" and versions == sorted(versions)
+    assert len(set(versions)) == len(versions)
+    indexes = next(migration for migration in migrations if migration.name == "hot_path_indexes").sql
+    for columns in ("(statut, score_prospection DESC NULLS FIRST)", "(chiffre_affaires, effectif)",
+                    "(cabinet_id, created_at DESC)", "UNIQUE INDEX idx_cabinets_siren_unique"):
+        assert columns in indexes
+
+def test_migrate_applies_pending_and_refuses_edited_migrations(tmp_path):
+    (tmp_path / "000_base.sql").write_text("CREATE TABLE a (id INT);")
+    (tmp_path / "001_index.sql").write_text("CREATE INDEX a_id ON a (id);")
+    (tmp_path / "notes.txt").write_text("ignoré")
+    conn = FakeConnection()
+
+    assert migrate(conn, str(tmp_path)) == ["000_base", "001_index"]
+    assert "CREATE INDEX a_id ON a (id);" in conn.executed
+    # Deuxième passage: rien à rejouer
+    assert migrate(conn, str(tmp_path)) == []
+
+    (tmp_path / "001_index.sql").write_text("CREATE INDEX a_id ON a (id DESC);")
+    with pytest.raises(MigrationError):
+        pending(discover(str(tmp_path)), conn.applied)
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL non renseignée (Postgres requis)")
+def test_hot_queries_use_indexes():
+    from app.core.migrations import connect
+
+    conn = connect(TEST_DATABASE_URL)
+    try:
+        migrate(conn)
+        with conn.cursor() as cursor:
+            # Jeu de données dans la transaction du test, annulé à la fin
+            cursor.execute(
+                "INSERT INTO cabinets_comptables (siren, nom_entreprise, statut, chiffre_affaires, effectif, "
+                "score_prospection, ville) "
+                "SELECT lpad((100000000 + i)::text, 9, '0'), 'Cabinet ' || i, "
+                "(ARRAY['à contacter', 'contacté', 'client'])[1 + i % 3], i * 1000, i % 50, i % 100, "
+                "(ARRAY['PARIS', 'LYON', 'LILLE'])[1 + i % 3] "
+                "FROM generate_series(1, 5000) AS i"
+            )
+            cursor.execute(
+                "INSERT INTO activity_logs (cabinet_id, action) "
+                "SELECT id, 'update' FROM cabinets_comptables, generate_series(1, 3)"
+            )
+            cursor.execute("ANALYZE cabinets_comptables")
+            cursor.execute("ANALYZE activity_logs")
+            # Sans index utilisable, le planificateur garde un Seq Scan malgré la pénalité
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+            seq_scans = {}
+            for name, sql in HOT_QUERIES.items():
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+                plan = cursor.fetchone()[0][0]["Plan"]
+                nodes = [plan]
+                while nodes:
+                    node = nodes.pop()
+                    if node["Node Type"] == "Seq Scan":
+                        seq_scans[name] = node["Relation Name"]
+                    nodes.extend(node.get("Plans", []))
+        assert seq_scans == {}
+    finally:
+        conn.rollback()
+        conn.close()
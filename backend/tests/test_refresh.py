@@ -0,0 +1,88 @@
+import pytest
+from datetime import datetime, timedelta
+from app.services import refresh
+from app.services.refresh import RefreshScheduler, refresh_priority
+
+NOW = datetime(2026, 6, 1)
+
+def company(siren, days_ago, statut="à contacter", score=None, **fields):
+    scraped = (NOW - timedelta(days=days_ago)).isoformat() if days_ago is not None else None
+    return {"siren": siren, "nom_entreprise": f"Cabinet {siren}", "last_scraped_at": scraped,
+            "statut": statut, "score_prospection": score, **fields}
+
+def test_priority_grows_with_age_and_pipeline_stage():
+    assert refresh_priority(company("1", None), NOW, 90) == float("inf")
+    assert refresh_priority(company("1", 90), NOW, 90) == pytest.approx(1.0)
+    assert refresh_priority(company("1", 30, "en négociation"), NOW, 90) == pytest.approx(1.0)
+    assert refresh_priority(company("1", 30, score=50), NOW, 90) == pytest.approx(0.5)
+    assert refresh_priority(company("1", 400, "abandonné"), NOW, 90) < refresh_priority(company("1", 100), NOW, 90)
+
+def test_plan_orders_due_companies_by_priority(db):
+    db.table("cabinets_comptables").insert([
+        company("111111111", 10),
+        company("222222222", 100),
+        company("333333333", None),
+        company("444444444", 40, "en négociation", score=80),
+        company("555555555", 200, "abandonné"),
+    ]).execute()
+
+    plan = RefreshScheduler(db, None, interval_days=90).plan(now=NOW)
+
+    assert [c["siren"] for c in plan] == ["333333333", "444444444", "222222222"]
+    assert [c["siren"] for c in RefreshScheduler(db, None, interval_days=90).plan(limit=2, now=NOW)] == ["333333333", "444444444"]
+
+def test_plan_reads_due_companies_page_by_page_and_stops_early(db, monkeypatch):
+    db.table("cabinets_comptables").insert(
+        [company(f"1000000{i:02d}", 500 + i) for i in range(2)]
+        + [company(f"2000000{i:02d}", 20) for i in range(10)]
+        + [company(f"3000000{i:02d}", 5) for i in range(10)]
+    ).execute()
+    monkeypatch.setattr(refresh, "PLAN_PAGE_SIZE", 2)
+    queries = 0
+    table = db.table
+
+    def counting_table(name):
+        nonlocal queries
+        queries += 1
+        return table(name)
+
+    monkeypatch.setattr(db, "table", counting_table)
+    scheduler = RefreshScheduler(db, None, interval_days=90)
+
+    # Fiches de 5 jours: jamais dues, même au poids maximal, donc jamais lues (5 pages + la dernière, vide)
+    assert [c["siren"] for c in scheduler.plan(now=NOW)] == ["100000001", "100000000"]
+    assert queries == 7
+    queries = 0
+    # Après la première page, aucune fiche de 20 jours ne peut dépasser celles de 500 jours
+    assert [c["siren"] for c in scheduler.plan(limit=2, now=NOW)] == ["100000001", "100000000"]
+    assert queries == 2
+
+@pytest.mark.asyncio
+async def test_run_updates_only_changed_fields_in_batches(db):
+    db.table("cabinets_comptables").insert([
+        company("111111111", None, statut="en discussion", email="a@cabinet.fr", chiffre_affaires=5000000, effectif=20),
+        company("222222222", None, chiffre_affaires=7000000, effectif=30),
+        company("333333333", None),
+    ]).execute()
+    fresh = {
+        "111111111": {"chiffre_affaires": 6000000, "effectif": 20, "statut": "à contacter", "email": ""},
+        "222222222": {"chiffre_affaires": 7000000, "effectif": 30},
+        "333333333": {},
+    }
+    batches = []
+
+    async def fetch(c):
+        batches.append(c["siren"])
+        return fresh[c["siren"]]
+
+    result = await RefreshScheduler(db, fetch, batch_size=2, batch_pause=0).run()
+
+    assert result == {"planned": 3, "updated": 1, "unchanged": 1, "failed": 1}
+    rows = {r["siren"]: r for r in db.table("cabinets_comptables").select("*").execute().data}
+    assert rows["111111111"]["chiffre_affaires"] == 6000000
+    assert rows["111111111"]["statut"] == "en discussion"
+    assert rows["111111111"]["email"] == "a@cabinet.fr"
+    assert rows["222222222"]["last_scraped_at"] is not None
+    assert rows["333333333"]["last_scraped_at"] is None
+    logs = db.table("activity_logs").select("*").execute().data
+    assert [log["details"] for log in logs] == [{"fields_updated": ["chiffre_affaires"], "source": "refresh"}]
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from app.core import cache
+from app.scrapers.pappers import PappersAPIClient
+from app.scrapers.detail_cache import DetailCache
+from app.scrapers.metrics import ScraperMetrics, error_type
+from app.models.schemas import ScrapingStatus
+
+RESULTS = [
+    {"siren": "111111111", "nom_entreprise": "Cabinet Alpha", "chiffre_affaires": 5000000},
+    {"siren": "222222222", "nom_entreprise": "Cabinet Beta", "chiffre_affaires": 6000000},
+    {"siren": "333333333", "nom_entreprise": "Cabinet Déjà Connu", "chiffre_affaires": 7000000},
+]
+
+@pytest_asyncio.fixture
+async def pappers_server(pappers_stub):
+    """Serveur local imitant /recherche et /entreprise (détail en erreur pour 222222222)"""
+    async def recherche(request):
+        return web.json_response({"resultats": [dict(r) for r in RESULTS], "total": len(RESULTS), "par_page": 100})
+
+    async def entreprise(request):
+        if request.query["siren"] == "222222222":
+            return web.json_response({"error": "boom"}, status=503)
+        return web.json_response({"effectif": 40})
+
+    # Pause entre pages conservée: le temps passé en attente figure dans les métriques
+    await pappers_stub(recherche, entreprise, PAGE_PAUSE=PappersAPIClient.PAGE_PAUSE)
+
+@pytest.mark.asyncio
+async def test_pappers_run_reports_stage_timings_and_errors(db, pappers_server):
+    db.table("cabinets_comptables").insert({"siren": "333333333", "nom_entreprise": "Cabinet Déjà Connu"}).execute()
+    status = ScrapingStatus(is_running=True, progress=0, message="")
+
+    await PappersAPIClient(db).run_full_scraping(status)
+
+    metrics = status.metrics
+    assert metrics["pages"] == 1
+    assert metrics["companies"] == {"created": 2, "skipped": 1}
+    assert metrics["stages"]["search"]["count"] == 1
+    # Le 503 est retenté (3 tentatives) avant d'insérer la fiche avec les seules données de recherche
+    assert metrics["stages"]["detail"]["count"] == 4
+    assert metrics["details_skipped"] == {"known": 1}
+    assert metrics["stages"]["db_write"]["count"] == 2
+    assert metrics["stages"]["sleep"]["total_seconds"] >= 0.5
+    assert metrics["errors"] == {"http_5xx": 3}
+    assert metrics["error_rate"] == 0.6
+    assert metrics["host"]["concurrency_limit"] < 4
+
+@pytest.mark.asyncio
+async def test_siren_on_two_result_pages_is_fetched_and_written_once(db, pappers_stub, monkeypatch):
+    detail_calls = []
+
+    async def recherche(request):
+        # Classement instable: le même cabinet revient en tête de chaque page
+        page = int(request.query["page"])
+        results = [dict(RESULTS[0]), {"siren": f"90000000{page}", "nom_entreprise": f"Cabinet {page}", "chiffre_affaires": 5000000}]
+        return web.json_response({"resultats": results, "total": 4, "par_page": 2})
+
+    async def entreprise(request):
+        detail_calls.append(request.query["siren"])
+        # Fiche lente: la page suivante arrive pendant la récupération du premier exemplaire
+        await asyncio.sleep(0.05)
+        return web.json_response({"effectif": 40})
+
+    await pappers_stub(recherche, entreprise)
+    cleared = []
+    monkeypatch.setattr(cache, "invalidate_cache", lambda: cleared.append(1))
+    status = ScrapingStatus(is_running=True, progress=0, message="")
+    await PappersAPIClient(db).run_full_scraping(status)
+
+    assert detail_calls.count("111111111") == 1
+    assert status.metrics["companies"] == {"created": 3, "skipped": 1}
+    assert status.metrics["errors"] == {}
+    assert len(db.table("cabinets_comptables").select("siren").eq("siren", "111111111").execute().data) == 1
+    # Un seul lot de créations: le cache n'est vidé qu'une fois, en fin de run
+    assert len(cleared) == 1
+
+def test_detail_call_skipped_when_search_payload_is_sufficient(db):
+    client = PappersAPIClient(db)
+    client.existing_sirens = {"333333333"}
+    complete = {"siren": "444444444", "chiffre_affaires": 5000000, **{field: None for field in client.DETAIL_FIELDS}}
+
+    assert client._needs_details({"siren": "111111111", "chiffre_affaires": 5000000})
+    assert not client._needs_details({"siren": "333333333"})
+    assert not client._needs_details({"siren": "555555555", "chiffre_affaires": 90000000})
+    assert not client._needs_details(complete)
+    assert client.metrics.details_skipped == {"known": 1, "filtered": 1, "sufficient": 1}
+
+def test_detail_cache_expires_and_rejects_unsafe_keys(tmp_path):
+    cache = DetailCache(str(tmp_path), ttl=60)
+    cache.set("111111111", {"effectif": 40})
+    cache.set("../evil", {"x": 1})
+
+    assert cache.get("111111111") == {"effectif": 40}
+    assert cache.get("../evil") is None
+    assert [p.name for p in tmp_path.iterdir()] == ["111111111.json"]
+
+    cache.ttl = -1
+    assert cache.get("111111111") is None
+    assert cache.purge() == 1
+
+@pytest.mark.asyncio
+async def test_full_run_purges_expired_detail_cache(db, pappers_server, tmp_path):
+    stale = tmp_path / "999999999.json"
+    stale.write_text("{}")
+    os.utime(stale, (0, 0))
+    client = PappersAPIClient(db)
+    client.detail_cache = DetailCache(str(tmp_path), ttl=3600)
+
+    await client.run_full_scraping(ScrapingStatus(is_running=True, progress=0, message=""))
+
+    # Fiches du passage gardées, fiche périmée supprimée
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["111111111.json", "333333333.json"]
+
+def test_snapshot_rates_and_shares():
+    metrics = ScraperMetrics("test")
+    metrics.started_at = 0.0
+    with metrics.stage("detail"):
+        pass
+    metrics.page_done()
+    metrics.company_done("created")
+    metrics.company_done("filtered")
+
+    snapshot = metrics.snapshot(now=60.0)
+    assert snapshot["pages_per_min"] == 1.0
+    assert snapshot["companies_per_min"] == 2.0
+    assert snapshot["created_per_min"] == 1.0
+    assert snapshot["stages"]["detail"]["share"] == 1.0
+
+def test_error_type_categories():
+    class HTTPError(Exception):
+        def __init__(self, status):
+            self.status = status
+
+    assert error_type(HTTPError(429)) == "http_429"
+    assert error_type(HTTPError(404)) == "http_4xx"
+    assert error_type(TimeoutError()) == "timeout"
+    assert error_type(ConnectionResetError()) == "network"
+    assert error_type(ValueError()) == "ValueError"
@@ -0,0 +1,45 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.services.search import CompanySearchIndex, search_companies
+
+client = TestClient(app)
+
+COMPANIES = [
+    {"siren": "123456789", "nom_entreprise": "Cabinet Dupont Expertise", "chiffre_affaires": 5000000},
+    {"siren": "123499999", "nom_entreprise": "Société Générale d'Audit", "chiffre_affaires": 8000000},
+    {"siren": "987654321", "nom_entreprise": "Fiduciaire Lefèvre & Associés", "chiffre_affaires": 12000000},
+]
+
+def test_siren_prefix_search(db):
+    db.table("cabinets_comptables").insert(COMPANIES).execute()
+    results = search_companies(db, "1234")
+    assert [r["siren"] for r in results] == ["123456789", "123499999"]
+
+def test_name_search_ignores_accents_and_typos(db):
+    db.table("cabinets_comptables").insert(COMPANIES).execute()
+    assert search_companies(db, "lefevre")[0]["siren"] == "987654321"
+    assert search_companies(db, "societe generale")[0]["siren"] == "123499999"
+    assert search_companies(db, "Dupond")[0]["siren"] == "123456789"
+
+def test_index_is_refreshed_after_writes(db):
+    db.table("cabinets_comptables").insert(COMPANIES).execute()
+    assert search_companies(db, "Martin") == []
+    db.table("cabinets_comptables").insert({"siren": "555555555", "nom_entreprise": "Martin Conseil"}).execute()
+    assert search_companies(db, "Martin")[0]["siren"] == "555555555"
+
+def test_search_endpoint_and_filter(db):
+    db.table("cabinets_comptables").insert(COMPANIES).execute()
+    response = client.get(f"{settings.API_V1_STR}/companies/search", params={"q": "fiduciaire"})
+    assert response.status_code == 200
+    assert response.json()[0]["nom_entreprise"] == "Fiduciaire Lefèvre & Associés"
+
+    response = client.post(f"{settings.API_V1_STR}/companies/filter", json={"search": "générale"})
+    assert [c["siren"] for c in response.json()] == ["123499999"]
+
+def test_ranking_prefers_closest_name():
+    index = CompanySearchIndex([
+        {"id": 1, "siren": "1", "nom_entreprise": "Audit Conseil Paris Ouest"},
+        {"id": 2, "siren": "2", "nom_entreprise": "Audit Conseil"},
+    ])
+    assert [r["id"] for r in index.search("audit conseil")] == [2, 1]
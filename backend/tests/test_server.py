@@ -0,0 +1,61 @@
+import signal
+import pytest
+from app import server
+from app.config import settings
+from app.core import lifecycle
+
+@pytest.fixture
+def shutdown_flag(monkeypatch):
+    monkeypatch.setattr(lifecycle, "_shutting_down", False)
+
+def test_worker_count_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 3)
+    assert server.worker_count() == 3
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 0)
+    assert server.worker_count() >= 1
+
+def test_reload_forces_single_worker(monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 4)
+    monkeypatch.setattr(settings, "SERVER_RELOAD", True)
+    assert server.build_config().workers == 1
+    monkeypatch.setattr(settings, "SERVER_RELOAD", False)
+    config = server.build_config()
+    assert config.workers == 4
+    assert config.timeout_graceful_shutdown == settings.SERVER_GRACEFUL_TIMEOUT
+
+def test_exit_signal_marks_shutdown(shutdown_flag):
+    instance = server.Server(server.build_config())
+    instance.handle_exit(signal.SIGTERM, None)
+    assert instance.should_exit
+    assert lifecycle.is_shutting_down()
+
+def test_supervisor_stops_workers_in_parallel(monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_GRACEFUL_TIMEOUT", 0)
+    monkeypatch.setattr(server, "SHUTDOWN_MARGIN_SECONDS", 0)
+    events = []
+
+    class FakeProcess:
+        def __init__(self, pid, stuck):
+            self.pid = pid
+            self.stuck = stuck
+
+        def terminate(self):
+            events.append(("terminate", self.pid))
+
+        def join(self, timeout=None):
+            events.append(("join", self.pid))
+
+        def is_alive(self):
+            return self.stuck
+
+        def kill(self):
+            events.append(("kill", self.pid))
+            self.stuck = False
+
+    supervisor = server.Supervisor(server.build_config(), target=None, sockets=[])
+    supervisor.processes = [FakeProcess(1, False), FakeProcess(2, True), FakeProcess(3, False)]
+    supervisor.shutdown()
+
+    # Tous les workers reçoivent le signal avant la première attente; le worker bloqué est tué
+    assert events[:3] == [("terminate", 1), ("terminate", 2), ("terminate", 3)]
+    assert ("kill", 2) in events and ("kill", 1) not in events
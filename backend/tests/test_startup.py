@@ -0,0 +1,12 @@
+from benchmarks.bench_startup import LAZY_MODULES, eager_heavy_modules, import_times
+
+def test_heavy_dependencies_are_not_imported_at_startup():
+    times = import_times("app.main")
+    assert "app.main" in times
+    assert eager_heavy_modules(times) == []
+
+def test_lazy_modules_are_importable_on_demand():
+    # Le module d'import CSV tire pandas: la détection doit le voir
+    times = import_times("app.services.data_processing")
+    assert "pandas" in eager_heavy_modules(times)
+    assert "pandas" in LAZY_MODULES
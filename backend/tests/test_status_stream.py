@@ -0,0 +1,54 @@
+import asyncio
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.models.schemas import ScrapingStatus
+from app.services.status_stream import status_events
+
+client = TestClient(app)
+
+def parse(event):
+    lines = dict(line.split(": ", 1) for line in event.strip().split("\n"))
+    return lines["event"], json.loads(lines["data"])
+
+@pytest.mark.asyncio
+async def test_bursts_are_coalesced_into_deltas():
+    status = ScrapingStatus(is_running=True, progress=0, message="start")
+    state = {"disconnected": False}
+
+    async def is_disconnected():
+        return state["disconnected"]
+
+    async def scraper():
+        for i in range(1, 101):
+            status.progress = i
+            status.new_companies = i
+            await asyncio.sleep(0.001)
+        status.message = "done"
+
+    events = []
+
+    async def consume():
+        async for event in status_events(lambda: {"pappers": status.model_dump()}, is_disconnected, interval=0.05):
+            events.append(parse(event))
+            if events[-1][1].get("pappers", {}).get("message") == "done":
+                state["disconnected"] = True
+
+    await asyncio.wait_for(asyncio.gather(scraper(), consume()), timeout=5)
+
+    assert events[0][0] == "snapshot"
+    assert all(name == "progress" for name, _ in events[1:])
+    assert len(events) < 20
+
+    # Le snapshot + les deltas reconstituent l'état final; les champs inchangés ne sont pas renvoyés
+    rebuilt = dict(events[0][1]["pappers"])
+    for _, data in events[1:]:
+        assert "is_running" not in data["pappers"]
+        rebuilt.update(data["pappers"])
+    assert rebuilt == status.model_dump()
+
+def test_unknown_source_is_rejected():
+    response = client.get(f"{settings.API_V1_STR}/scraping/events", params={"sources": "pappers,unknown"})
+    assert response.status_code == 404
@@ -0,0 +1,56 @@
+import pytest
+from datetime import timedelta
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.core.auth import get_current_active_user, get_current_user
+from app.core.security import create_access_token
+from app.services.users import UserStore, user_store
+
+client = TestClient(app)
+
+async def current_active_user(username: str):
+    token = create_access_token({"sub": username}, expires_delta=timedelta(minutes=5))
+    return await get_current_active_user(await get_current_user(token))
+
+@pytest.mark.asyncio
+async def test_active_user_check_is_cached(table_calls):
+    for _ in range(5):
+        user = await current_active_user("admin")
+    assert user["username"] == "admin"
+    assert table_calls == ["users"]
+
+@pytest.mark.asyncio
+async def test_disabling_user_invalidates_cache(table_calls):
+    await current_active_user("admin")
+    user_store.update("admin", is_active=False)
+
+    with pytest.raises(HTTPException) as exc:
+        await current_active_user("admin")
+    assert exc.value.status_code == 400
+
+@pytest.mark.asyncio
+async def test_unknown_user_is_rejected(db):
+    with pytest.raises(HTTPException) as exc:
+        await current_active_user("ghost")
+    assert exc.value.status_code == 401
+
+def test_cache_is_bounded_and_skips_unknown_users(db):
+    store = UserStore(ttl=30, max_entries=2)
+    for name in ("alice", "bob", "carol"):
+        store.create(name, "secret")
+        assert store.get(name)["username"] == name
+    for i in range(100):
+        assert store.get(f"ghost{i}") is None
+
+    assert list(store._entries) == ["bob", "carol"]
+
+def test_login_uses_database_users(db):
+    user_store.create("alice", "wonderland")
+    response = client.post(f"{settings.API_V1_STR}/auth/login", json={"username": "alice", "password": "wonderland"})
+    assert response.status_code == 200
+
+    user_store.update("alice", is_active=False)
+    response = client.post(f"{settings.API_V1_STR}/auth/login", json={"username": "alice", "password": "wonderland"})
+    assert response.status_code == 401
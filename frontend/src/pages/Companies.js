@@ -23,7 +23,8 @@ import {
   ListItemText,
   Divider,
   LinearProgress,
-  InputAdornment
+  InputAdornment,
+  Autocomplete
 } from '@mui/material';
 import {
   Search,
@@ -225,6 +226,12 @@ export default function Companies() {
     () => api.post('/companies/filter', filters).then(res => res.data)
   );
 
+  const { data: suggestions = [] } = useQuery(
+    ['company-search', filters.search],
+    () => api.get('/companies/search', { params: { q: filters.search, limit: 10 } }).then(res => res.data),
+    { enabled: filters.search.length >= 2, keepPreviousData: true }
+  );
+
   const { data: cities = [] } = useQuery(
     'cities',
     () => api.get('/stats/cities').then(res => res.data.cities)
@@ -386,14 +393,35 @@ export default function Companies() {
             </FormControl>
           </Grid>
           <Grid item xs={12} md={3}>
-            <TextField
-              label="Recherche"
-              fullWidth
-              value={filters.search}
-              onChange={(e) => setFilters({ ...filters, search: e.target.value })}
-              InputProps={{
-                startAdornment: <InputAdornment position="start"><Search /></InputAdornment>,
+            <Autocomplete
+              freeSolo
+              filterOptions={(options) => options}
+              options={filters.search.length >= 2 ? suggestions : []}
+              getOptionLabel={(option) => typeof option === 'string' ? option : option.nom_entreprise}
+              renderOption={(props, option) => (
+                <li {...props} key={option.siren}>
+                  <ListItemText primary={option.nom_entreprise} secondary={option.siren} />
+                </li>
+              )}
+              inputValue={filters.search}
+              onInputChange={(e, value) => setFilters({ ...filters, search: value })}
+              onChange={(e, option) => {
+                if (option && typeof option !== 'string') {
+                  setSelectedCompany(option.siren);
+                  setDetailsOpen(true);
+                }
               }}
+              renderInput={(params) => (
+                <TextField
+                  {...params}
+                  label="Recherche"
+                  fullWidth
+                  InputProps={{
+                    ...params.InputProps,
+                    startAdornment: <InputAdornment position="start"><Search /></InputAdornment>,
+                  }}
+                />
+              )}
             />
           </Grid>
           <Grid item xs={12} md={1}>
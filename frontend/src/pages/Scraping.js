@@ -43,48 +43,7 @@ import axios from 'axios';
 
 const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000/api/v1';
 
-function ScrapingSource({ source, onStart }) {
-  const [status, setStatus] = useState(null);
-  const [intervalId, setIntervalId] = useState(null);
-
-  React.useEffect(() => {
-    checkStatus();
-    return () => {
-      if (intervalId) clearInterval(intervalId);
-    };
-  }, []);
-
-  const checkStatus = async () => {
-    try {
-      const token = localStorage.getItem('token');
-      const response = await axios.get(`${API_URL}/scraping/status/${source.id}`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      setStatus(response.data);
-      
-      if (!response.data.is_running && intervalId) {
-        clearInterval(intervalId);
-        setIntervalId(null);
-      }
-    } catch (error) {
-      console.error('Error checking status:', error);
-    }
-  };
-
-  const handleStart = async () => {
-    await onStart();
-    const id = setInterval(checkStatus, 2000);
-    setIntervalId(id);
-    checkStatus();
-  };
-
-  const handleStop = () => {
-    if (intervalId) {
-      clearInterval(intervalId);
-      setIntervalId(null);
-    }
-  };
-
+function ScrapingSource({ source, status, onStart, onStop, onRefresh }) {
   const getIcon = () => {
     switch (source.id) {
       case 'pappers':
@@ -160,7 +119,7 @@ function ScrapingSource({ source, onStart }) {
             size="small" 
             color="error" 
             startIcon={<Stop />}
-            onClick={handleStop}
+            onClick={onStop}
             disabled
           >
             Arrêter
@@ -170,7 +129,7 @@ function ScrapingSource({ source, onStart }) {
             size="small" 
             color="primary" 
             startIcon={<PlayArrow />}
-            onClick={handleStart}
+            onClick={onStart}
             disabled={status?.is_running}
           >
             Lancer
@@ -179,7 +138,7 @@ function ScrapingSource({ source, onStart }) {
         <Button 
           size="small" 
           startIcon={<Refresh />}
-          onClick={checkStatus}
+          onClick={onRefresh}
         >
           Actualiser
         </Button>
@@ -362,6 +321,54 @@ export default function Scraping() {
     }
   ];
 
+  const [statuses, setStatuses] = useState({});
+  const [following, setFollowing] = useState(false);
+  const anyRunning = sources.some((source) => statuses[source.id]?.is_running);
+  const streaming = following || anyRunning;
+
+  const fetchStatuses = async () => {
+    try {
+      const token = localStorage.getItem('token');
+      const response = await axios.get(`${API_URL}/scraping/status`, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      setStatuses(response.data);
+    } catch (error) {
+      console.error('Error checking status:', error);
+    }
+  };
+
+  React.useEffect(() => {
+    fetchStatuses();
+  }, []);
+
+  // Once the job reports it is running, anyRunning keeps the stream open until it ends
+  React.useEffect(() => {
+    if (anyRunning) setFollowing(false);
+  }, [anyRunning]);
+
+  // A single stream for every card, open only while a job is running or just started
+  React.useEffect(() => {
+    if (!streaming) return undefined;
+    const ids = sources.map((source) => source.id).join(',');
+    const events = new EventSource(`${API_URL}/scraping/events?sources=${ids}`);
+    events.addEventListener('snapshot', (e) => {
+      setStatuses(JSON.parse(e.data));
+    });
+    events.addEventListener('progress', (e) => {
+      const deltas = JSON.parse(e.data);
+      setStatuses((current) => {
+        const next = { ...current };
+        Object.entries(deltas).forEach(([id, delta]) => {
+          next[id] = { ...current[id], ...delta };
+        });
+        return next;
+      });
+    });
+    events.onerror = () => console.error('Scraping status stream interrupted, retrying...');
+    return () => events.close();
+  }, [streaming]); // eslint-disable-line react-hooks/exhaustive-deps
+
   const startScrapingMutation = useMutation(
     async (sourceId) => {
       const token = localStorage.getItem('token');
@@ -372,6 +379,9 @@ export default function Scraping() {
           headers: { Authorization: `Bearer ${token}` }
         }
       );
+    },
+    {
+      onSuccess: () => setFollowing(true)
     }
   );
 
@@ -407,7 +417,10 @@ export default function Scraping() {
           <Grid item xs={12} md={4} key={source.id}>
             <ScrapingSource
               source={source}
+              status={statuses[source.id]}
               onStart={() => startScrapingMutation.mutate(source.id)}
+              onStop={() => setFollowing(false)}
+              onRefresh={fetchStatuses}
             />
           </Grid>
         ))}